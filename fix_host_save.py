@@ -4,75 +4,63 @@
 
 # pyright: reportUnknownMemberType=false, reportUnknownVariableType=false
 
-import json
 import os
 from pathlib import Path
 from shutil import SameFileError
 import sys
-import re
 from typing import Any
 from logger import pprint
 
-from json_tools import json_serialize, parse_constant, load_json, write_json
+from json_tools import load_json, write_json
 from local_types import JsonType, exit_with_message
-from validate_storages_exist import correct_storages, validate_storages
+from uuid_rewrite import RewriteMapping, RewriteReport, report_total
+from validate_storages_exist import ContainerIds, correct_storages, get_container_ids, validate_storages
 
-from palworld_save_tools.archive import UUID
+from palworld_save_tools.archive import UUID, set_value
 from palworld_save_tools.gvas import GvasFile
-from palworld_save_tools.palsav import compress_gvas_to_sav, decompress_sav_to_gvas
-from palworld_save_tools.paltypes import PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS
-
-
-def find_and_replace(json_text: str, last_text: str, old: str, new: str, step: int = 0) -> tuple[str, str]:
-    """Temporary Method Docstring."""
-    found: list[Any] = re.compile(re.escape(old)).findall(json_text)
-    json_text_new: str | None = None
-
-    if len(found) <= 0:
-        return (json_text, last_text)
-    if len(found) > 0:
-        pprint(f"[green][bold]INFO:[/bold][/green] Found {len(found)} instances of the old GUID Formatted: {old}", indent=2)
-        json_text_new = json_text.replace(old, new)
-
-    if json_text_new != last_text and json_text_new != "" and json_text_new is not None:
-        pprint(f"Step {step}: json_text != last_text", indent=3)
-        last_text_new: str = str(json_text)
-
-        try:
-            assert isinstance(json_text_new, str)
-            assert isinstance(last_text_new, str)
-            return (json_text_new, last_text_new)
-        # pylint: disable-next=W0718
-        except BaseException as exception:
-            pprint(exception)
-            pprint("json_text_new = ", len(json_text_new), " ", type(json_text_new), indent=4)
-            pprint("last_text_new = ", len(last_text_new), " ", type(last_text_new), indent=4)
-
-    elif json_text_new == "":
-        pprint(f'Step {step}: json_text == ""', indent=3)
-        sys.exit(1)
-
-    elif json_text_new is None:
-        pprint(f"Step {step}: json_text is None", indent=3)
-        sys.exit(1)
-
-    return (json_text, last_text)
+from palworld_save_tools.palsav import compress_gvas_to_sav, decompress_sav_file
+from palworld_save_tools.paltypes import PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TRANSFER_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS
+from palworld_save_tools.rawdata import map_object
+from palworld_save_tools.uuid_index import UUIDIndex, hash_file, location_section, resolve_location
 
 
-def json_text_operation(json_data: JsonType, guid_formatted: tuple[str, str], guid: tuple[str, str], instance_id: tuple[UUID, UUID]) -> JsonType:
+def transfer_mapping(guid_formatted: tuple[str, str], guid: tuple[str, str], instance_id: tuple[UUID, UUID], mapping: RewriteMapping | None = None, name: str | None = None) -> RewriteMapping:
     r"""
-    Finds all text in the json data that matches the ``old_guid`` and replaces it with the ``new_guid``,
+    Records the substitutions of one transfer, ``old_guid`` to ``new_guid``,
     along with ``old_guid_formatted`` to ``new_guid_formatted``,
-    and finally ``new_instance_id`` to  ``old_instance_id``.
+    and finally ``new_instance_id`` to  ``old_instance_id``, into ``mapping``.
     """
-    json_text: str = json.dumps(json_data, default=json_serialize)
-    _temp_json_text1: str = str(json_text)
+    if mapping is None:
+        mapping = RewriteMapping()
+    mapping.add_uuid(guid_formatted[0], guid_formatted[1], name)
+    mapping.add_uuid(instance_id[0], instance_id[1], name)
+    mapping.add_text(guid[0], guid[1], name)
+    return mapping
 
-    (json_text1, _temp_json_text2) = find_and_replace(json_text, _temp_json_text1, guid_formatted[0], guid_formatted[1], 1)
-    (json_text2, _temp_json_text3) = find_and_replace(json_text1, _temp_json_text2, guid[0], guid[1], 2)
-    (json_text3, _) = find_and_replace(json_text2, _temp_json_text3, str(instance_id[0]), str(instance_id[1]), 3)
 
-    return json.loads(json_text3, parse_constant=parse_constant)
+def rewrite_operation(json_data: JsonType, mapping: RewriteMapping) -> JsonType:
+    r"""
+    Replaces, in place, every reference recorded in ``mapping`` in a single walk over the parsed tree,
+    no matter how many transfers were recorded into it.
+    Nothing is replaced when a recorded reference is found inside data that was not decoded.
+    """
+    undecoded: RewriteReport = mapping.find_undecoded(json_data)
+    if len(undecoded) > 0:
+        for old, paths in undecoded.items():
+            pprint(f"[red][bold]ERROR:[/bold][/red] Found {report_total(undecoded, old)} instances of the old GUID {old} in undecoded data", indent=2)
+            for path, count in paths.items():
+                pprint(f"{count} at {path}", indent=3)
+        exit_with_message(ValueError("Some old GUIDs are inside sections that were not decoded, so they cannot be replaced. Decode these sections by adding their custom properties to PALWORLD_TRANSFER_CUSTOM_PROPERTIES."), 1)
+
+    report: RewriteReport = mapping.apply(json_data)
+
+    for old, paths in report.items():
+        name: str = f" ({mapping.labels[old]})" if old in mapping.labels else ""
+        pprint(f"[green][bold]INFO:[/bold][/green] Found {report_total(report, old)} instances of the old GUID: {old}{name}", indent=2)
+        for path, count in paths.items():
+            pprint(f"{count} at {path}", indent=3)
+
+    return json_data
 
 
 def guild_fix_method(level_json: JsonType, new_guid_formatted: str, old_guid_formatted: str, old_instance_id: UUID) -> JsonType:
@@ -84,27 +72,32 @@ def guild_fix_method(level_json: JsonType, new_guid_formatted: str, old_guid_for
 
         if group_id["value"]["GroupType"]["value"]["value"] == "EPalGroupType::Guild":
             group_data = group_id["value"]["RawData"]["value"]
+            # Decoded by a custom property, so edits below it go through set_value to mark it dirty
+            raw_data = ("worldSaveData", "value", "GroupSaveDataMap", "value", i, "value", "RawData", "value")
 
             if "individual_character_handle_ids" in group_data:
                 handle_ids = group_data["individual_character_handle_ids"]
 
                 for j, _ in enumerate(handle_ids):
                     if handle_ids[j]["instance_id"] == old_instance_id:
-                        level_json["properties"]["worldSaveData"]["value"]["GroupSaveDataMap"]["value"][i]["value"]["RawData"]["value"]["individual_character_handle_ids"][j]["guid"] = new_guid_formatted
+                        set_value(level_json["properties"], (*raw_data, "individual_character_handle_ids", j, "guid"), new_guid_formatted)
 
             if "admin_player_uid" in group_data:
                 if old_guid_formatted == group_data["admin_player_uid"]:
-                    level_json["properties"]["worldSaveData"]["value"]["GroupSaveDataMap"]["value"][i]["value"]["RawData"]["value"]["admin_player_uid"] = new_guid_formatted
+                    set_value(level_json["properties"], (*raw_data, "admin_player_uid"), new_guid_formatted)
 
             if "players" in group_data:
                 for j, _ in enumerate(group_data["players"]):
                     if old_guid_formatted == group_data["players"][j]["player_uid"]:
-                        level_json["properties"]["worldSaveData"]["value"]["GroupSaveDataMap"]["value"][i]["value"]["RawData"]["value"]["players"][j]["player_uid"] = new_guid_formatted
+                        set_value(level_json["properties"], (*raw_data, "players", j, "player_uid"), new_guid_formatted)
     return level_json
 
 
-def patch_old_save(new_json: JsonType, old_json: JsonType, level_json: JsonType, new_guid_formatted: str) -> tuple[JsonType, UUID, UUID]:
-    """Fixes the host save based on specified inputs."""
+def patch_old_save(new_json: JsonType, old_json: JsonType, level_json: JsonType, new_guid_formatted: str, uuid_index: UUIDIndex | None = None) -> tuple[JsonType, UUID, UUID]:
+    r"""
+    Fixes the host save based on specified inputs.
+    When ``uuid_index`` is given the old instance is found with an index lookup instead of scanning ``CharacterSaveParameterMap``.
+    """
 
     # Replace all instances of the old GUID with the new GUID.
     pprint("[green][bold]Modifying[/bold][/green] JSON save data...", indent=1)
@@ -116,6 +109,15 @@ def patch_old_save(new_json: JsonType, old_json: JsonType, level_json: JsonType,
     new_instance_id: UUID = new_json["properties"]["SaveData"]["value"]["IndividualId"]["value"]["InstanceId"]["value"]
 
     # Level data replacement.
+    if uuid_index is not None:
+        for location in uuid_index.lookup(old_instance_id):
+            if location_section(location) == "CharacterSaveParameterMap" and location[-3:] == ("key", "InstanceId", "value"):
+                (entry, key) = resolve_location(level_json["properties"], location[:-2])
+                # Marks the property and those enclosing it dirty when read with spans
+                entry[key]["PlayerUId"]["value"] = new_guid_formatted
+                break
+        return (level_json, new_instance_id, old_instance_id)
+
     instance_ids_len: int = len(level_json["properties"]["worldSaveData"]["value"]["CharacterSaveParameterMap"]["value"])
     for i in range(instance_ids_len):
         instance_id: str = level_json["properties"]["worldSaveData"]["value"]["CharacterSaveParameterMap"]["value"][i]["key"]["InstanceId"]["value"]
@@ -126,8 +128,22 @@ def patch_old_save(new_json: JsonType, old_json: JsonType, level_json: JsonType,
     return (level_json, new_instance_id, old_instance_id)
 
 
-def fix_host_save(save_path: str, new_guid: str, old_guid: str, guild_fix: bool, level_sav: JsonType | None = None) -> None:
-    """Fixes the host save based on specified inputs."""
+def fix_host_save(
+    save_path: str,
+    new_guid: str,
+    old_guid: str,
+    guild_fix: bool,
+    level_sav: JsonType | None = None,
+    mapping: RewriteMapping | None = None,
+    name: str | None = None,
+    uuid_index: UUIDIndex | None = None,
+) -> JsonType:
+    r"""
+    Fixes the host save based on specified inputs.
+    When ``level_sav`` is given it is edited and returned instead of being written, so several transfers can be chained on one loaded level.
+    When ``mapping`` is given the UUID substitutions are only recorded into it, to be applied for every transfer at once with ``rewrite_operation``.
+    ``uuid_index`` must describe the layout of ``level_sav``, see ``load_level_uuid_index``.
+    """
 
     is_cli: bool = os.environ.get("is_cli") is not None and os.environ.get("is_cli") == "true"
 
@@ -179,7 +195,7 @@ def fix_host_save(save_path: str, new_guid: str, old_guid: str, guild_fix: bool,
     level_json: JsonType = {}
 
     if level_sav is None:
-        level_json = load_json(level_sav_path, sav_to_json)
+        level_json = sav_to_json(level_sav_path, keep_spans=True, transfer=True)
     else:
         level_json = level_sav
 
@@ -188,11 +204,12 @@ def fix_host_save(save_path: str, new_guid: str, old_guid: str, guild_fix: bool,
 
     level_json_1: JsonType | None = None
     if old_guid.lower() == "81a80c0a000000000000000000000000" and new_guid.lower() == "c8da11f6000000000000000000000000":
-        if validate_storages(level_json, old_json) and not validate_storages(level_json, new_json):
+        container_ids: ContainerIds = get_container_ids(level_json)
+        if validate_storages(level_json, old_json, container_ids) and not validate_storages(level_json, new_json, container_ids):
             pprint("[bold][green]SUCCESS:[/green][/bold] Storage validated successfully on old and not new player file", indent=2)
         else:
             pprint("[bold][red]FAILURE:[/red][/bold] Storage validated unsuccessfully on old and were still on new player file", indent=2)
-            (success_correction, json_returned) = correct_storages(level_json, new_json, old_json)
+            (success_correction, json_returned) = correct_storages(level_json, new_json, old_json, container_ids)
             if not success_correction:
                 pprint("[bold][red]FAILURE:[/red][/bold] Storage corrected unsuccessfully on old and were still on new player file", indent=2)
             else:
@@ -204,7 +221,7 @@ def fix_host_save(save_path: str, new_guid: str, old_guid: str, guild_fix: bool,
     new_instance_id: UUID
     old_instance_id: UUID
 
-    output: tuple[JsonType, UUID, UUID] = patch_old_save(new_json, old_json, level_json_1, new_guid_formatted)
+    output: tuple[JsonType, UUID, UUID] = patch_old_save(new_json, old_json, level_json_1, new_guid_formatted, uuid_index)
 
     level_json_2: JsonType = output[0]
     new_instance_id = output[1]
@@ -217,7 +234,11 @@ def fix_host_save(save_path: str, new_guid: str, old_guid: str, guild_fix: bool,
     if level_json_3 is None:
         level_json_3 = level_json_2
 
-    level_json_4: JsonType = json_text_operation(level_json_3, (new_guid_formatted, old_guid_formatted), (new_guid, old_guid), (new_instance_id, old_instance_id))
+    level_json_4: JsonType = level_json_3
+    if mapping is None:
+        level_json_4 = rewrite_operation(level_json_3, transfer_mapping((new_guid_formatted, old_guid_formatted), (new_guid, old_guid), (new_instance_id, old_instance_id), name=name))
+    else:
+        transfer_mapping((new_guid_formatted, old_guid_formatted), (new_guid, old_guid), (new_instance_id, old_instance_id), mapping, name)
 
     # Convert JSON back to save files.
     if level_sav is None:
@@ -235,23 +256,64 @@ def fix_host_save(save_path: str, new_guid: str, old_guid: str, guild_fix: bool,
 
     pprint("Done!", indent=1)
 
+    return level_json_4
+
 
-def sav_to_json(filepath: str) -> dict[str, Any]:
-    """Transform the sav file data to json data"""
+def sav_to_json(filepath: str, uuid_index: UUIDIndex | None = None, keep_spans: bool = False, use_mmap: bool = True, workers: int = 1, map_object_workers: int = 1, transfer: bool = False) -> dict[str, Any]:
+    r"""
+    Transform the sav file data to json data, filling ``uuid_index`` when given.
+    The file is memory-mapped unless ``use_mmap`` is false, its sections are decoded on ``workers`` processes
+    and its MapObjectSaveData entries on ``map_object_workers`` processes.
+    With ``keep_spans`` unchanged properties are written back from their original bytes.
+    Setting a key of a property marks it and the properties enclosing it as changed,
+    but edits inside custom property values and lists must go through ``set_value`` or ``mark_dirty``;
+    with ``DEBUG=1`` writing checks that no other edit was missed.
+    With ``transfer`` only the sections that can reference players, instances or containers are decoded,
+    see ``PALWORLD_TRANSFER_CUSTOM_PROPERTIES``, the rest is kept as raw bytes.
+    """
     pprint(f"[green][bold]Converting[/bold][/green] {filepath} to JSON...", indent=1)
 
-    with open(filepath, "rb") as f:
-        data = f.read()
-        raw_gvas, _ = decompress_sav_to_gvas(data)
+    raw_gvas, _ = decompress_sav_file(filepath, use_mmap=use_mmap)
 
-    gvas_file = GvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES, allow_nan=True)
+    custom_properties = PALWORLD_TRANSFER_CUSTOM_PROPERTIES if transfer else PALWORLD_CUSTOM_PROPERTIES
+    if map_object_workers > 1:
+        custom_properties = map_object.with_workers(custom_properties, map_object_workers)
+    gvas_file = GvasFile.read(raw_gvas, PALWORLD_TYPE_HINTS, custom_properties, allow_nan=True, uuid_index=uuid_index, keep_spans=keep_spans, workers=workers)
     json_data = gvas_file.dump()
     pprint("Done!", flush=True, indent=1)
     return json_data
 
 
-def json_to_sav(json_data: dict[str, Any], output_filepath: str) -> None:
-    """Transform the json_data to a new sav file"""
+def load_level_uuid_index(filepath: str, level_json: JsonType | None = None, persist: bool = False) -> UUIDIndex:
+    r"""
+    Builds the UUID index of the sav file at ``filepath`` from ``level_json``, or while parsing the file when not given.
+    With ``persist`` the index is also saved as a sidecar under ``out/``, and loaded from it instead
+    when it was built from the same file contents.
+    """
+    save_hash: str | None = None
+    if persist:
+        save_hash = hash_file(filepath)
+        uuid_index: UUIDIndex | None = UUIDIndex.load_sidecar(filepath, save_hash)
+        if uuid_index is not None:
+            pprint(f"[green][bold]INFO:[/bold][/green] Loaded UUID index of {filepath} with {len(uuid_index)} UUIDs.", indent=1)
+            return uuid_index
+
+    uuid_index = UUIDIndex(save_hash)
+    if level_json is None:
+        sav_to_json(filepath, uuid_index)
+    else:
+        uuid_index.add_properties(level_json["properties"])
+    if persist:
+        uuid_index.save(filepath)
+    pprint(f"[green][bold]INFO:[/bold][/green] Built UUID index of {filepath} with {len(uuid_index)} UUIDs.", indent=1)
+    return uuid_index
+
+
+def json_to_sav(json_data: dict[str, Any], output_filepath: str, compression: str | int = "default", workers: int | None = None) -> None:
+    r"""
+    Transform the json_data to a new sav file, compressed with the given profile (fast, default, smallest or a zlib level).
+    The payload is compressed in blocks on ``workers`` threads, every core when it is not given.
+    """
     pprint(f"[green][bold]Converting[/bold][/green] JSON to {output_filepath}...", indent=1)
     gvas_file = GvasFile.load(json_data)
 
@@ -260,7 +322,9 @@ def json_to_sav(json_data: dict[str, Any], output_filepath: str) -> None:
     else:
         save_type = 0x31
 
-    sav_file = compress_gvas_to_sav(gvas_file.write(PALWORLD_CUSTOM_PROPERTIES), save_type)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    sav_file = compress_gvas_to_sav(gvas_file.write(PALWORLD_CUSTOM_PROPERTIES), save_type, workers, compression)
 
     with open(output_filepath, "wb") as f:
         f.write(sav_file)
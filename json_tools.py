@@ -11,7 +11,7 @@
 
 from local_types import JsonType, CustomJsonReader, CustomJsonWriter
 
-from palworld_save_tools.archive import UUID
+from palworld_save_tools.archive import UUID, CompactNode
 
 
 def json_serialize(obj: Any) -> Any:
@@ -20,6 +20,15 @@ def json_serialize(obj: Any) -> Any:
         serial: str = str(obj)
         return serial
 
+    if isinstance(obj, (bytes, memoryview)):
+        return list(obj)
+
+    if isinstance(obj, CompactNode):
+        return obj.to_dict()
+
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+
     return obj.__dict__
 
 
@@ -1,15 +1,25 @@
-import io
+import copy
+import copyreg
+import functools
 import math
 import os
 import struct
 import sys
 import uuid
-from typing import Any, Callable, Optional, Sequence, Union
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    from palworld_save_tools.uuid_index import UUIDIndex
 
 # Alias stdlib types to avoid name conflicts
 _float = float
 _bytes = bytes
 
+# Byte arrays decode to memoryview windows over the save, so trees holding them
+# pickle and deepcopy those windows as bytes
+copyreg.pickle(memoryview, lambda view: (_bytes, (view.tobytes(),)))
+
 try:
     from recordclass import as_dataclass
 except ImportError:
@@ -208,12 +218,51 @@ def uuid_reader(reader: "FArchiveReader") -> UUID:
     return UUID(b)
 
 
+# ASCII strings up to this many bytes (including the terminator) are interned
+# by FArchiveReader.fstring, keyed on their raw bytes
+FSTRING_CACHE_MAX_SIZE = 128
+# The cache is emptied when it reaches this many entries
+FSTRING_CACHE_ENTRIES = 65536
+fstring_cache: dict[bytes, str] = {}
+
+
+def property_paths(
+    type_hints: dict[str, str], custom_properties: dict[str, tuple[Callable, Callable]]
+) -> dict[str, dict[str, str]]:
+    # Trie of property paths, mapping each path to the paths of the properties
+    # directly below it by name. It starts with the paths leading to every type
+    # hint and custom property, and FArchiveReader.child_path adds the others
+    # the first time they are reached, so each path string is built only once
+    paths: dict[str, dict[str, str]] = {"": {}}
+    for path in (*type_hints, *custom_properties):
+        parent = ""
+        for name in path.split(".")[1:]:
+            children = paths.setdefault(parent, {})
+            parent = children.setdefault(name, sys.intern(f"{parent}.{name}"))
+            paths.setdefault(parent, {})
+    return paths
+
+
+# Properties at this depth (".worldSaveData.CharacterSaveParameterMap") are read lazily
+LAZY_PROPERTY_DEPTH = 2
+
+
 class FArchiveReader:
-    data: io.BytesIO
+    data: Union[bytes, bytearray, memoryview]
+    view: memoryview
+    offset: int
+    source_view: memoryview
     size: int
     type_hints: dict[str, str]
     custom_properties: dict[str, tuple[Callable, Callable]]
+    paths: dict[str, dict[str, str]]
     debug: bool
+    lazy_depth: int
+    keep_spans: bool
+    compact: bool
+    uuid_index: Optional["UUIDIndex"]
+    location: list[Union[str, int]]
+    raw_parent: Optional["RawProperty"]
 
     def __init__(
         self,
@@ -222,30 +271,79 @@ def __init__(
         custom_properties: dict[str, tuple[Callable, Callable]] = {},
         debug: bool = os.environ.get("DEBUG", "0") == "1",
         allow_nan: bool = True,
+        lazy_depth: int = 0,
+        keep_spans: bool = False,
+        compact: bool = False,
+        paths: Optional[dict[str, dict[str, str]]] = None,
+        uuid_index: Optional["UUIDIndex"] = None,
     ):
-        self.data = io.BytesIO(data)
-        self.size = len(data)
+        if keep_spans and compact:
+            raise Exception("Compact nodes cannot keep their source spans")
+        # Nothing is copied, whatever buffer data is. Byte arrays, raw spans and
+        # lazy properties are windows over a read-only view of it, and so are
+        # the readers internal_copy creates over byte arrays. bytes and
+        # bytearray are read directly, struct and slicing are faster on them
+        # than on a view
+        view = memoryview(data)
+        if view.ndim != 1 or view.format != "B":
+            view = view.cast("B")
+        if not view.readonly:
+            view = view.toreadonly()
+        self.view = view
+        self.data = data if type(data) in (bytes, bytearray) else view
+        self.offset = 0
+        self.size = len(view)
         self.type_hints = type_hints
         self.custom_properties = custom_properties
+        # Shared by the readers internal_copy creates
+        if paths is None:
+            paths = property_paths(type_hints, custom_properties)
+        self.paths = paths
         self.debug = debug
         self.allow_nan = allow_nan
+        self.lazy_depth = lazy_depth
+        self.keep_spans = keep_spans
+        self.compact = compact
+        if keep_spans:
+            self.source_view = view
+        # RawProperty being read, the parent of those nested in it
+        self.raw_parent = None
+        # With an index, the UUIDs are added to it as they are read, at the
+        # keys leading from the properties to them, which location holds
+        self.uuid_index = uuid_index
+        self.location = []
 
     def __enter__(self):
-        self.data.seek(0)
+        self.offset = 0
         return self
 
     def __exit__(self, type, value, traceback):
-        self.data.close()
+        # Decoded values may still be windows over the buffer, so it is not
+        # released here
+        pass
 
     def internal_copy(self, data, debug: bool) -> "FArchiveReader":
+        # data is usually a byte array value of this reader, so the new reader
+        # is a window over the same buffer
         return FArchiveReader(
             data,
             self.type_hints,
             self.custom_properties,
             debug=debug,
             allow_nan=self.allow_nan,
+            compact=self.compact,
+            paths=self.paths,
         )
 
+    def child_path(self, path: str, name: str) -> str:
+        children = self.paths.get(path)
+        if children is None:
+            children = self.paths[path] = {}
+        child = children.get(name)
+        if child is None:
+            child = children[name] = sys.intern(f"{path}.{name}")
+        return child
+
     def get_type_or(self, path: str, default: str):
         if path in self.type_hints:
             return self.type_hints[path]
@@ -253,119 +351,202 @@ def get_type_or(self, path: str, default: str):
             print(f"Struct type for {path} not found, assuming {default}")
             return default
 
+    def tell(self) -> int:
+        return self.offset
+
+    def seek(self, offset: int) -> None:
+        self.offset = offset
+
     def eof(self) -> bool:
-        return self.data.tell() >= self.size
+        return self.offset >= self.size
 
     def read(self, size: int) -> bytes:
-        return self.data.read(size)
+        offset = self.offset
+        data = bytes(self.data[offset : offset + size])
+        self.offset = offset + len(data)
+        return data
 
     def read_to_end(self) -> bytes:
-        return self.data.read(self.size - self.data.tell())
+        return self.read(self.size - self.offset)
 
     def bool(self) -> bool:
         return self.byte() > 0
 
     def fstring(self) -> str:
-        # in the hot loop, avoid function calls
-        reader = self.data
-        (size,) = FArchiveReader.unpack_i32(reader.read(4))
+        # in the hot loop, avoid function calls. Like the other reads, a string
+        # cut short by the end of the data leaves the offset past the end
+        data = self.data
+        offset = self.offset + 4
+        self.offset = offset
+        (size,) = FArchiveReader.unpack_i32(data, offset - 4)
 
         if size == 0:
             return ""
 
-        data: bytes
         encoding: str
         if size < 0:
             size = -size
-            data = reader.read(size * 2)[:-2]
+            end = offset + size * 2
+            raw = data[offset : end - 2]
             encoding = "utf-16-le"
+        elif size <= FSTRING_CACHE_MAX_SIZE:
+            # Names, type names and enum values repeat throughout a save, share
+            # one interned str per distinct value
+            end = offset + size
+            self.offset = end
+            key = FArchiveReader.unpack_fstring_key[size](data, offset)[0]
+            value = fstring_cache.get(key)
+            if value is not None:
+                return value
+            raw = data[offset : end - 1]
+            try:
+                value = sys.intern(str(raw, "ascii"))
+            except Exception:
+                encoding = "ascii"
+            else:
+                if len(fstring_cache) >= FSTRING_CACHE_ENTRIES:
+                    fstring_cache.clear()
+                fstring_cache[key] = value
+                return value
         else:
-            data = reader.read(size)[:-1]
+            end = offset + size
+            raw = data[offset : end - 1]
             encoding = "ascii"
+        self.offset = end
+        if end > self.size:
+            raise Exception(f"Unexpected end of data reading a string of length {size}")
 
         try:
-            return data.decode(encoding)
+            return str(raw, encoding)
         except Exception as e:
             try:
-                escaped = data.decode(encoding, errors="surrogatepass")
+                escaped = str(raw, encoding, errors="surrogatepass")
                 print(
-                    f"Error decoding {encoding} string of length {size}, data loss may occur! {bytes(data)!r}"
+                    f"Error decoding {encoding} string of length {size}, data loss may occur! {bytes(raw)!r}"
                 )
                 return escaped
             except Exception as e:
                 raise Exception(
-                    f"Error decoding {encoding} string of length {size}: {bytes(data)!r}"
+                    f"Error decoding {encoding} string of length {size}: {bytes(raw)!r}"
                 ) from e
 
-    unpack_i16 = struct.Struct("h").unpack
+    # Readers of the raw bytes of short ASCII strings, by size, as cache keys
+    unpack_fstring_key = [
+        struct.Struct(f"{size}s").unpack_from
+        for size in range(FSTRING_CACHE_MAX_SIZE + 1)
+    ]
+    # The same, followed by the u64 size of a property after its type name
+    unpack_type_and_size = [
+        struct.Struct(f"<{size}sQ").unpack_from
+        for size in range(FSTRING_CACHE_MAX_SIZE + 1)
+    ]
+
+    unpack_i16 = struct.Struct("h").unpack_from
 
     def i16(self) -> int:
-        return FArchiveReader.unpack_i16(self.data.read(2))[0]
+        offset = self.offset
+        self.offset = offset + 2
+        return FArchiveReader.unpack_i16(self.data, offset)[0]
 
-    unpack_u16 = struct.Struct("H").unpack
+    unpack_u16 = struct.Struct("H").unpack_from
 
     def u16(self) -> int:
-        return FArchiveReader.unpack_u16(self.data.read(2))[0]
+        offset = self.offset
+        self.offset = offset + 2
+        return FArchiveReader.unpack_u16(self.data, offset)[0]
 
-    unpack_i32 = struct.Struct("i").unpack
+    unpack_i32 = struct.Struct("i").unpack_from
 
     def i32(self) -> int:
-        return FArchiveReader.unpack_i32(self.data.read(4))[0]
+        offset = self.offset
+        self.offset = offset + 4
+        return FArchiveReader.unpack_i32(self.data, offset)[0]
 
-    unpack_u32 = struct.Struct("I").unpack
+    unpack_u32 = struct.Struct("I").unpack_from
 
     def u32(self) -> int:
-        return FArchiveReader.unpack_u32(self.data.read(4))[0]
+        offset = self.offset
+        self.offset = offset + 4
+        return FArchiveReader.unpack_u32(self.data, offset)[0]
 
-    unpack_i64 = struct.Struct("q").unpack
+    unpack_i64 = struct.Struct("q").unpack_from
 
     def i64(self) -> int:
-        return FArchiveReader.unpack_i64(self.data.read(8))[0]
+        offset = self.offset
+        self.offset = offset + 8
+        return FArchiveReader.unpack_i64(self.data, offset)[0]
 
-    unpack_u64 = struct.Struct("Q").unpack
+    unpack_u64 = struct.Struct("Q").unpack_from
 
     def u64(self) -> int:
-        return FArchiveReader.unpack_u64(self.data.read(8))[0]
+        offset = self.offset
+        self.offset = offset + 8
+        return FArchiveReader.unpack_u64(self.data, offset)[0]
 
-    unpack_float = struct.Struct("f").unpack
+    unpack_float = struct.Struct("f").unpack_from
 
     def float(self) -> Optional[_float]:
-        val = FArchiveReader.unpack_float(self.data.read(4))[0]
+        offset = self.offset
+        self.offset = offset + 4
+        val = FArchiveReader.unpack_float(self.data, offset)[0]
         if self.allow_nan:
             return val
         if val == math.nan or val == math.inf or val == -math.inf:
             return None
         return val
 
-    unpack_double = struct.Struct("d").unpack
+    unpack_double = struct.Struct("d").unpack_from
 
     def double(self) -> Optional[_float]:
-        val = FArchiveReader.unpack_double(self.data.read(8))[0]
+        offset = self.offset
+        self.offset = offset + 8
+        val = FArchiveReader.unpack_double(self.data, offset)[0]
         if self.allow_nan:
             return val
         if val == math.nan or val == math.inf or val == -math.inf:
             return None
         return val
 
-    unpack_byte = struct.Struct("B").unpack
+    unpack_byte = struct.Struct("B").unpack_from
 
     def byte(self) -> int:
-        return FArchiveReader.unpack_byte(self.data.read(1))[0]
-
-    def byte_list(self, size: int) -> Sequence[int]:
-        return struct.unpack(str(size) + "B", self.data.read(size))
+        offset = self.offset
+        self.offset = offset + 1
+        return FArchiveReader.unpack_byte(self.data, offset)[0]
+
+    # Composite records are unpacked in one call, unless NaN/inf need filtering
+    unpack_vector = struct.Struct("3d").unpack_from
+    unpack_quat = struct.Struct("4d").unpack_from
+    unpack_ftransform = struct.Struct("10d").unpack_from
+    unpack_linear_color = struct.Struct("4f").unpack_from
+    unpack_guid = struct.Struct("16s").unpack_from
+
+    def byte_list(self, size: int) -> memoryview:
+        # A window over the buffer, not a copy
+        offset = self.offset
+        end = offset + size
+        self.offset = end
+        if end > self.size:
+            raise Exception(f"Unexpected end of data reading {size} bytes")
+        return self.view[offset:end]
 
     def skip(self, size: int) -> None:
-        self.data.read(size)
+        self.offset += size
 
     def guid(self) -> UUID:
         # in the hot loop, avoid function calls
-        return UUID(self.data.read(16))
+        offset = self.offset
+        self.offset = offset + 16
+        return UUID(FArchiveReader.unpack_guid(self.data, offset)[0])
 
     def optional_guid(self) -> Optional[UUID]:
         # in the hot loop, avoid function calls
-        if self.data.read(1)[0]:
-            return UUID(self.data.read(16))
+        offset = self.offset
+        data = self.data
+        if data[offset]:
+            self.offset = offset + 17
+            return UUID(FArchiveReader.unpack_guid(data, offset + 1)[0])
+        self.offset = offset + 1
         return None
 
     def tarray(self, type_reader: Callable[["FArchiveReader"], Any]) -> list[Any]:
@@ -376,132 +557,416 @@ def tarray(self, type_reader: Callable[["FArchiveReader"], Any]) -> list[Any]:
         return array
 
     def properties_until_end(self, path: str = "") -> dict[str, Any]:
+        if self.lazy_depth > 0 and path.count(".") == self.lazy_depth - 1:
+            return self.lazy_properties_until_end(path)
+        # Child paths come from the trie, so they are only built the first time
+        # each one is reached
+        children = self.paths.get(path)
+        if children is None:
+            children = self.paths[path] = {}
+        # Without custom properties or spans in the way, call the property
+        # readers directly instead of going through property()
+        custom_properties = self.custom_properties
+        indexing = self.uuid_index is not None
+        generic = not self.keep_spans and not indexing
+        if self.compact:
+            readers = FArchiveReader.compact_property_readers
+        else:
+            readers = FArchiveReader.property_readers
+        data = self.data
+        unpack_i32 = FArchiveReader.unpack_i32
+        unpack_fstring_key = FArchiveReader.unpack_fstring_key
+        unpack_type_and_size = FArchiveReader.unpack_type_and_size
         properties = {}
+        while True:
+            # Names and type names are nearly always in the string cache, so
+            # that case of fstring is inlined, and the type name is read along
+            # with the size
+            offset = self.offset
+            (length,) = unpack_i32(data, offset)
+            name = None
+            if 0 < length <= FSTRING_CACHE_MAX_SIZE:
+                name = fstring_cache.get(
+                    unpack_fstring_key[length](data, offset + 4)[0]
+                )
+            if name is None:
+                name = self.fstring()
+                offset = self.offset
+            else:
+                offset += 4 + length
+            if name == "None":
+                self.offset = offset
+                break
+            (length,) = unpack_i32(data, offset)
+            type_name = None
+            if 0 < length <= FSTRING_CACHE_MAX_SIZE:
+                key, size = unpack_type_and_size[length](data, offset + 4)
+                type_name = fstring_cache.get(key)
+            if type_name is None:
+                self.offset = offset
+                type_name = self.fstring()
+                size = self.u64()
+            else:
+                self.offset = offset + 12 + length
+            prop_path = children.get(name)
+            if prop_path is None:
+                prop_path = self.child_path(path, name)
+            read = readers.get(type_name)
+            if generic and read is not None and prop_path not in custom_properties:
+                properties[name] = read(self, size, prop_path)
+            elif indexing:
+                self.location.append(name)
+                properties[name] = self.property(type_name, size, prop_path)
+                self.location.pop()
+            else:
+                properties[name] = self.property(type_name, size, prop_path)
+        return properties
+
+    def lazy_properties_until_end(self, path: str = "") -> "LazyProperties":
+        properties = LazyProperties()
         while True:
             name = self.fstring()
             if name == "None":
                 break
             type_name = self.fstring()
             size = self.u64()
-            properties[name] = self.property(type_name, size, f"{path}.{name}")
+            prop_path = self.child_path(path, name)
+            start = self.offset
+            self.skip_property(type_name, size, prop_path)
+            properties[name] = LazyProperty(
+                self, type_name, size, prop_path, start, self.offset
+            )
         return properties
 
+    def skip_property(self, type_name: str, size: int, path: str) -> None:
+        # size excludes the type specific header, so read past that first
+        if type_name == "StructProperty":
+            self.fstring()
+            self.skip(16)
+            self.optional_guid()
+        elif type_name == "ArrayProperty" or type_name == "EnumProperty":
+            self.fstring()
+            self.optional_guid()
+        elif type_name == "MapProperty":
+            self.fstring()
+            self.fstring()
+            self.optional_guid()
+        elif type_name == "BoolProperty":
+            self.skip(1)
+            self.optional_guid()
+        elif type_name in (
+            "IntProperty",
+            "Int64Property",
+            "FixedPoint64Property",
+            "FloatProperty",
+            "StrProperty",
+            "NameProperty",
+        ):
+            self.optional_guid()
+        else:
+            raise Exception(f"Unknown type: {type_name} ({path})")
+        self.skip(size)
+
     def property(
         self, type_name: str, size: int, path: str, nested_caller_path: str = ""
     ) -> dict[str, Any]:
-        value = {}
+        keep_spans = self.keep_spans
+        uuid_index = self.uuid_index
+        if keep_spans:
+            start = self.offset
+            # Made first so that the properties nested in it link to it, an
+            # edit in any of them then marks it dirty too
+            raw_parent = self.raw_parent
+            node = RawProperty()
+            node.parent = raw_parent
+            self.raw_parent = node
         if path in self.custom_properties and (
             path is not nested_caller_path or nested_caller_path == ""
         ):
+            # Custom properties are kept whole, a change anywhere inside them
+            # needs the custom encoder to run again. Their decoders build their
+            # own layout, so it is indexed once they return
+            self.keep_spans = False
+            self.uuid_index = None
             value = self.custom_properties[path][0](self, type_name, size, path)
+            self.keep_spans = keep_spans
+            self.uuid_index = uuid_index
             value["custom_type"] = path
-        elif type_name == "StructProperty":
-            value = self.struct(path)
-        elif type_name == "IntProperty":
-            value = {
-                "id": self.optional_guid(),
-                "value": self.i32(),
-            }
-        elif type_name == "Int64Property":
-            value = {
-                "id": self.optional_guid(),
-                "value": self.i64(),
-            }
-        elif type_name == "FixedPoint64Property":
-            value = {
-                "id": self.optional_guid(),
-                "value": self.i32(),
-            }
-        elif type_name == "FloatProperty":
-            value = {
-                "id": self.optional_guid(),
-                "value": self.float(),
-            }
-        elif type_name == "StrProperty":
-            value = {
-                "id": self.optional_guid(),
-                "value": self.fstring(),
-            }
-        elif type_name == "NameProperty":
-            value = {
-                "id": self.optional_guid(),
-                "value": self.fstring(),
-            }
-        elif type_name == "EnumProperty":
-            enum_type = self.fstring()
-            _id = self.optional_guid()
-            enum_value = self.fstring()
-            value = {
-                "id": _id,
-                "value": {
-                    "type": enum_type,
-                    "value": enum_value,
-                },
-            }
-        elif type_name == "BoolProperty":
-            value = {
-                "value": self.bool(),
-                "id": self.optional_guid(),
-            }
-        elif type_name == "ArrayProperty":
-            array_type = self.fstring()
-            value = {
-                "array_type": array_type,
-                "id": self.optional_guid(),
-                "value": self.array_property(array_type, size - 4, path),
-            }
-        elif type_name == "MapProperty":
-            key_type = self.fstring()
-            value_type = self.fstring()
-            _id = self.optional_guid()
-            self.u32()
-            count = self.u32()
-            key_path = path + ".Key"
-            if key_type == "StructProperty":
-                key_struct_type = self.get_type_or(key_path, "Guid")
+            value["type"] = type_name
+            if uuid_index is not None:
+                uuid_index.add_properties(value, tuple(self.location))
+        else:
+            # One table lookup instead of comparing type_name against every type
+            if self.compact:
+                read = FArchiveReader.compact_property_readers.get(type_name)
             else:
-                key_struct_type = None
-            value_path = path + ".Value"
-            if value_type == "StructProperty":
-                value_struct_type = self.get_type_or(value_path, "StructProperty")
+                read = FArchiveReader.property_readers.get(type_name)
+            if read is None:
+                raise Exception(f"Unknown type: {type_name} ({path})")
+            if uuid_index is None:
+                value = read(self, size, path)
             else:
-                value_struct_type = None
-            values: list[dict[str, Any]] = []
-            for _ in range(count):
-                key = self.prop_value(key_type, key_struct_type, key_path)
-                value = self.prop_value(value_type, value_struct_type, value_path)
-                values.append(
-                    {
-                        "key": key,
-                        "value": value,
-                    }
-                )
-            value = {
-                "key_type": key_type,
-                "value_type": value_type,
-                "key_struct_type": key_struct_type,
-                "value_struct_type": value_struct_type,
-                "id": _id,
-                "value": values,
-            }
+                self.location.append("value")
+                value = read(self, size, path)
+                self.location.pop()
+                # The properties nested in it were indexed as they were read
+                uuid_index.add_property(value, self.location)
+        if keep_spans:
+            self.raw_parent = raw_parent
+            dict.update(node, value)
+            node.raw = self.source_view[start : self.offset]
+            node.size = size
+            return node
+        return value
+
+    # Property readers, by type name. Each one reads the rest of a property
+    # after its type name and size, and returns it with its "type" key
+
+    def read_struct_property(self, size: int, path: str) -> dict[str, Any]:
+        struct_type = self.fstring()
+        struct_id = self.guid()
+        _id = self.optional_guid()
+        return {
+            "struct_type": struct_type,
+            "struct_id": struct_id,
+            "id": _id,
+            "value": self.struct_value(struct_type, path),
+            "type": "StructProperty",
+        }
+
+    def read_int_property(self, size: int, path: str) -> dict[str, Any]:
+        # The most common property, so optional_guid and i32 are inlined
+        data = self.data
+        offset = self.offset
+        if data[offset]:
+            _id = UUID(FArchiveReader.unpack_guid(data, offset + 1)[0])
+            offset += 17
         else:
-            raise Exception(f"Unknown type: {type_name} ({path})")
-        value["type"] = type_name
+            _id = None
+            offset += 1
+        self.offset = offset + 4
+        return {
+            "id": _id,
+            "value": FArchiveReader.unpack_i32(data, offset)[0],
+            "type": "IntProperty",
+        }
+
+    def read_int64_property(self, size: int, path: str) -> dict[str, Any]:
+        return {
+            "id": self.optional_guid(),
+            "value": self.i64(),
+            "type": "Int64Property",
+        }
+
+    def read_fixed_point64_property(self, size: int, path: str) -> dict[str, Any]:
+        return {
+            "id": self.optional_guid(),
+            "value": self.i32(),
+            "type": "FixedPoint64Property",
+        }
+
+    def read_float_property(self, size: int, path: str) -> dict[str, Any]:
+        return {
+            "id": self.optional_guid(),
+            "value": self.float(),
+            "type": "FloatProperty",
+        }
+
+    def read_str_property(self, size: int, path: str) -> dict[str, Any]:
+        return {
+            "id": self.optional_guid(),
+            "value": self.fstring(),
+            "type": "StrProperty",
+        }
+
+    def read_name_property(self, size: int, path: str) -> dict[str, Any]:
+        return {
+            "id": self.optional_guid(),
+            "value": self.fstring(),
+            "type": "NameProperty",
+        }
+
+    def read_enum_property(self, size: int, path: str) -> dict[str, Any]:
+        enum_type = self.fstring()
+        _id = self.optional_guid()
+        enum_value = self.fstring()
+        return {
+            "id": _id,
+            "value": {
+                "type": enum_type,
+                "value": enum_value,
+            },
+            "type": "EnumProperty",
+        }
+
+    def read_bool_property(self, size: int, path: str) -> dict[str, Any]:
+        data = self.data
+        offset = self.offset
+        bool_value = data[offset] > 0
+        if data[offset + 1]:
+            _id = UUID(FArchiveReader.unpack_guid(data, offset + 2)[0])
+            self.offset = offset + 18
+        else:
+            _id = None
+            self.offset = offset + 2
+        return {
+            "value": bool_value,
+            "id": _id,
+            "type": "BoolProperty",
+        }
+
+    def read_array_property(self, size: int, path: str) -> dict[str, Any]:
+        array_type = self.fstring()
+        return {
+            "array_type": array_type,
+            "id": self.optional_guid(),
+            "value": self.array_property(array_type, size - 4, path),
+            "type": "ArrayProperty",
+        }
+
+    def read_map_property(self, size: int, path: str) -> dict[str, Any]:
+        key_type = self.fstring()
+        value_type = self.fstring()
+        _id = self.optional_guid()
+        value = {
+            "key_type": key_type,
+            "value_type": value_type,
+            "key_struct_type": None,
+            "value_struct_type": None,
+            "id": _id,
+            "value": [],
+            "type": "MapProperty",
+        }
+        self.map_value(value, path)
+        return value
+
+    def map_value(self, value: Any, path: str) -> None:
+        # Reads the entries of a MapProperty into value, a dict or a MapProp
+        # with its key and value types set
+        key_type = value["key_type"]
+        value_type = value["value_type"]
+        self.u32()
+        count = self.u32()
+        key_path = self.child_path(path, "Key")
+        if key_type == "StructProperty":
+            key_struct_type = self.get_type_or(key_path, "Guid")
+        else:
+            key_struct_type = None
+        value_path = self.child_path(path, "Value")
+        if value_type == "StructProperty":
+            value_struct_type = self.get_type_or(value_path, "StructProperty")
+        else:
+            value_struct_type = None
+        values: list[Any] = []
+        if count > 0:
+            # Resolved once for every entry of the map
+            read_key = self.prop_value_reader(key_type, key_struct_type, key_path)
+            read_value = self.prop_value_reader(
+                value_type, value_struct_type, value_path
+            )
+            if self.uuid_index is not None:
+                location = self.location
+                for i in range(count):
+                    location.append(i)
+                    location.append("key")
+                    entry_key = read_key()
+                    location[-1] = "value"
+                    entry_value = read_value()
+                    location.pop()
+                    location.pop()
+                    if self.compact:
+                        values.append(MapEntry(entry_key, entry_value))
+                    else:
+                        values.append({"key": entry_key, "value": entry_value})
+            elif self.compact:
+                for _ in range(count):
+                    values.append(MapEntry(read_key(), read_value()))
+            else:
+                for _ in range(count):
+                    entry_key = read_key()
+                    values.append({"key": entry_key, "value": read_value()})
+        value["key_struct_type"] = key_struct_type
+        value["value_struct_type"] = value_struct_type
+        value["value"] = values
+
+    # Property readers building CompactNode instances instead of dicts
+
+    def read_compact_struct_property(self, size: int, path: str) -> "StructProp":
+        struct_type = self.fstring()
+        struct_id = self.guid()
+        _id = self.optional_guid()
+        return StructProp(
+            struct_type, struct_id, _id, self.struct_value(struct_type, path)
+        )
+
+    def read_compact_int_property(self, size: int, path: str) -> "IntProp":
+        data = self.data
+        offset = self.offset
+        if data[offset]:
+            _id = UUID(FArchiveReader.unpack_guid(data, offset + 1)[0])
+            offset += 17
+        else:
+            _id = None
+            offset += 1
+        self.offset = offset + 4
+        return IntProp(_id, FArchiveReader.unpack_i32(data, offset)[0])
+
+    def read_compact_int64_property(self, size: int, path: str) -> "Int64Prop":
+        return Int64Prop(self.optional_guid(), self.i64())
+
+    def read_compact_fixed_point64_property(
+        self, size: int, path: str
+    ) -> "FixedPoint64Prop":
+        return FixedPoint64Prop(self.optional_guid(), self.i32())
+
+    def read_compact_float_property(self, size: int, path: str) -> "FloatProp":
+        return FloatProp(self.optional_guid(), self.float())
+
+    def read_compact_str_property(self, size: int, path: str) -> "StrProp":
+        return StrProp(self.optional_guid(), self.fstring())
+
+    def read_compact_name_property(self, size: int, path: str) -> "NameProp":
+        return NameProp(self.optional_guid(), self.fstring())
+
+    def read_compact_enum_property(self, size: int, path: str) -> "EnumProp":
+        enum_type = self.fstring()
+        _id = self.optional_guid()
+        return EnumProp(_id, {"type": enum_type, "value": self.fstring()})
+
+    def read_compact_bool_property(self, size: int, path: str) -> "BoolProp":
+        bool_value = self.bool()
+        return BoolProp(self.optional_guid(), bool_value)
+
+    def read_compact_array_property(self, size: int, path: str) -> "ArrayProp":
+        array_type = self.fstring()
+        _id = self.optional_guid()
+        return ArrayProp(
+            array_type, _id, self.array_property(array_type, size - 4, path)
+        )
+
+    def read_compact_map_property(self, size: int, path: str) -> "MapProp":
+        key_type = self.fstring()
+        value_type = self.fstring()
+        value = MapProp(key_type, value_type, None, None, self.optional_guid(), [])
+        self.map_value(value, path)
         return value
 
     def prop_value(self, type_name: str, struct_type_name: str, path: str):
+        return self.prop_value_reader(type_name, struct_type_name, path)()
+
+    def prop_value_reader(
+        self, type_name: str, struct_type_name: Optional[str], path: str
+    ) -> Callable[[], Any]:
+        # Reader of a MapProperty key or value, looked up once per map
         if type_name == "StructProperty":
-            return self.struct_value(struct_type_name, path)
-        elif type_name == "EnumProperty":
-            return self.fstring()
-        elif type_name == "NameProperty":
-            return self.fstring()
-        elif type_name == "IntProperty":
-            return self.i32()
-        elif type_name == "BoolProperty":
-            return self.bool()
+            read = FArchiveReader.struct_value_readers.get(struct_type_name)
+            if read is None:
+                return functools.partial(self.struct_value, struct_type_name, path)
         else:
-            raise Exception(f"Unknown property value type: {type_name} ({path})")
+            read = FArchiveReader.prop_value_readers.get(type_name)
+            if read is None:
+                raise Exception(f"Unknown property value type: {type_name} ({path})")
+        return functools.partial(read, self)
 
     def struct(self, path: str) -> dict[str, Any]:
         struct_type = self.fstring()
@@ -516,25 +981,12 @@ def struct(self, path: str) -> dict[str, Any]:
         }
 
     def struct_value(self, struct_type: str, path: str = ""):
-        if struct_type == "Vector":
-            return self.vector_dict()
-        elif struct_type == "DateTime":
-            return self.u64()
-        elif struct_type == "Guid":
-            return self.guid()
-        elif struct_type == "Quat":
-            return self.quat_dict()
-        elif struct_type == "LinearColor":
-            return {
-                "r": self.float(),
-                "g": self.float(),
-                "b": self.float(),
-                "a": self.float(),
-            }
-        else:
-            if self.debug:
-                print(f"Assuming struct type: {struct_type} ({path})")
-            return self.properties_until_end(path)
+        read = FArchiveReader.struct_value_readers.get(struct_type)
+        if read is not None:
+            return read(self)
+        if self.debug:
+            print(f"Assuming struct type: {struct_type} ({path})")
+        return self.properties_until_end(path)
 
     def array_property(self, array_type: str, size: int, path: str):
         count = self.u32()
@@ -546,9 +998,23 @@ def array_property(self, array_type: str, size: int, path: str):
             type_name = self.fstring()
             _id = self.guid()
             self.skip(1)
+            prop_path = self.child_path(path, prop_name)
             prop_values = []
-            for _ in range(count):
-                prop_values.append(self.struct_value(type_name, f"{path}.{prop_name}"))
+            read = FArchiveReader.struct_value_readers.get(type_name)
+            if read is not None:
+                for _ in range(count):
+                    prop_values.append(read(self))
+            elif self.uuid_index is not None:
+                location = self.location
+                location.append("values")
+                for i in range(count):
+                    location.append(i)
+                    prop_values.append(self.struct_value(type_name, prop_path))
+                    location.pop()
+                location.pop()
+            else:
+                for _ in range(count):
+                    prop_values.append(self.struct_value(type_name, prop_path))
             value = {
                 "prop_name": prop_name,
                 "prop_type": prop_type,
@@ -563,25 +1029,18 @@ def array_property(self, array_type: str, size: int, path: str):
         return value
 
     def array_value(self, array_type: str, count: int, size: int, path: str):
-        values = []
-        decode_func: Callable
-        if array_type == "EnumProperty":
-            decode_func = self.fstring
-        elif array_type == "NameProperty":
-            decode_func = self.fstring
-        elif array_type == "Guid":
-            decode_func = self.guid
-        elif array_type == "ByteProperty":
+        if array_type == "ByteProperty":
             if size == count:
                 # Special case this and read faster in one go
                 return self.byte_list(count)
             else:
                 raise Exception("Labelled ByteProperty not implemented")
-        else:
+        read = FArchiveReader.array_value_readers.get(array_type)
+        if read is None:
             raise Exception(f"Unknown array type: {array_type} ({path})")
+        values = []
         for _ in range(count):
-            values.append(decode_func())
-
+            values.append(read(self))
         return values
 
     def compressed_short_rotator(self) -> tuple[_float, _float, _float]:
@@ -626,37 +1085,541 @@ def packed_vector(
                 return (self.float(), self.float(), self.float())
 
     def vector(self) -> tuple[Optional[_float], Optional[_float], Optional[_float]]:
-        return (self.double(), self.double(), self.double())
+        if not self.allow_nan:
+            return (self.double(), self.double(), self.double())
+        offset = self.offset
+        self.offset = offset + 24
+        return FArchiveReader.unpack_vector(self.data, offset)
 
     def vector_dict(self) -> dict[str, Optional[_float]]:
-        return {
-            "x": self.double(),
-            "y": self.double(),
-            "z": self.double(),
-        }
+        if not self.allow_nan:
+            return {
+                "x": self.double(),
+                "y": self.double(),
+                "z": self.double(),
+            }
+        offset = self.offset
+        self.offset = offset + 24
+        x, y, z = FArchiveReader.unpack_vector(self.data, offset)
+        return {"x": x, "y": y, "z": z}
 
     def quat(
         self,
     ) -> tuple[Optional[_float], Optional[_float], Optional[_float], Optional[_float]]:
-        return (self.double(), self.double(), self.double(), self.double())
+        if not self.allow_nan:
+            return (self.double(), self.double(), self.double(), self.double())
+        offset = self.offset
+        self.offset = offset + 32
+        return FArchiveReader.unpack_quat(self.data, offset)
 
     def quat_dict(self) -> dict[str, Optional[_float]]:
-        return {
-            "x": self.double(),
-            "y": self.double(),
-            "z": self.double(),
-            "w": self.double(),
-        }
+        if not self.allow_nan:
+            return {
+                "x": self.double(),
+                "y": self.double(),
+                "z": self.double(),
+                "w": self.double(),
+            }
+        offset = self.offset
+        self.offset = offset + 32
+        x, y, z, w = FArchiveReader.unpack_quat(self.data, offset)
+        return {"x": x, "y": y, "z": z, "w": w}
 
     def ftransform(self) -> dict[str, dict[str, Optional[_float]]]:
+        if not self.allow_nan:
+            return {
+                "rotation": self.quat_dict(),
+                "translation": self.vector_dict(),
+                "scale3d": self.vector_dict(),
+            }
+        offset = self.offset
+        self.offset = offset + 80
+        (rx, ry, rz, rw, tx, ty, tz, sx, sy, sz) = FArchiveReader.unpack_ftransform(
+            self.data, offset
+        )
         return {
-            "rotation": self.quat_dict(),
-            "translation": self.vector_dict(),
-            "scale3d": self.vector_dict(),
+            "rotation": {"x": rx, "y": ry, "z": rz, "w": rw},
+            "translation": {"x": tx, "y": ty, "z": tz},
+            "scale3d": {"x": sx, "y": sy, "z": sz},
         }
 
+    def linear_color_dict(self) -> dict[str, Optional[_float]]:
+        if not self.allow_nan:
+            return {
+                "r": self.float(),
+                "g": self.float(),
+                "b": self.float(),
+                "a": self.float(),
+            }
+        offset = self.offset
+        self.offset = offset + 16
+        r, g, b, a = FArchiveReader.unpack_linear_color(self.data, offset)
+        return {"r": r, "g": g, "b": b, "a": a}
+
+    # Dispatch tables, keyed by the interned type names fstring returns
+
+    property_readers: dict[str, Callable[["FArchiveReader", int, str], Any]] = {
+        "StructProperty": read_struct_property,
+        "IntProperty": read_int_property,
+        "Int64Property": read_int64_property,
+        "FixedPoint64Property": read_fixed_point64_property,
+        "FloatProperty": read_float_property,
+        "StrProperty": read_str_property,
+        "NameProperty": read_name_property,
+        "EnumProperty": read_enum_property,
+        "BoolProperty": read_bool_property,
+        "ArrayProperty": read_array_property,
+        "MapProperty": read_map_property,
+    }
+
+    compact_property_readers: dict[str, Callable[["FArchiveReader", int, str], Any]] = {
+        "StructProperty": read_compact_struct_property,
+        "IntProperty": read_compact_int_property,
+        "Int64Property": read_compact_int64_property,
+        "FixedPoint64Property": read_compact_fixed_point64_property,
+        "FloatProperty": read_compact_float_property,
+        "StrProperty": read_compact_str_property,
+        "NameProperty": read_compact_name_property,
+        "EnumProperty": read_compact_enum_property,
+        "BoolProperty": read_compact_bool_property,
+        "ArrayProperty": read_compact_array_property,
+        "MapProperty": read_compact_map_property,
+    }
 
-def uuid_writer(writer, s: Union[str, uuid.UUID, UUID]):
+    # Struct types read without a property list, anything else is read with
+    # properties_until_end
+    struct_value_readers: dict[str, Callable[["FArchiveReader"], Any]] = {
+        "Vector": vector_dict,
+        "DateTime": u64,
+        "Guid": guid,
+        "Quat": quat_dict,
+        "LinearColor": linear_color_dict,
+    }
+
+    prop_value_readers: dict[str, Callable[["FArchiveReader"], Any]] = {
+        "EnumProperty": fstring,
+        "NameProperty": fstring,
+        "IntProperty": i32,
+        "BoolProperty": bool,
+    }
+
+    array_value_readers: dict[str, Callable[["FArchiveReader"], Any]] = {
+        "EnumProperty": fstring,
+        "NameProperty": fstring,
+        "Guid": guid,
+    }
+
+
+class LazyProperty:
+    """Property left undecoded in the source buffer until it is first accessed"""
+
+    __slots__ = (
+        "source",
+        "type_hints",
+        "custom_properties",
+        "paths",
+        "allow_nan",
+        "keep_spans",
+        "compact",
+        "type_name",
+        "size",
+        "path",
+        "start",
+        "end",
+        "parent",
+    )
+
+    def __init__(
+        self,
+        reader: FArchiveReader,
+        type_name: str,
+        size: int,
+        path: str,
+        start: int,
+        end: int,
+    ) -> None:
+        self.source = reader.view
+        self.type_hints = reader.type_hints
+        self.custom_properties = reader.custom_properties
+        self.paths = reader.paths
+        self.allow_nan = reader.allow_nan
+        self.keep_spans = reader.keep_spans
+        self.compact = reader.compact
+        self.type_name = type_name
+        self.size = size
+        self.path = path
+        self.start = start
+        self.end = end
+        self.parent = reader.raw_parent
+
+    def materialize(self) -> dict[str, Any]:
+        with FArchiveReader(
+            self.source,
+            self.type_hints,
+            self.custom_properties,
+            allow_nan=self.allow_nan,
+            keep_spans=self.keep_spans,
+            compact=self.compact,
+            paths=self.paths,
+        ) as reader:
+            reader.seek(self.start)
+            reader.raw_parent = self.parent
+            return reader.property(self.type_name, self.size, self.path)
+
+    def raw_bytes(self) -> memoryview:
+        return self.source[self.start : self.end]
+
+    def __repr__(self) -> str:
+        size = self.end - self.start
+        return f"LazyProperty({self.type_name}, {self.path}, {size} bytes)"
+
+
+class LazyProperties(dict):
+    """Property dict that decodes LazyProperty values on first access"""
+
+    def __getitem__(self, key: str) -> Any:
+        value = dict.__getitem__(self, key)
+        if isinstance(value, LazyProperty):
+            value = value.materialize()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self:
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            dict.__setitem__(self, key, default)
+        return self[key]
+
+    def materialize_all(self) -> None:
+        for key, value in dict.items(self):
+            if isinstance(value, LazyProperty):
+                dict.__setitem__(self, key, value.materialize())
+
+    def items(self):
+        self.materialize_all()
+        return dict.items(self)
+
+    def values(self):
+        self.materialize_all()
+        return dict.values(self)
+
+    def raw(self, key: str) -> Any:
+        # Value without decoding it, either a LazyProperty or a decoded dict
+        return dict.__getitem__(self, key)
+
+    def is_materialized(self, key: str) -> bool:
+        return not isinstance(dict.__getitem__(self, key), LazyProperty)
+
+
+class RawProperty(dict):
+    """Decoded property keeping its original bytes, written back as is unless dirty"""
+
+    __slots__ = ("raw", "size", "dirty", "parent")
+
+    raw: memoryview
+    size: int
+    dirty: bool
+    parent: Optional["RawProperty"]
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.dirty = False
+        self.parent = None
+
+    def __reduce__(self):
+        # The items are restored along with the rest of the state, setting
+        # them one by one would mark it dirty
+        state = (dict(self), getattr(self, "raw", None), getattr(self, "size", 0))
+        return (RawProperty, (), (*state, self.dirty, self.parent))
+
+    def __setstate__(self, state) -> None:
+        items, self.raw, self.size, self.dirty, self.parent = state
+        dict.update(self, items)
+
+    def touch(self) -> None:
+        # Marks it dirty along with every property enclosing it, as they are
+        # all encoded again to write the edit
+        node: Optional[RawProperty] = self
+        while node is not None:
+            node.dirty = True
+            node = node.parent
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.touch()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.touch()
+        dict.__delitem__(self, key)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        self.touch()
+        return dict.pop(self, key, *default)
+
+    def update(self, *args, **kwargs) -> None:
+        self.touch()
+        dict.update(self, *args, **kwargs)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key not in self:
+            self.touch()
+        return dict.setdefault(self, key, default)
+
+
+class MissingField:
+    """Value of a CompactNode field that is not set, or was deleted"""
+
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        # Unpickles to the same MISSING object
+        return "MISSING"
+
+
+MISSING = MissingField()
+
+
+class CompactNode(MutableMapping):
+    """__slots__ node FArchiveReader builds with compact=True instead of a
+    property dict. It reads and writes like that dict, with the same keys in
+    the same order, but has no per-node hash table. Keys other than fields
+    go to the extra dict"""
+
+    __slots__ = ("extra",)
+
+    fields: tuple[str, ...] = ()
+    extra: Optional[dict[str, Any]]
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.fields:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key == "type" and key in self.fields:
+            if value != self["type"]:
+                raise Exception(f"Cannot change the type of {type(self).__name__}")
+        elif key in self.fields:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key == "type" and key in self.fields:
+            raise Exception(f"Cannot delete the type of {type(self).__name__}")
+        if key in self.fields and getattr(self, key) is not MISSING:
+            setattr(self, key, MISSING)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self.fields:
+            if getattr(self, key) is not MISSING:
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self.fields:
+            return getattr(self, key) is not MISSING
+        return self.extra is not None and key in self.extra
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {key: self[key] for key in self}
+
+
+class ScalarProp(CompactNode):
+    __slots__ = ("id", "value", "custom_type")
+
+    fields = ("id", "value", "type", "custom_type")
+
+    def __init__(self, _id: Optional[UUID], value: Any) -> None:
+        self.extra = None
+        self.custom_type = MISSING
+        self.id = _id
+        self.value = value
+
+
+class IntProp(ScalarProp):
+    __slots__ = ()
+    type = "IntProperty"
+
+
+class Int64Prop(ScalarProp):
+    __slots__ = ()
+    type = "Int64Property"
+
+
+class FixedPoint64Prop(ScalarProp):
+    __slots__ = ()
+    type = "FixedPoint64Property"
+
+
+class FloatProp(ScalarProp):
+    __slots__ = ()
+    type = "FloatProperty"
+
+
+class StrProp(ScalarProp):
+    __slots__ = ()
+    type = "StrProperty"
+
+
+class NameProp(ScalarProp):
+    __slots__ = ()
+    type = "NameProperty"
+
+
+class EnumProp(ScalarProp):
+    __slots__ = ()
+    type = "EnumProperty"
+
+
+class BoolProp(ScalarProp):
+    __slots__ = ()
+    fields = ("value", "id", "type", "custom_type")
+    type = "BoolProperty"
+
+
+class StructProp(CompactNode):
+    __slots__ = ("struct_type", "struct_id", "id", "value", "custom_type")
+
+    fields = ("struct_type", "struct_id", "id", "value", "type", "custom_type")
+    type = "StructProperty"
+
+    def __init__(
+        self, struct_type: str, struct_id: UUID, _id: Optional[UUID], value: Any
+    ) -> None:
+        self.extra = None
+        self.custom_type = MISSING
+        self.struct_type = struct_type
+        self.struct_id = struct_id
+        self.id = _id
+        self.value = value
+
+
+class ArrayProp(CompactNode):
+    __slots__ = ("array_type", "id", "value", "custom_type")
+
+    fields = ("array_type", "id", "value", "type", "custom_type")
+    type = "ArrayProperty"
+
+    def __init__(
+        self, array_type: str, _id: Optional[UUID], value: dict[str, Any]
+    ) -> None:
+        self.extra = None
+        self.custom_type = MISSING
+        self.array_type = array_type
+        self.id = _id
+        self.value = value
+
+
+class MapProp(CompactNode):
+    __slots__ = (
+        "key_type",
+        "value_type",
+        "key_struct_type",
+        "value_struct_type",
+        "id",
+        "value",
+        "custom_type",
+    )
+
+    fields = (
+        "key_type",
+        "value_type",
+        "key_struct_type",
+        "value_struct_type",
+        "id",
+        "value",
+        "type",
+        "custom_type",
+    )
+    type = "MapProperty"
+
+    def __init__(
+        self,
+        key_type: str,
+        value_type: str,
+        key_struct_type: Optional[str],
+        value_struct_type: Optional[str],
+        _id: Optional[UUID],
+        value: list["MapEntry"],
+    ) -> None:
+        self.extra = None
+        self.custom_type = MISSING
+        self.key_type = key_type
+        self.value_type = value_type
+        self.key_struct_type = key_struct_type
+        self.value_struct_type = value_struct_type
+        self.id = _id
+        self.value = value
+
+
+class MapEntry(CompactNode):
+    __slots__ = ("key", "value")
+
+    fields = ("key", "value")
+
+    def __init__(self, key: Any, value: Any) -> None:
+        self.extra = None
+        self.key = key
+        self.value = value
+
+
+def mark_dirty(properties: dict[str, Any], keys: Sequence[Union[str, int]]) -> None:
+    # Marks every RawProperty from properties down to properties[keys[0]][keys[1]]...
+    # dirty, as writing an edit deep inside a property re-encodes its ancestors.
+    # Setting a key of a RawProperty does this by itself, edits inside the
+    # plain dicts and lists below one, such as custom property values, need it
+    node: Any = properties
+    for key in keys:
+        node = node[key]
+        if isinstance(node, RawProperty):
+            node.touch()
+
+
+def set_value(
+    properties: dict[str, Any], keys: Sequence[Union[str, int]], value: Any
+) -> None:
+    # properties[keys[0]][keys[1]]... = value, marking the properties
+    # enclosing it dirty
+    mark_dirty(properties, keys[:-1])
+    node: Any = properties
+    for key in keys[:-1]:
+        node = node[key]
+    node[keys[-1]] = value
+
+
+def uuid_bytes(s: Union[str, uuid.UUID, UUID]) -> bytes:
+    # s as the 16 bytes stored in an archive
+    if isinstance(s, UUID):
+        return s.raw_bytes
     if isinstance(s, str):
         s = uuid.UUID(s)
     if isinstance(s, uuid.UUID):
@@ -683,7 +1646,11 @@ def uuid_writer(writer, s: Union[str, uuid.UUID, UUID]):
         )
     elif isinstance(s, UUID):
         ub = s.raw_bytes
-    writer.write(ub)
+    return ub
+
+
+def uuid_writer(writer, s: Union[str, uuid.UUID, UUID]):
+    writer.write(uuid_bytes(s))
 
 
 def instance_id_writer(writer, d):
@@ -692,7 +1659,7 @@ def instance_id_writer(writer, d):
 
 
 class FArchiveWriter:
-    data: io.BytesIO
+    data: bytearray
     size: int
     custom_properties: dict[str, tuple[Callable, Callable]]
     debug: bool
@@ -702,93 +1669,132 @@ def __init__(
         custom_properties: dict[str, tuple[Callable, Callable]] = {},
         debug: bool = os.environ.get("DEBUG", "0") == "1",
     ):
-        self.data = io.BytesIO()
+        # Values are appended to the bytearray, and sizes written before what
+        # they measure are packed into it afterwards
+        self.data = bytearray()
         self.custom_properties = custom_properties
         self.debug = debug
 
     def __enter__(self):
-        self.data.seek(0)
         return self
 
     def __exit__(self, type, value, traceback):
-        self.data.close()
+        pass
 
     def copy(self) -> "FArchiveWriter":
         return FArchiveWriter(self.custom_properties)
 
     def bytes(self) -> bytes:
-        pos = self.data.tell()
-        self.data.seek(0)
-        b = self.data.read()
-        self.data.seek(pos)
-        return b
+        return _bytes(self.data)
+
+    def tell(self) -> int:
+        return len(self.data)
 
     def write(self, data: _bytes):
-        self.data.write(data)
+        self.data += data
+
+    pack_bool = struct.Struct("?").pack
 
     def bool(self, bool: bool):
-        self.data.write(struct.pack("?", bool))
+        self.data += FArchiveWriter.pack_bool(bool)
 
     def fstring(self, string: str) -> int:
-        start = self.data.tell()
+        data = self.data
         if string == "":
-            self.i32(0)
+            data += FArchiveWriter.pack_i32(0)
+            return 4
         elif string.isascii():
             str_bytes = string.encode("ascii")
-            self.i32(len(str_bytes) + 1)
-            self.data.write(str_bytes)
-            self.data.write(b"\x00")
+            data += FArchiveWriter.pack_i32(len(str_bytes) + 1)
+            data += str_bytes
+            data += b"\x00"
+            return len(str_bytes) + 5
         else:
             str_bytes = string.encode("utf-16-le", errors="surrogatepass")
             assert len(str_bytes) % 2 == 0
-            self.i32(-((len(str_bytes) // 2) + 1))
-            self.data.write(str_bytes)
-            self.data.write(b"\x00\x00")
-        return self.data.tell() - start
+            data += FArchiveWriter.pack_i32(-((len(str_bytes) // 2) + 1))
+            data += str_bytes
+            data += b"\x00\x00"
+            return len(str_bytes) + 6
+
+    pack_i16 = struct.Struct("h").pack
 
     def i16(self, i: int):
-        self.data.write(struct.pack("h", i))
+        self.data += FArchiveWriter.pack_i16(i)
+
+    pack_u16 = struct.Struct("H").pack
 
     def u16(self, i: int):
-        self.data.write(struct.pack("H", i))
+        self.data += FArchiveWriter.pack_u16(i)
+
+    pack_i32 = struct.Struct("i").pack
 
     def i32(self, i: int):
-        self.data.write(struct.pack("i", i))
+        self.data += FArchiveWriter.pack_i32(i)
+
+    pack_u32 = struct.Struct("I").pack
 
     def u32(self, i: int):
-        self.data.write(struct.pack("I", i))
+        self.data += FArchiveWriter.pack_u32(i)
+
+    pack_i64 = struct.Struct("q").pack
 
     def i64(self, i: int):
-        self.data.write(struct.pack("q", i))
+        self.data += FArchiveWriter.pack_i64(i)
+
+    pack_u64 = struct.Struct("Q").pack
 
     def u64(self, i: int):
-        self.data.write(struct.pack("Q", i))
+        self.data += FArchiveWriter.pack_u64(i)
+
+    pack_float = struct.Struct("f").pack
 
     def float(self, i: Optional[float]):
         if i is None:
-            i = float("nan")
-        self.data.write(struct.pack("f", i))
+            i = _float("nan")
+        self.data += FArchiveWriter.pack_float(i)
+
+    pack_double = struct.Struct("d").pack
 
     def double(self, i: Optional[_float]):
         if i is None:
-            i = float("nan")
-        self.data.write(struct.pack("d", i))
+            i = _float("nan")
+        self.data += FArchiveWriter.pack_double(i)
 
     def byte(self, b: int):
-        self.data.write(bytes([b]))
+        self.data.append(b)
+
+    pack_byte = struct.Struct("B").pack
 
     def u(self, b: int):
-        self.data.write(struct.pack("B", b))
+        self.data += FArchiveWriter.pack_byte(b)
+
+    # Composite records are packed in one call, None components (NaN when read
+    # with allow_nan=False) make pack raise and take the per field path
+    pack_vector = struct.Struct("3d").pack
+    pack_quat = struct.Struct("4d").pack
+    pack_ftransform = struct.Struct("10d").pack
+
+    pack_u64_into = struct.Struct("Q").pack_into
 
     def guid(self, u: Union[str, uuid.UUID, UUID]):
-        uuid_writer(self, u)
+        # in the hot loop, avoid function calls
+        if isinstance(u, UUID):
+            self.data += u.raw_bytes
+        else:
+            self.data += uuid_bytes(u)
 
     def optional_guid(self, u: Optional[Union[str, uuid.UUID, UUID]]):
+        # in the hot loop, avoid function calls
+        data = self.data
         if u is None:
-            self.bool(False)
+            data.append(0)
+        elif isinstance(u, UUID):
+            data.append(1)
+            data += u.raw_bytes
         else:
-            self.bool(True)
-            uuid_writer(self, u)
+            data.append(1)
+            data += uuid_bytes(u)
 
     def tarray(
         self, type_writer: Callable[["FArchiveWriter", Any], None], array: list[Any]
@@ -798,6 +1804,19 @@ def tarray(
             type_writer(self, array[i])
 
     def properties(self, properties: dict[str, Any]):
+        if isinstance(properties, LazyProperties):
+            for key in properties:
+                self.fstring(key)
+                value = properties.raw(key)
+                if isinstance(value, LazyProperty):
+                    # Untouched, so write back the original bytes
+                    self.fstring(value.type_name)
+                    self.u64(value.size)
+                    self.write(value.raw_bytes())
+                else:
+                    self.property(value)
+            self.fstring("None")
+            return
         for key in properties:
             self.fstring(key)
             self.property(properties[key])
@@ -806,14 +1825,30 @@ def properties(self, properties: dict[str, Any]):
     def property(self, property: dict[str, Any]):
         # write type_name
         self.fstring(property["type"])
-        nested_writer = self.copy()
-        size: int
-        property_type = property["type"]
-        size = nested_writer.property_inner(property_type, property)
-        buf = nested_writer.bytes()
-        # write size
-        self.u64(size)
-        self.write(buf)
+        clean = isinstance(property, RawProperty) and not property.dirty
+        if clean and not self.debug:
+            self.u64(property.size)
+            self.write(property.raw)
+            return
+        # The size is written once the property is
+        size_offset = len(self.data)
+        self.data += b"\x00" * 8
+        if clean and "custom_type" in property:
+            # Custom encoders replace the decoded value they write, so a clean
+            # one is checked by encoding a copy, cut off from the parents it
+            # would otherwise mark dirty
+            encoded = copy.deepcopy(property, {id(property.parent): None})
+            size = self.property_inner(property["type"], encoded)
+        else:
+            size = self.property_inner(property["type"], property)
+        FArchiveWriter.pack_u64_into(self.data, size_offset, size)
+        # In debug mode clean properties are encoded too, to catch edits that
+        # did not mark them dirty and would be dropped otherwise
+        if clean and property.raw != self.data[size_offset + 8 :]:
+            raise Exception(
+                f"{property['type']} was edited without marking it dirty, "
+                "use mark_dirty or set_value"
+            )
 
     def property_inner(self, property_type: str, property: dict[str, Any]) -> int:
         if "custom_type" in property:
@@ -825,109 +1860,109 @@ def property_inner(self, property_type: str, property: dict[str, Any]) -> int:
                 raise Exception(
                     f"Unknown custom property type: {property['custom_type']}"
                 )
-        elif property_type == "StructProperty":
-            size = self.struct(property)
-        elif property_type == "IntProperty":
-            self.optional_guid(property.get("id", None))
-            self.i32(property["value"])
-            size = 4
-        elif property_type == "Int64Property":
-            self.optional_guid(property.get("id", None))
-            self.i64(property["value"])
-            size = 8
-        elif property_type == "FixedPoint64Property":
-            self.optional_guid(property.get("id", None))
-            self.i32(property["value"])
-            size = 4
-        elif property_type == "FloatProperty":
-            self.optional_guid(property.get("id", None))
-            self.float(property["value"])
-            size = 4
-        elif property_type == "StrProperty":
-            self.optional_guid(property.get("id", None))
-            size = self.fstring(property["value"])
-        elif property_type == "NameProperty":
-            self.optional_guid(property.get("id", None))
-            size = self.fstring(property["value"])
-        elif property_type == "EnumProperty":
-            self.fstring(property["value"]["type"])
-            self.optional_guid(property.get("id", None))
-            size = self.fstring(property["value"]["value"])
-        elif property_type == "BoolProperty":
-            self.bool(property["value"])
-            self.optional_guid(property.get("id", None))
-            size = 0
-        elif property_type == "ArrayProperty":
-            self.fstring(property["array_type"])
-            self.optional_guid(property.get("id", None))
-            array_writer = self.copy()
-            array_writer.array_property(property["array_type"], property["value"])
-            array_buf = array_writer.bytes()
-            size = len(array_buf)
-            self.write(array_buf)
-        elif property_type == "MapProperty":
-            self.fstring(property["key_type"])
-            self.fstring(property["value_type"])
-            self.optional_guid(property.get("id", None))
-            map_writer = self.copy()
-            map_writer.u32(0)
-            map_writer.u32(len(property["value"]))
-            for entry in property["value"]:
-                map_writer.prop_value(
-                    property["key_type"], property["key_struct_type"], entry["key"]
-                )
-                map_writer.prop_value(
-                    property["value_type"],
-                    property["value_struct_type"],
-                    entry["value"],
-                )
-            map_buf = map_writer.bytes()
-            size = len(map_buf)
-            self.write(map_buf)
         else:
-            raise Exception(f"Unknown property type: {property_type}")
+            write = FArchiveWriter.property_writers.get(property_type)
+            if write is None:
+                raise Exception(f"Unknown property type: {property_type}")
+            size = write(self, property)
         return size
 
+    # Property writers, by type name. Each one writes a property after its
+    # type name and size, and returns the size
+
+    def write_int_property(self, property: dict[str, Any]) -> int:
+        self.optional_guid(property.get("id", None))
+        self.data += FArchiveWriter.pack_i32(property["value"])
+        return 4
+
+    def write_int64_property(self, property: dict[str, Any]) -> int:
+        self.optional_guid(property.get("id", None))
+        self.i64(property["value"])
+        return 8
+
+    def write_fixed_point64_property(self, property: dict[str, Any]) -> int:
+        self.optional_guid(property.get("id", None))
+        self.i32(property["value"])
+        return 4
+
+    def write_float_property(self, property: dict[str, Any]) -> int:
+        self.optional_guid(property.get("id", None))
+        self.float(property["value"])
+        return 4
+
+    def write_str_property(self, property: dict[str, Any]) -> int:
+        self.optional_guid(property.get("id", None))
+        return self.fstring(property["value"])
+
+    def write_enum_property(self, property: dict[str, Any]) -> int:
+        self.fstring(property["value"]["type"])
+        self.optional_guid(property.get("id", None))
+        return self.fstring(property["value"]["value"])
+
+    def write_bool_property(self, property: dict[str, Any]) -> int:
+        self.bool(property["value"])
+        self.optional_guid(property.get("id", None))
+        return 0
+
+    def write_array_property(self, property: dict[str, Any]) -> int:
+        self.fstring(property["array_type"])
+        self.optional_guid(property.get("id", None))
+        start = len(self.data)
+        self.array_property(property["array_type"], property["value"])
+        return len(self.data) - start
+
+    def write_map_property(self, property: dict[str, Any]) -> int:
+        self.fstring(property["key_type"])
+        self.fstring(property["value_type"])
+        self.optional_guid(property.get("id", None))
+        start = len(self.data)
+        self.u32(0)
+        self.u32(len(property["value"]))
+        if len(property["value"]) > 0:
+            # Resolved once for every entry of the map
+            write_key = self.prop_value_writer(
+                property["key_type"], property["key_struct_type"]
+            )
+            write_value = self.prop_value_writer(
+                property["value_type"], property["value_struct_type"]
+            )
+            for entry in property["value"]:
+                write_key(entry["key"])
+                write_value(entry["value"])
+        return len(self.data) - start
+
     def struct(self, property: dict[str, Any]) -> int:
         self.fstring(property["struct_type"])
         self.guid(property["struct_id"])
         self.optional_guid(property.get("id", None))
-        start = self.data.tell()
+        start = len(self.data)
         self.struct_value(property["struct_type"], property["value"])
-        return self.data.tell() - start
+        return len(self.data) - start
 
     def struct_value(self, struct_type: str, value):
-        if struct_type == "Vector":
-            self.vector_dict(value)
-        elif struct_type == "DateTime":
-            self.u64(value)
-        elif struct_type == "Guid":
-            self.guid(value)
-        elif struct_type == "Quat":
-            self.quat_dict(value)
-        elif struct_type == "LinearColor":
-            self.float(value["r"])
-            self.float(value["g"])
-            self.float(value["b"])
-            self.float(value["a"])
-        else:
-            if self.debug:
-                print(f"Assuming struct type: {struct_type}")
-            return self.properties(value)
+        write = FArchiveWriter.struct_value_writers.get(struct_type)
+        if write is not None:
+            return write(self, value)
+        if self.debug:
+            print(f"Assuming struct type: {struct_type}")
+        return self.properties(value)
 
     def prop_value(self, type_name: str, struct_type_name: str, value):
+        self.prop_value_writer(type_name, struct_type_name)(value)
+
+    def prop_value_writer(
+        self, type_name: str, struct_type_name: Optional[str]
+    ) -> Callable[[Any], Any]:
+        # Writer of a MapProperty key or value, looked up once per map
         if type_name == "StructProperty":
-            self.struct_value(struct_type_name, value)
-        elif type_name == "EnumProperty":
-            self.fstring(value)
-        elif type_name == "NameProperty":
-            self.fstring(value)
-        elif type_name == "IntProperty":
-            self.i32(value)
-        elif type_name == "BoolProperty":
-            self.bool(value)
+            write = FArchiveWriter.struct_value_writers.get(struct_type_name)
+            if write is None:
+                return functools.partial(self.struct_value, struct_type_name)
         else:
-            raise Exception(f"Unknown property value type: {type_name}")
+            write = FArchiveWriter.prop_value_writers.get(type_name)
+            if write is None:
+                raise Exception(f"Unknown property value type: {type_name}")
+        return functools.partial(write, self)
 
     def array_property(self, array_type: str, value: dict[str, Any]):
         count = len(value["values"])
@@ -935,38 +1970,40 @@ def array_property(self, array_type: str, value: dict[str, Any]):
         if array_type == "StructProperty":
             self.fstring(value["prop_name"])
             self.fstring(value["prop_type"])
-            nested_writer = self.copy()
-            for i in range(count):
-                nested_writer.struct_value(value["type_name"], value["values"][i])
-            data_buf = nested_writer.bytes()
-            self.u64(len(data_buf))
+            # The size of the values is written once they are
+            size_offset = len(self.data)
+            self.data += b"\x00" * 8
             self.fstring(value["type_name"])
             self.guid(value["id"])
             self.u(0)
-            self.write(data_buf)
+            start = len(self.data)
+            values = value["values"]
+            write = FArchiveWriter.struct_value_writers.get(value["type_name"])
+            if write is not None:
+                for i in range(count):
+                    write(self, values[i])
+            else:
+                for i in range(count):
+                    self.struct_value(value["type_name"], values[i])
+            FArchiveWriter.pack_u64_into(self.data, size_offset, len(self.data) - start)
         else:
             self.array_value(array_type, count, value["values"])
 
     def array_value(self, array_type: str, count: int, values: list[Any]):
+        if array_type == "ByteProperty":
+            # A window over the source when decoded, list[int] when loaded from
+            # JSON
+            if isinstance(values, list):
+                values = bytes(values)
+            self.write(values)
+            return
+        if count == 0:
+            return
+        write = FArchiveWriter.array_value_writers.get(array_type)
+        if write is None:
+            raise Exception(f"Unknown array type: {array_type}")
         for i in range(count):
-            if array_type == "IntProperty":
-                self.i32(values[i])
-            elif array_type == "Int64Property":
-                self.i64(values[i])
-            elif array_type == "FloatProperty":
-                self.float(values[i])
-            elif array_type == "StrProperty":
-                self.fstring(values[i])
-            elif array_type == "NameProperty":
-                self.fstring(values[i])
-            elif array_type == "EnumProperty":
-                self.fstring(values[i])
-            elif array_type == "BoolProperty":
-                self.bool(values[i])
-            elif array_type == "ByteProperty":
-                self.byte(values[i])
-            else:
-                raise Exception(f"Unknown array type: {array_type}")
+            write(self, values[i])
 
     def compressed_short_rotator(self, pitch: _float, yaw: _float, roll: _float):
         short_pitch = round(pitch * (65536.0 / 360.0)) & 0xFFFF
@@ -1046,14 +2083,15 @@ def packed_vector(self, scale_factor: int, x: _float, y: _float, z: _float):
             self.double(z)
 
     def vector(self, x: Optional[_float], y: Optional[_float], z: Optional[_float]):
-        self.double(x)
-        self.double(y)
-        self.double(z)
+        try:
+            self.data += FArchiveWriter.pack_vector(x, y, z)
+        except struct.error:
+            self.double(x)
+            self.double(y)
+            self.double(z)
 
     def vector_dict(self, value: dict[str, Optional[_float]]):
-        self.double(value["x"])
-        self.double(value["y"])
-        self.double(value["z"])
+        self.vector(value["x"], value["y"], value["z"])
 
     def quat(
         self,
@@ -1062,18 +2100,82 @@ def quat(
         z: Optional[_float],
         w: Optional[_float],
     ):
-        self.double(x)
-        self.double(y)
-        self.double(z)
-        self.double(w)
+        try:
+            self.data += FArchiveWriter.pack_quat(x, y, z, w)
+        except struct.error:
+            self.double(x)
+            self.double(y)
+            self.double(z)
+            self.double(w)
 
     def quat_dict(self, value: dict[str, Optional[_float]]):
-        self.double(value["x"])
-        self.double(value["y"])
-        self.double(value["z"])
-        self.double(value["w"])
+        self.quat(value["x"], value["y"], value["z"], value["w"])
 
     def ftransform(self, value: dict[str, dict[str, Optional[_float]]]):
-        self.quat_dict(value["rotation"])
-        self.vector_dict(value["translation"])
-        self.vector_dict(value["scale3d"])
+        rotation = value["rotation"]
+        translation = value["translation"]
+        scale3d = value["scale3d"]
+        try:
+            self.data += FArchiveWriter.pack_ftransform(
+                rotation["x"],
+                rotation["y"],
+                rotation["z"],
+                rotation["w"],
+                translation["x"],
+                translation["y"],
+                translation["z"],
+                scale3d["x"],
+                scale3d["y"],
+                scale3d["z"],
+            )
+        except struct.error:
+            self.quat_dict(rotation)
+            self.vector_dict(translation)
+            self.vector_dict(scale3d)
+
+    def linear_color_dict(self, value: dict[str, Optional[_float]]):
+        self.float(value["r"])
+        self.float(value["g"])
+        self.float(value["b"])
+        self.float(value["a"])
+
+    # Dispatch tables, the writer side of the FArchiveReader ones
+
+    property_writers: dict[str, Callable[["FArchiveWriter", dict[str, Any]], int]] = {
+        "StructProperty": struct,
+        "IntProperty": write_int_property,
+        "Int64Property": write_int64_property,
+        "FixedPoint64Property": write_fixed_point64_property,
+        "FloatProperty": write_float_property,
+        "StrProperty": write_str_property,
+        "NameProperty": write_str_property,
+        "EnumProperty": write_enum_property,
+        "BoolProperty": write_bool_property,
+        "ArrayProperty": write_array_property,
+        "MapProperty": write_map_property,
+    }
+
+    struct_value_writers: dict[str, Callable[["FArchiveWriter", Any], Any]] = {
+        "Vector": vector_dict,
+        "DateTime": u64,
+        "Guid": guid,
+        "Quat": quat_dict,
+        "LinearColor": linear_color_dict,
+    }
+
+    prop_value_writers: dict[str, Callable[["FArchiveWriter", Any], Any]] = {
+        "EnumProperty": fstring,
+        "NameProperty": fstring,
+        "IntProperty": i32,
+        "BoolProperty": bool,
+    }
+
+    array_value_writers: dict[str, Callable[["FArchiveWriter", Any], Any]] = {
+        "IntProperty": i32,
+        "Int64Property": i64,
+        "FloatProperty": float,
+        "StrProperty": fstring,
+        "NameProperty": fstring,
+        "EnumProperty": fstring,
+        "BoolProperty": bool,
+    }
@@ -6,8 +6,15 @@
 
 from palworld_save_tools.gvas import GvasFile
 from palworld_save_tools.json_tools import CustomEncoder
-from palworld_save_tools.palsav import compress_gvas_to_sav, decompress_sav_to_gvas
+from palworld_save_tools.palsav import (
+    COMPRESSION_PROFILES,
+    compress_gvas_to_sav,
+    compression_profile,
+    decompress_sav_file,
+    peek_sav,
+)
 from palworld_save_tools.paltypes import PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS
+from palworld_save_tools.rawdata import foliage_model_instance, map_object
 
 
 def main():
@@ -48,6 +55,40 @@ def main():
         type=lambda t: [s.strip() for s in t.split(",")],
         help="Comma-separated list of custom properties to decode, or 'all' for all known properties. This can be used to speed up processing by excluding properties that are not of interest. (default: all)",
     )
+    parser.add_argument(
+        "--compression",
+        default="default",
+        type=compression_arg,
+        help=f"Compression profile when converting JSON to SAV: {', '.join(COMPRESSION_PROFILES)}, or a zlib level from 0 to 9 (default: default)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes decoding the sections of the SAV file in parallel when converting to JSON (default: 1)",
+    )
+    parser.add_argument(
+        "--compression-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Threads compressing the SAV file in blocks when converting from JSON (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--map-object-workers",
+        type=int,
+        default=1,
+        help="Processes decoding MapObjectSaveData entries in parallel when converting to JSON, not used inside --workers processes (default: 1)",
+    )
+    parser.add_argument(
+        "--columnar-foliage",
+        action="store_true",
+        help="Decode foliage instances into NumPy columns when converting to JSON, requires numpy",
+    )
+    parser.add_argument(
+        "--no-mmap",
+        action="store_true",
+        help="Read the SAV file instead of memory-mapping it when converting to JSON",
+    )
 
     parser.add_argument("--minify-json", action="store_true", help="Minify JSON output")
     args = parser.parse_args()
@@ -63,7 +104,15 @@ def main():
         print(f"{args.filename} is not a file")
         exit(1)
 
-    if args.to_json or args.filename.endswith(".sav"):
+    if (
+        args.to_json
+        or args.filename.endswith(".sav")
+        or (
+            not args.from_json
+            and not args.filename.endswith(".json")
+            and is_sav_file(args.filename)
+        )
+    ):
         if not args.output:
             output_path = args.filename + ".json"
         else:
@@ -75,6 +124,10 @@ def main():
             minify=args.minify_json,
             allow_nan=(not args.convert_nan_to_null),
             custom_properties_keys=args.custom_properties,
+            use_mmap=not args.no_mmap,
+            workers=args.workers,
+            map_object_workers=args.map_object_workers,
+            columnar_foliage=args.columnar_foliage,
         )
 
     if args.from_json or args.filename.endswith(".json"):
@@ -82,7 +135,31 @@ def main():
             output_path = args.filename.replace(".json", "")
         else:
             output_path = args.output
-        convert_json_to_sav(args.filename, output_path, force=args.force)
+        convert_json_to_sav(
+            args.filename,
+            output_path,
+            force=args.force,
+            compression=args.compression,
+            workers=args.compression_workers,
+        )
+
+
+def is_sav_file(filename) -> bool:
+    # Only the SAV and GVAS headers are decompressed
+    try:
+        with open(filename, "rb") as f:
+            peek_sav(f)
+    except Exception:
+        return False
+    return True
+
+
+def compression_arg(value: str) -> str:
+    try:
+        compression_profile(value)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
 
 
 def convert_sav_to_json(
@@ -92,6 +169,10 @@ def convert_sav_to_json(
     minify=False,
     allow_nan=True,
     custom_properties_keys=["all"],
+    use_mmap=True,
+    workers=1,
+    map_object_workers=1,
+    columnar_foliage=False,
 ):
     print(f"Converting {filename} to JSON, saving to {output_path}")
     if os.path.exists(output_path):
@@ -100,9 +181,7 @@ def convert_sav_to_json(
             if not confirm_prompt("Are you sure you want to continue?"):
                 exit(1)
     print(f"Decompressing sav file")
-    with open(filename, "rb") as f:
-        data = f.read()
-        raw_gvas, _ = decompress_sav_to_gvas(data)
+    raw_gvas, _ = decompress_sav_file(filename, use_mmap=use_mmap)
     print(f"Loading GVAS file")
     custom_properties = {}
     if len(custom_properties_keys) > 0 and custom_properties_keys[0] == "all":
@@ -111,8 +190,18 @@ def convert_sav_to_json(
         for prop in PALWORLD_CUSTOM_PROPERTIES:
             if prop in custom_properties_keys:
                 custom_properties[prop] = PALWORLD_CUSTOM_PROPERTIES[prop]
+    if map_object_workers > 1:
+        custom_properties = map_object.with_workers(
+            custom_properties, map_object_workers
+        )
+    if columnar_foliage:
+        custom_properties = foliage_model_instance.with_columnar(custom_properties)
     gvas_file = GvasFile.read(
-        raw_gvas, PALWORLD_TYPE_HINTS, custom_properties, allow_nan=allow_nan
+        raw_gvas,
+        PALWORLD_TYPE_HINTS,
+        custom_properties,
+        allow_nan=allow_nan,
+        workers=workers,
     )
     print(f"Writing JSON to {output_path}")
     with open(output_path, "w", encoding="utf8") as f:
@@ -122,7 +211,9 @@ def convert_sav_to_json(
         )
 
 
-def convert_json_to_sav(filename, output_path, force=False):
+def convert_json_to_sav(
+    filename, output_path, force=False, compression="default", workers=1
+):
     print(f"Converting {filename} to SAV, saving to {output_path}")
     if os.path.exists(output_path):
         print(f"{output_path} already exists, this will overwrite the file")
@@ -142,7 +233,12 @@ def convert_json_to_sav(filename, output_path, force=False):
     else:
         save_type = 0x31
     sav_file = compress_gvas_to_sav(
-        gvas_file.write(PALWORLD_CUSTOM_PROPERTIES), save_type
+        gvas_file.write(
+            foliage_model_instance.with_columnar_encoder(PALWORLD_CUSTOM_PROPERTIES)
+        ),
+        save_type,
+        workers,
+        compression,
     )
     print(f"Writing SAV file to {output_path}")
     with open(output_path, "wb") as f:
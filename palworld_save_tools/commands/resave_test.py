@@ -6,7 +6,7 @@
     convert_json_to_sav,
     convert_sav_to_json,
 )
-from palworld_save_tools.palsav import decompress_sav_to_gvas
+from palworld_save_tools.palsav import decompress_sav_stream
 
 
 def main():
@@ -21,11 +21,9 @@ def main():
     convert_json_to_sav(output_json_path, output_sav_path)
     print(f"Comparing {input_path} and {output_sav_path}...")
     with open(input_path, "rb") as f:
-        input_bytes = f.read()
-        original_gvas = decompress_sav_to_gvas(input_bytes)
+        original_gvas = decompress_sav_stream(f)
     with open(output_sav_path, "rb") as f:
-        output_bytes = f.read()
-        resaved_gvas = decompress_sav_to_gvas(output_bytes)
+        resaved_gvas = decompress_sav_stream(f)
     if original_gvas == resaved_gvas:
         print("Files are the same!")
     else:
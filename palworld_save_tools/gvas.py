@@ -1,7 +1,15 @@
 import base64
-from typing import Any, Callable
+import gc
+from typing import Any, Callable, Optional, Union
 
-from palworld_save_tools.archive import FArchiveReader, FArchiveWriter
+from palworld_save_tools.archive import (
+    LAZY_PROPERTY_DEPTH,
+    FArchiveReader,
+    FArchiveWriter,
+    LazyProperties,
+)
+from palworld_save_tools.parallel import decode_parallel
+from palworld_save_tools.uuid_index import UUIDIndex
 
 
 def custom_version_reader(reader: FArchiveReader):
@@ -115,25 +123,60 @@ class GvasFile:
 
     @staticmethod
     def read(
-        data: bytes,
+        data: Union[bytes, bytearray, memoryview],
         type_hints: dict[str, str] = {},
         custom_properties: dict[str, tuple[Callable, Callable]] = {},
         allow_nan: bool = True,
+        uuid_index: Optional[UUIDIndex] = None,
+        lazy: bool = False,
+        keep_spans: bool = False,
+        workers: int = 1,
+        compact: bool = False,
     ) -> "GvasFile":
+        # With workers > 1 the sections of each top-level struct (e.g. the
+        # worldSaveData maps) are found by a skipping pre-scan, then decoded on
+        # a process pool. An index needs every UUID, so lazy is ignored with one
+        parallel = workers > 1 and not lazy
+        if uuid_index is not None:
+            lazy = False
         gvas_file = GvasFile()
-        with FArchiveReader(
-            data,
-            type_hints=type_hints,
-            custom_properties=custom_properties,
-            allow_nan=allow_nan,
-        ) as reader:
-            gvas_file.header = GvasHeader.read(reader)
-            gvas_file.properties = reader.properties_until_end()
-            gvas_file.trailer = reader.read_to_end()
-            if gvas_file.trailer != b"\x00\x00\x00\x00":
-                print(
-                    f"{len(gvas_file.trailer)} bytes of trailer data, file may not have fully parsed"
-                )
+        # Decoding builds hundreds of thousands of containers and no reference
+        # cycles, so the cyclic garbage collector is paused while they are built
+        # instead of scanning them over and over
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with FArchiveReader(
+                data,
+                type_hints=type_hints,
+                custom_properties=custom_properties,
+                allow_nan=allow_nan,
+                lazy_depth=LAZY_PROPERTY_DEPTH if lazy or parallel else 0,
+                keep_spans=keep_spans,
+                compact=compact,
+                uuid_index=uuid_index,
+            ) as reader:
+                gvas_file.header = GvasHeader.read(reader)
+                gvas_file.properties = reader.properties_until_end()
+                if parallel:
+                    sections = {
+                        name: p["value"]
+                        for name, p in gvas_file.properties.items()
+                        if isinstance(p.get("value"), LazyProperties)
+                    }
+                    decode_parallel(list(sections.values()), workers)
+                    # The reader skipped these, they were decoded by others
+                    if uuid_index is not None:
+                        for name, section in sections.items():
+                            uuid_index.add_properties(section, (name, "value"))
+                gvas_file.trailer = reader.read_to_end()
+                if gvas_file.trailer != b"\x00\x00\x00\x00":
+                    print(
+                        f"{len(gvas_file.trailer)} bytes of trailer data, file may not have fully parsed"
+                    )
+        finally:
+            if gc_enabled:
+                gc.enable()
         return gvas_file
 
     @staticmethod
@@ -1,7 +1,7 @@
 import json
 import uuid
 
-from palworld_save_tools.archive import UUID
+from palworld_save_tools.archive import UUID, CompactNode
 
 
 class CustomEncoder(json.JSONEncoder):
@@ -10,4 +10,11 @@ def default(self, obj):
             return str(obj)
         if isinstance(obj, uuid.UUID):
             return str(obj)
+        if isinstance(obj, (bytes, memoryview)):
+            return list(obj)
+        if isinstance(obj, CompactNode):
+            return obj.to_dict()
+        if hasattr(obj, "tolist"):
+            # NumPy arrays, such as columnar foliage instances
+            return obj.tolist()
         return super(CustomEncoder, self).default(obj)
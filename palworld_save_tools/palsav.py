@@ -1,12 +1,38 @@
+import mmap
+import os
 import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from palworld_save_tools.archive import FArchiveReader
+from palworld_save_tools.gvas import GvasHeader
 
 MAGIC_BYTES = b"PlZ"
+HEADER_SIZE = 12
+# Compressed bytes read, and decompressed bytes produced, per step when streaming
+CHUNK_SIZE = 1024 * 1024
+# The GVAS header is a few KB, so peeking reads and decompresses in small steps
+PEEK_CHUNK_SIZE = 4 * 1024
+# Uncompressed bytes per block when compressing on several threads
+COMPRESS_BLOCK_SIZE = 1024 * 1024
+ZLIB_WINDOW_SIZE = 32 * 1024
+ADLER32_BASE = 65521
+# name: (zlib level, zlib strategy)
+COMPRESSION_PROFILES: dict[str, tuple[int, int]] = {
+    "fast": (1, zlib.Z_DEFAULT_STRATEGY),
+    "default": (zlib.Z_DEFAULT_COMPRESSION, zlib.Z_DEFAULT_STRATEGY),
+    "smallest": (9, zlib.Z_DEFAULT_STRATEGY),
+}
+# What the decompressors read from without copying it first
+ReadableBuffer = Union[bytes, bytearray, memoryview, mmap.mmap]
 
 
-def decompress_sav_to_gvas(data: bytes) -> tuple[bytes, int]:
+def read_sav_header(data: bytes) -> tuple[int, int, int]:
+    if len(data) < HEADER_SIZE:
+        raise Exception(f"not a compressed Palworld save, only {len(data)} bytes")
     uncompressed_len = int.from_bytes(data[0:4], byteorder="little")
     compressed_len = int.from_bytes(data[4:8], byteorder="little")
-    magic_bytes = data[8:11]
+    magic_bytes = bytes(data[8:11])
     save_type = data[11]
     # Check for magic bytes
     if magic_bytes != MAGIC_BYTES:
@@ -27,31 +53,299 @@ def decompress_sav_to_gvas(data: bytes) -> tuple[bytes, int]:
     # We only have 0x31 (single zlib) and 0x32 (double zlib) saves
     if save_type not in [0x31, 0x32]:
         raise Exception(f"unhandled compression type: {save_type}")
-    if save_type == 0x31:
-        # Check if the compressed length is correct
-        if compressed_len != len(data) - 12:
+    return uncompressed_len, compressed_len, save_type
+
+
+def inflate_chunks(chunks: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    # Decompresses one zlib stream, yielding at most chunk_size bytes at a time
+    decompressor = zlib.decompressobj()
+    for chunk in chunks:
+        while chunk and not decompressor.eof:
+            decompressed = decompressor.decompress(chunk, chunk_size)
+            if decompressed:
+                yield decompressed
+            chunk = decompressor.unconsumed_tail
+    if not decompressor.eof:
+        raise Exception("incomplete compressed data, the save is likely truncated")
+
+
+def decompress_sav_chunks(
+    header: bytes, chunks: Iterable[bytes], chunk_size: int = CHUNK_SIZE
+) -> tuple[memoryview, int]:
+    uncompressed_len, compressed_len, save_type = read_sav_header(header)
+    chunks = iter(chunks)
+    read_len = 0
+    inner_len = 0
+
+    def count_read() -> Iterator[bytes]:
+        nonlocal read_len
+        for chunk in chunks:
+            read_len += len(chunk)
+            yield chunk
+
+    def count_inner(inner: Iterable[bytes]) -> Iterator[bytes]:
+        nonlocal inner_len
+        for chunk in inner:
+            inner_len += len(chunk)
+            yield chunk
+
+    def check_compressed_len() -> None:
+        # Count whatever follows the end of the zlib stream
+        for _ in count_read():
+            pass
+        if save_type == 0x31 and compressed_len != read_len:
             raise Exception(f"incorrect compressed length: {compressed_len}")
-    # Decompress file
-    uncompressed_data = zlib.decompress(data[12:])
+
+    stream: Iterable[bytes] = count_read()
     if save_type == 0x32:
-        # Check if the compressed length is correct
-        if compressed_len != len(uncompressed_data):
-            raise Exception(f"incorrect compressed length: {compressed_len}")
-        # Decompress file
-        uncompressed_data = zlib.decompress(uncompressed_data)
+        stream = count_inner(inflate_chunks(stream, chunk_size))
+    # Decompress file into a buffer sized from the header
+    output = bytearray(uncompressed_len)
+    offset = 0
+    with memoryview(output) as view:
+        try:
+            for chunk in inflate_chunks(stream, chunk_size):
+                end = offset + len(chunk)
+                if end > uncompressed_len:
+                    raise Exception(
+                        f"incorrect uncompressed length: {uncompressed_len}"
+                    )
+                view[offset:end] = chunk
+                offset = end
+        except Exception:
+            # A wrong 0x31 compressed length is reported first, as it is the cause
+            check_compressed_len()
+            raise
+    # Check if the compressed length is correct
+    check_compressed_len()
+    if save_type == 0x32 and compressed_len != inner_len:
+        raise Exception(f"incorrect compressed length: {compressed_len}")
     # Check if the uncompressed length is correct
-    if uncompressed_len != len(uncompressed_data):
+    if uncompressed_len != offset:
         raise Exception(f"incorrect uncompressed length: {uncompressed_len}")
+    # A read-only view of the buffer, which the GVAS reader reads in place
+    # instead of a bytes copy of it
+    return memoryview(output).toreadonly(), save_type
+
+
+def decompress_sav_stream(
+    f: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> tuple[memoryview, int]:
+    # Works from anything with a read(size) method, e.g. open files and mmaps.
+    # Returns a read-only memoryview, as decompress_sav_buffer does
+    header = f.read(HEADER_SIZE)
+    chunks = iter(lambda: f.read(chunk_size), b"")
+    return decompress_sav_chunks(header, chunks, chunk_size)
+
+
+class SavPeek:
+    save_type: int
+    uncompressed_len: int
+    compressed_len: int
+    header: GvasHeader
+
+
+def read_gvas_header(data: bytearray) -> Optional[GvasHeader]:
+    # The GVAS header at the start of data, None when data ends inside it. The
+    # reader is gone on return, so data can grow again
+    reader = FArchiveReader(data)
+    try:
+        header = GvasHeader.read(reader)
+    except Exception:
+        # Reads past the end stop there, anything else is a broken header
+        if reader.tell() < len(data):
+            raise
+        return None
+    # Properties always follow, so a header ending at the end was cut short
+    if reader.tell() < len(data):
+        return header
+    return None
+
+
+def peek_sav(f: BinaryIO, chunk_size: int = PEEK_CHUNK_SIZE) -> SavPeek:
+    # Reads the SAV header and decompresses only as much of the payload as
+    # GvasHeader.read needs
+    peek = SavPeek()
+    peek.uncompressed_len, peek.compressed_len, peek.save_type = read_sav_header(
+        f.read(HEADER_SIZE)
+    )
+    stream: Iterable[bytes] = iter(lambda: f.read(chunk_size), b"")
+    if peek.save_type == 0x32:
+        stream = inflate_chunks(stream, chunk_size)
+    data = bytearray()
+    # The header is read again each time data has doubled, so a long header
+    # costs linear time instead of a read per chunk
+    read_len = 0
+    for chunk in inflate_chunks(stream, chunk_size):
+        data += chunk
+        if len(data) < 2 * read_len:
+            continue
+        read_len = len(data)
+        header = read_gvas_header(data)
+        if header is not None:
+            peek.header = header
+            return peek
+    # The end of the payload, if it came before the next doubling
+    if len(data) > read_len:
+        header = read_gvas_header(data)
+        if header is not None:
+            peek.header = header
+            return peek
+    raise Exception("incomplete GVAS header, the save is likely truncated")
+
+
+def view_chunks(view: memoryview, start: int) -> Iterator[memoryview]:
+    # Slices of view from start, each released once the next one is taken or
+    # the iteration is closed
+    for chunk_start in range(start, len(view), CHUNK_SIZE):
+        with view[chunk_start : chunk_start + CHUNK_SIZE] as chunk:
+            yield chunk
+
 
-    return uncompressed_data, save_type
+def decompress_sav_buffer(data: ReadableBuffer) -> tuple[memoryview, int]:
+    # Takes any buffer, e.g. bytes or an mmap, which is fed to zlib in place.
+    # Every view of it is released on return, failed or not, so an mmap can be
+    # closed right after. The payload is a read-only memoryview, so callers
+    # needing bytes methods such as decode() have to copy it with bytes()
+    with memoryview(data) as view, view[:HEADER_SIZE] as header:
+        chunks = view_chunks(view, HEADER_SIZE)
+        try:
+            return decompress_sav_chunks(header, chunks)
+        finally:
+            chunks.close()
 
 
-def compress_gvas_to_sav(data: bytes, save_type: int) -> bytes:
+def decompress_sav_to_gvas(data: ReadableBuffer) -> tuple[bytes, int]:
+    # The payload as bytes, at the cost of one copy of it. The readers take the
+    # memoryview of decompress_sav_buffer as it is
+    raw_gvas, save_type = decompress_sav_buffer(data)
+    return bytes(raw_gvas), save_type
+
+
+def decompress_sav_file(filename: str, use_mmap: bool = True) -> tuple[memoryview, int]:
+    # Maps the file instead of reading it, so repeated runs on the same save
+    # are served from the page cache without a copy
+    with open(filename, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return decompress_sav_buffer(mapped)
+        return decompress_sav_stream(f)
+
+
+def compression_profile(profile: Union[str, int]) -> tuple[int, int]:
+    # A profile name, or an explicit zlib level from 0 to 9
+    if isinstance(profile, str) and profile in COMPRESSION_PROFILES:
+        return COMPRESSION_PROFILES[profile]
+    if isinstance(profile, int) or profile.isdigit():
+        level = int(profile)
+        if 0 <= level <= 9:
+            return level, zlib.Z_DEFAULT_STRATEGY
+    raise Exception(
+        f"unknown compression profile: {profile}, expected one of "
+        f"{', '.join(COMPRESSION_PROFILES)} or a level from 0 to 9"
+    )
+
+
+def adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    # Adler-32 of A + B from those of A and B, as zlib's adler32_combine
+    rem = len2 % ADLER32_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % ADLER32_BASE
+    sum1 += (adler2 & 0xFFFF) + ADLER32_BASE - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + ADLER32_BASE - rem
+    return (sum1 % ADLER32_BASE) | ((sum2 % ADLER32_BASE) << 16)
+
+
+def zlib_header(level: int) -> bytes:
+    # CMF for deflate with a 32K window, FLG with the level hint and check bits
+    if level < 0:
+        level = 6
+    compression_level = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    flg = compression_level << 6
+    flg += 31 - (0x78 * 256 + flg) % 31
+    return bytes([0x78, flg])
+
+
+def compress_block(
+    data: memoryview, start: int, end: int, level: int, strategy: int
+) -> tuple[bytes, int]:
+    # Raw deflate of data[start:end], primed with the preceding window so the
+    # ratio matches a single stream, ending on a byte boundary unless it is last
+    if start > 0:
+        compressor = zlib.compressobj(
+            level,
+            zlib.DEFLATED,
+            -zlib.MAX_WBITS,
+            zlib.DEF_MEM_LEVEL,
+            strategy,
+            zdict=data[max(0, start - ZLIB_WINDOW_SIZE) : start],
+        )
+    else:
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, -zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, strategy
+        )
+    block = data[start:end]
+    compressed = compressor.compress(block)
+    if end == len(data):
+        compressed += compressor.flush(zlib.Z_FINISH)
+    else:
+        compressed += compressor.flush(zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.adler32(block)
+
+
+def parallel_zlib_compress(
+    data: bytes,
+    level: int = zlib.Z_DEFAULT_COMPRESSION,
+    workers: int = 1,
+    block_size: int = COMPRESS_BLOCK_SIZE,
+    strategy: int = zlib.Z_DEFAULT_STRATEGY,
+) -> bytes:
+    # A single zlib stream, compressed in blocks on a thread pool as zlib
+    # releases the GIL
+    if workers <= 1 or len(data) <= block_size:
+        if strategy == zlib.Z_DEFAULT_STRATEGY:
+            return zlib.compress(data, level)
+        compressor = zlib.compressobj(
+            level, zlib.DEFLATED, zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, strategy
+        )
+        return compressor.compress(data) + compressor.flush()
+    view = memoryview(data)
+    starts = range(0, len(view), block_size)
+    with ThreadPoolExecutor(workers) as executor:
+        blocks = list(
+            executor.map(
+                lambda start: compress_block(
+                    view, start, min(start + block_size, len(view)), level, strategy
+                ),
+                starts,
+            )
+        )
+    result = bytearray(zlib_header(level))
+    checksum = 1
+    for start, (compressed, block_checksum) in zip(starts, blocks):
+        result.extend(compressed)
+        block_len = min(block_size, len(view) - start)
+        checksum = adler32_combine(checksum, block_checksum, block_len)
+    result.extend(checksum.to_bytes(4, byteorder="big"))
+    return bytes(result)
+
+
+def compress_gvas_to_sav(
+    data: bytes,
+    save_type: int,
+    workers: int = 1,
+    compression: Union[str, int] = "default",
+) -> bytes:
+    level, strategy = compression_profile(compression)
     uncompressed_len = len(data)
-    compressed_data = zlib.compress(data)
+    compressed_data = parallel_zlib_compress(
+        data, level, workers=workers, strategy=strategy
+    )
     compressed_len = len(compressed_data)
     if save_type == 0x32:
-        compressed_data = zlib.compress(compressed_data)
+        compressed_data = parallel_zlib_compress(
+            compressed_data, level, workers=workers, strategy=strategy
+        )
 
     # Create a byte array and append the necessary information
     result = bytearray()
@@ -109,3 +109,20 @@
         map_object.encode,
     ),
 }
+
+# Custom properties that can hold player, instance or container UUIDs. Save
+# transfers only decode these and keep the rest, such as foliage, as raw bytes.
+PALWORLD_TRANSFER_CUSTOM_PROPERTIES = {
+    path: PALWORLD_CUSTOM_PROPERTIES[path]
+    for path in (
+        ".worldSaveData.GroupSaveDataMap",
+        ".worldSaveData.CharacterSaveParameterMap.Value.RawData",
+        ".worldSaveData.CharacterContainerSaveData.Value.Slots.Slots.RawData",
+        # Eggs hold a whole character save parameter
+        ".worldSaveData.DynamicItemSaveData.DynamicItemSaveData.RawData",
+        ".worldSaveData.BaseCampSaveData.Value.WorkerDirector.RawData",
+        # Work assignments and built map objects reference players
+        ".worldSaveData.WorkSaveData",
+        ".worldSaveData.MapObjectSaveData",
+    )
+}
@@ -0,0 +1,164 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+
+from palworld_save_tools.archive import (
+    FArchiveReader,
+    LazyProperties,
+    LazyProperty,
+    RawProperty,
+    property_paths,
+)
+from palworld_save_tools.rawdata import map_object
+
+# Smaller sections are decoded in the parent, shipping them costs more than
+# decoding them
+PARALLEL_MIN_SECTION_SIZE = 64 * 1024
+
+# Set in each worker by init_worker
+worker_memory: Optional[shared_memory.SharedMemory] = None
+worker_options: dict[str, Any] = {}
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # The creating process unlinks it, so workers must not track it
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class SpanOffsets:
+    """Stands in for FArchiveReader.source_view in workers, so raw spans come
+    back as offsets into the parent buffer instead of unpicklable memoryviews"""
+
+    __slots__ = ("base",)
+
+    def __init__(self, base: int) -> None:
+        self.base = base
+
+    def __getitem__(self, span: slice) -> tuple[int, int]:
+        return (self.base + span.start, self.base + span.stop)
+
+
+def attach_spans(node: Any, source_view: memoryview) -> None:
+    # Turns the offsets left by SpanOffsets into views of source_view
+    if isinstance(node, dict):
+        if isinstance(node, RawProperty):
+            start, end = node.raw
+            node.raw = source_view[start:end]
+        for value in dict.values(node):
+            if isinstance(value, (dict, list)):
+                attach_spans(value, source_view)
+    else:
+        for value in node:
+            if isinstance(value, (dict, list)):
+                attach_spans(value, source_view)
+
+
+def init_worker(
+    name: str,
+    type_hints: dict[str, str],
+    custom_properties: dict[str, tuple[Callable, Callable]],
+    allow_nan: bool,
+    keep_spans: bool,
+    compact: bool,
+) -> None:
+    global worker_memory
+    worker_memory = attach_shared_memory(name)
+    # The sections are already decoded in parallel, a map object pool in each
+    # worker would start workers times map object workers processes
+    custom_properties = map_object.with_workers(custom_properties, 1)
+    worker_options.update(
+        type_hints=type_hints,
+        custom_properties=custom_properties,
+        allow_nan=allow_nan,
+        keep_spans=keep_spans,
+        compact=compact,
+        paths=property_paths(type_hints, custom_properties),
+    )
+
+
+def decode_section(type_name: str, size: int, path: str, start: int, end: int):
+    assert worker_memory is not None
+    # Read in place, byte arrays in the result are pickled back as bytes
+    with worker_memory.buf[start:end] as data, FArchiveReader(
+        data,
+        worker_options["type_hints"],
+        worker_options["custom_properties"],
+        allow_nan=worker_options["allow_nan"],
+        keep_spans=worker_options["keep_spans"],
+        compact=worker_options["compact"],
+        paths=worker_options["paths"],
+    ) as reader:
+        if reader.keep_spans:
+            reader.source_view = SpanOffsets(start)
+        return reader.property(type_name, size, path)
+
+
+def decode_parallel(sections: list[LazyProperties], workers: int) -> None:
+    # Decodes the LazyProperty values of sections on a process pool, with the
+    # source buffer in shared memory, and stores the results in place
+    pending: list[tuple[LazyProperties, str, LazyProperty]] = [
+        (properties, key, value)
+        for properties in sections
+        for key, value in dict.items(properties)
+        if isinstance(value, LazyProperty)
+    ]
+    large = [
+        item
+        for item in pending
+        if item[2].end - item[2].start >= PARALLEL_MIN_SECTION_SIZE
+    ]
+    if workers <= 1 or len(large) < 2:
+        for properties in sections:
+            properties.materialize_all()
+        return
+    # Largest first so the pool is not left waiting on one big section
+    large.sort(key=lambda item: item[2].end - item[2].start, reverse=True)
+    first = large[0][2]
+    source = first.source
+    memory = shared_memory.SharedMemory(create=True, size=len(source))
+    try:
+        memory.buf[: len(source)] = source
+        with ProcessPoolExecutor(
+            min(workers, len(large)),
+            initializer=init_worker,
+            initargs=(
+                memory.name,
+                first.type_hints,
+                first.custom_properties,
+                first.allow_nan,
+                first.keep_spans,
+                first.compact,
+            ),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    decode_section,
+                    value.type_name,
+                    value.size,
+                    value.path,
+                    value.start,
+                    value.end,
+                )
+                for _, _, value in large
+            ]
+            # The small sections are decoded while the workers run
+            for properties in sections:
+                for key, value in dict.items(properties):
+                    if (
+                        isinstance(value, LazyProperty)
+                        and value.end - value.start < PARALLEL_MIN_SECTION_SIZE
+                    ):
+                        dict.__setitem__(properties, key, value.materialize())
+            source_view = memoryview(source)
+            for (properties, key, value), future in zip(large, futures):
+                result = future.result()
+                if value.keep_spans:
+                    attach_spans(result, source_view)
+                    result.parent = value.parent
+                dict.__setitem__(properties, key, result)
+    finally:
+        memory.close()
+        memory.unlink()
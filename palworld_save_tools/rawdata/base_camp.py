@@ -1,6 +1,19 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+BASE_CAMP_LAYOUT = [
+    ("id", "guid"),
+    ("name", "fstring"),
+    ("state", "byte"),
+    ("transform", "ftransform"),
+    ("area_range", "float"),
+    ("group_id_belong_to", "guid"),
+    ("fast_travel_local_transform", "ftransform"),
+    ("owner_map_object_instance_id", "guid"),
+]
+base_camp_reader, base_camp_writer = compile_layout("base_camp", BASE_CAMP_LAYOUT)
 
 
 def decode(
@@ -17,17 +30,8 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
-    data = {
-        "id": reader.guid(),
-        "name": reader.fstring(),
-        "state": reader.byte(),
-        "transform": reader.ftransform(),
-        "area_range": reader.float(),
-        "group_id_belong_to": reader.guid(),
-        "fast_travel_local_transform": reader.ftransform(),
-        "owner_map_object_instance_id": reader.guid(),
-    }
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
+    data = base_camp_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -40,19 +44,12 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
 def encode_bytes(p: dict[str, Any]) -> bytes:
     writer = FArchiveWriter()
-    writer.guid(p["id"])
-    writer.fstring(p["name"])
-    writer.byte(p["state"])
-    writer.ftransform(p["transform"])
-    writer.float(p["area_range"])
-    writer.guid(p["group_id_belong_to"])
-    writer.ftransform(p["fast_travel_local_transform"])
-    writer.guid(p["owner_map_object_instance_id"])
+    base_camp_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
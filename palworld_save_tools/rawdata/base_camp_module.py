@@ -54,14 +54,14 @@ def module_passive_effect_reader(reader: FArchiveReader) -> dict[str, Any]:
         raise Exception(f"Unknown passive effect type {data['type']}")
     elif data["type"] == 2:
         data["work_hard_type"] = reader.byte()
-        data["unknown_trailer"] = [b for b in reader.read(4)]
+        data["unknown_trailer"] = reader.read(4)
     return data
 
 
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int], module_type: str
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
     data: dict[str, Any] = {}
     if module_type in NO_OP_TYPES:
         pass
@@ -79,7 +79,7 @@ def decode_bytes(
         try:
             data["passive_effects"] = reader.tarray(module_passive_effect_reader)
         except Exception as e:
-            reader.data.seek(0)
+            reader.seek(0)
             print(
                 f"Warning: Failed to decode passive effect, please report this: {e} ({bytes(b_bytes)!r})"
             )
@@ -1,6 +1,15 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+BUILD_PROCESS_LAYOUT = [
+    ("state", "byte"),
+    ("id", "guid"),
+]
+build_process_reader, build_process_writer = compile_layout(
+    "build_process", BUILD_PROCESS_LAYOUT
+)
 
 
 def decode(
@@ -17,11 +26,8 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
-    data = {
-        "state": reader.byte(),
-        "id": reader.guid(),
-    }
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
+    data = build_process_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -34,13 +40,12 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
 def encode_bytes(p: dict[str, Any]) -> bytes:
     writer = FArchiveWriter()
-    writer.byte(p["state"])
-    writer.guid(p["id"])
+    build_process_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
@@ -17,7 +17,7 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, char_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(char_bytes), debug=False)
+    reader = parent_reader.internal_copy(char_bytes, debug=False)
     char_data = {
         "object": reader.properties_until_end(),
         "unknown_bytes": reader.byte_list(4),
@@ -35,7 +35,7 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
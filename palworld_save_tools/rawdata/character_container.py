@@ -1,6 +1,16 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+CHARACTER_CONTAINER_LAYOUT = [
+    ("player_uid", "guid"),
+    ("instance_id", "guid"),
+    ("permission_tribe_id", "byte"),
+]
+character_container_reader, character_container_writer = compile_layout(
+    "character_container", CHARACTER_CONTAINER_LAYOUT
+)
 
 
 def decode(
@@ -19,12 +29,8 @@ def decode_bytes(
 ) -> Optional[dict[str, Any]]:
     if len(c_bytes) == 0:
         return None
-    reader = parent_reader.internal_copy(bytes(c_bytes), debug=False)
-    data = {
-        "player_uid": reader.guid(),
-        "instance_id": reader.guid(),
-        "permission_tribe_id": reader.byte(),
-    }
+    reader = parent_reader.internal_copy(c_bytes, debug=False)
+    data = character_container_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -37,7 +43,7 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
@@ -45,8 +51,6 @@ def encode_bytes(p: dict[str, Any]) -> bytes:
     if p is None:
         return bytes()
     writer = FArchiveWriter()
-    writer.guid(p["player_uid"])
-    writer.guid(p["instance_id"])
-    writer.byte(p["permission_tribe_id"])
+    character_container_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
@@ -19,8 +19,7 @@ def decode_bytes(
 ) -> Optional[dict[str, Any]]:
     if len(c_bytes) == 0:
         return None
-    buf = bytes(c_bytes)
-    reader = parent_reader.internal_copy(buf, debug=False)
+    reader = parent_reader.internal_copy(c_bytes, debug=False)
     data: dict[str, Any] = {}
     data["id"] = {
         "created_world_id": reader.guid(),
@@ -31,13 +30,13 @@ def decode_bytes(
     egg_data = try_read_egg(reader)
     if isinstance(egg_data, dict):
         data |= egg_data
-    elif (reader.size - reader.data.tell()) == 4:
+    elif (reader.size - reader.tell()) == 4:
         data["type"] = "armor"
         data["durability"] = reader.float()
         if not reader.eof():
             raise Exception("Warning: EOF not reached")
     else:
-        cur_pos = reader.data.tell()
+        cur_pos = reader.tell()
         temp_data: dict[str, Any] = {"type": "weapon"}
         try:
             temp_data["durability"] = reader.float()
@@ -48,15 +47,15 @@ def decode_bytes(
             data |= temp_data
         except Exception as e:
             print(
-                f"Warning: Failed to parse weapon data, continuing as raw data {buf!r}: {e}"
+                f"Warning: Failed to parse weapon data, continuing as raw data {bytes(c_bytes)!r}: {e}"
             )
-            reader.data.seek(cur_pos)
-            data["trailer"] = [int(b) for b in reader.read_to_end()]
+            reader.seek(cur_pos)
+            data["trailer"] = reader.read_to_end()
     return data
 
 
 def try_read_egg(reader: FArchiveReader) -> Optional[dict[str, Any]]:
-    cur_pos = reader.data.tell()
+    cur_pos = reader.tell()
     try:
         data: dict[str, Any] = {"type": "egg"}
         data["character_id"] = reader.fstring()
@@ -69,7 +68,7 @@ def try_read_egg(reader: FArchiveReader) -> Optional[dict[str, Any]]:
     except Exception as e:
         if e.args[0] == "Warning: EOF not reached":
             raise e
-        reader.data.seek(cur_pos)
+        reader.seek(cur_pos)
         return None
 
 
@@ -80,7 +79,7 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
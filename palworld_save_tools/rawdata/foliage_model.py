@@ -1,6 +1,16 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+FOLIAGE_MODEL_LAYOUT = [
+    ("model_id", "fstring"),
+    ("foliage_preset_type", "byte"),
+    ("cell_coord", [("x", "i64"), ("y", "i64"), ("z", "i64")]),
+]
+foliage_model_reader, foliage_model_writer = compile_layout(
+    "foliage_model", FOLIAGE_MODEL_LAYOUT
+)
 
 
 def decode(
@@ -17,15 +27,8 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
-    data: dict[str, Any] = {}
-    data["model_id"] = reader.fstring()
-    data["foliage_preset_type"] = reader.byte()
-    data["cell_coord"] = {
-        "x": reader.i64(),
-        "y": reader.i64(),
-        "z": reader.i64(),
-    }
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
+    data = foliage_model_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -38,18 +41,12 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
 def encode_bytes(p: dict[str, Any]) -> bytes:
     writer = FArchiveWriter()
-
-    writer.fstring(p["model_id"])
-    writer.byte(p["foliage_preset_type"])
-    writer.i64(p["cell_coord"]["x"])
-    writer.i64(p["cell_coord"]["y"])
-    writer.i64(p["cell_coord"]["z"])
-
+    foliage_model_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
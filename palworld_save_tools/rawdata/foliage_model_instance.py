@@ -1,7 +1,20 @@
-from typing import Any, Sequence
+import math
+from typing import Any, Callable, Sequence
 
 from palworld_save_tools.archive import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+INSTANCE_DATA_MAP_PATH = (
+    ".worldSaveData.FoliageGridSaveDataMap.Value.ModelMap.Value.InstanceDataMap"
+)
+RAW_DATA_PATH = INSTANCE_DATA_MAP_PATH + ".Value.RawData"
+ROTATOR_TO_DEGREES = 360.0 / 65536.0
+ROTATOR_FROM_DEGREES = 65536.0 / 360.0
+
 
 def decode(
     reader: FArchiveReader, type_name: str, size: int, path: str
@@ -17,7 +30,7 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
     data: dict[str, Any] = {}
     data["model_instance_id"] = reader.guid()
     pitch, yaw, roll = reader.compressed_short_rotator()
@@ -48,7 +61,7 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
@@ -72,3 +85,243 @@ def encode_bytes(p: dict[str, Any]) -> bytes:
 
     encoded_bytes = writer.bytes()
     return encoded_bytes
+
+
+# Columnar decoding: every instance of a model is decoded at once into NumPy
+# arrays stored under "instances" of the InstanceDataMap property, instead of
+# one dict per instance under each RawData. Rows follow the map entry order.
+#   model_instance_id  (n, 16) uint8, raw GUID bytes
+#   pitch, yaw, roll   float64 degrees
+#   x, y, z            float64
+#   scale_x            float32
+#   hp                 int32
+
+
+def with_columnar(
+    custom_properties: dict[str, tuple[Callable, Callable]],
+) -> dict[str, tuple[Callable, Callable]]:
+    # Copy of custom_properties decoding foliage instances into columns
+    if np is None:
+        raise Exception("Columnar foliage decoding requires numpy")
+    columnar = {
+        path: value
+        for path, value in custom_properties.items()
+        if path != RAW_DATA_PATH
+    }
+    if RAW_DATA_PATH in custom_properties:
+        columnar[INSTANCE_DATA_MAP_PATH] = (decode_columnar, encode_columnar)
+    return columnar
+
+
+def with_columnar_encoder(
+    custom_properties: dict[str, tuple[Callable, Callable]],
+) -> dict[str, tuple[Callable, Callable]]:
+    # Copy of custom_properties that can also write columnar foliage instances,
+    # only meant for FArchiveWriter
+    return {
+        **custom_properties,
+        INSTANCE_DATA_MAP_PATH: (decode_columnar, encode_columnar),
+    }
+
+
+def decode_columnar(
+    reader: FArchiveReader, type_name: str, size: int, path: str
+) -> dict[str, Any]:
+    if type_name != "MapProperty":
+        raise Exception(f"Expected MapProperty, got {type_name}")
+    value = reader.property(type_name, size, path, nested_caller_path=path)
+    raw_data = [entry["value"]["RawData"] for entry in value["value"]]
+    value["instances"] = decode_columns(
+        reader, [raw["value"]["values"] for raw in raw_data]
+    )
+    for raw in raw_data:
+        del raw["value"]
+    return value
+
+
+def encode_columnar(
+    writer: FArchiveWriter, property_type: str, properties: dict[str, Any]
+) -> int:
+    if property_type != "MapProperty":
+        raise Exception(f"Expected MapProperty, got {property_type}")
+    del properties["custom_type"]
+    encoded = encode_columns(properties.pop("instances"))
+    for entry, encoded_bytes in zip(properties["value"], encoded):
+        entry["value"]["RawData"]["value"] = {"values": encoded_bytes}
+    return writer.property_inner(property_type, properties)
+
+
+def gather(buf: "np.ndarray", positions: "np.ndarray", sizes: Any) -> "np.ndarray":
+    # Little endian unsigned values of sizes (at most 8) bytes at positions
+    value = np.zeros(len(positions), np.uint64)
+    last = len(buf) - 1
+    for k in range(int(np.max(sizes, initial=0))):
+        byte = buf[np.minimum(positions + k, last)].astype(np.uint64)
+        value |= np.where(k < sizes, byte, 0).astype(np.uint64) << np.uint64(8 * k)
+    return value
+
+
+def scatter(
+    out: "np.ndarray", positions: "np.ndarray", value: "np.ndarray", sizes: Any
+) -> None:
+    # Writes the low sizes bytes of value little endian at positions
+    value = value.astype(np.uint64)
+    for k in range(int(np.max(sizes, initial=0))):
+        rows = k < np.broadcast_to(sizes, positions.shape)
+        out[positions[rows] + k] = (value[rows] >> np.uint64(8 * k)) & 0xFF
+
+
+def bit_length(value: "np.ndarray") -> "np.ndarray":
+    # int.bit_length of non-negative int64 values
+    length = np.zeros(len(value), np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = value >= (1 << shift)
+        length += np.where(big, shift, 0)
+        value = np.where(big, value >> shift, value)
+    return length + (value > 0)
+
+
+def empty_columns(n: int) -> dict[str, Any]:
+    return {
+        "model_instance_id": np.zeros((n, 16), np.uint8),
+        "pitch": np.zeros(n),
+        "yaw": np.zeros(n),
+        "roll": np.zeros(n),
+        "x": np.zeros(n),
+        "y": np.zeros(n),
+        "z": np.zeros(n),
+        "scale_x": np.zeros(n, np.float32),
+        "hp": np.zeros(n, np.int32),
+    }
+
+
+def decode_columns(reader: FArchiveReader, blobs: Sequence[bytes]) -> dict[str, Any]:
+    n = len(blobs)
+    columns = empty_columns(n)
+    if n == 0:
+        return columns
+    lengths = np.fromiter((len(b) for b in blobs), np.int64, n)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    buf = np.frombuffer(b"".join(blobs), np.uint8)
+    last = len(buf) - 1
+    columns["model_instance_id"][:] = buf[
+        np.minimum(starts[:, None] + np.arange(16), last)
+    ]
+    pos = starts + 16
+    # compressed_short_rotator: a bool, then a u16 when set, per component
+    for name in ("pitch", "yaw", "roll"):
+        is_set = buf[np.minimum(pos, last)] > 0
+        short = np.where(is_set, gather(buf, pos + 1, 2), 0)
+        columns[name][:] = short * ROTATOR_TO_DEGREES
+        pos = pos + 1 + 2 * is_set
+    # packed_vector(1): u32 bit count and scale flag, then three serializeints
+    header = gather(buf, pos, 4).astype(np.int64)
+    pos = pos + 4
+    bit_count = header & 63
+    # Unpacked doubles or floats are rare, those rows are decoded one by one
+    unpacked = bit_count == 0
+    sizes = (bit_count + 7) // 8
+    mask = (np.uint64(1) << bit_count.astype(np.uint64)) - np.uint64(1)
+    sign_bit = np.uint64(1) << (np.maximum(bit_count, 1) - 1).astype(np.uint64)
+    for name in ("x", "y", "z"):
+        component = gather(buf, pos, sizes) & mask
+        low_bits = (component & (sign_bit - np.uint64(1))).astype(np.int64)
+        columns[name][:] = low_bits - (component & sign_bit).astype(np.int64)
+        pos = pos + sizes
+    columns["scale_x"][:] = gather(buf, pos, 4).astype(np.uint32).view(np.float32)
+    columns["hp"][:] = gather(buf, pos + 4, 4).astype(np.uint32).view(np.int32)
+    pos = pos + 8
+    if np.any((pos != ends) & ~unpacked):
+        raise Exception("Warning: EOF not reached")
+    for row in np.flatnonzero(unpacked):
+        data = decode_bytes(reader, blobs[row])
+        world_transform = data["world_transform"]
+        for name in ("x", "y", "z"):
+            value = world_transform["location"][name]
+            columns[name][row] = math.nan if value is None else value
+        scale_x = world_transform["scale_x"]
+        columns["scale_x"][row] = math.nan if scale_x is None else scale_x
+        columns["hp"][row] = data["hp"]
+    return columns
+
+
+def encode_columns(instances: dict[str, Any]) -> list[bytes]:
+    # Same bytes as encode_bytes gives for each row
+    ids = np.asarray(instances["model_instance_id"], np.uint8).reshape(-1, 16)
+    n = len(ids)
+    rotator = [
+        np.asarray(instances[name], np.float64) for name in ("pitch", "yaw", "roll")
+    ]
+    location = np.asarray(
+        [instances[name] for name in ("x", "y", "z")], np.float64
+    ).reshape(3, n)
+    scale_x = np.asarray(instances["scale_x"], np.float32)
+    hp = np.asarray(instances["hp"], np.int32)
+
+    shorts = [
+        np.round(degrees * ROTATOR_FROM_DEGREES).astype(np.int64) & 0xFFFF
+        for degrees in rotator
+    ]
+    # packed_vector(1) only packs values below 2^62, the rest are written as
+    # doubles one row at a time
+    magnitude = np.abs(location)
+    packed = np.all(magnitude < float(1 << 62), axis=0)
+    use_scaled = np.min(magnitude, axis=0) < float(1 << 52)
+    components = np.trunc(np.where(packed, location, 0)).astype(np.int64)
+    bit_count = np.max([bit_length(c ^ (c >> 63)) for c in components], axis=0) + 1
+    sizes = (bit_count + 7) // 8
+
+    lengths = 16 + 3 + 4 + 3 * sizes + 8
+    for short in shorts:
+        lengths = lengths + 2 * (short != 0)
+    unpacked = {
+        row: encode_bytes(row_dict(instances, ids, row))
+        for row in np.flatnonzero(~packed)
+    }
+    for row, encoded in unpacked.items():
+        lengths[row] = len(encoded)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    out = np.zeros(int(ends[-1]) if n > 0 else 0, np.uint8)
+
+    rows = packed
+    pos = starts[rows]
+    out[pos[:, None] + np.arange(16)] = ids[rows]
+    pos = pos + 16
+    for short in shorts:
+        short = short[rows]
+        is_set = short != 0
+        out[pos] = is_set
+        scatter(out, pos + 1, short, np.where(is_set, 2, 0))
+        pos = pos + 1 + 2 * is_set
+    scatter(out, pos, (use_scaled[rows] << 6) | bit_count[rows], 4)
+    pos = pos + 4
+    for component in components:
+        scatter(out, pos, component[rows], sizes[rows])
+        pos = pos + sizes[rows]
+    scatter(out, pos, scale_x[rows].view(np.uint32), 4)
+    scatter(out, pos + 4, hp[rows].view(np.uint32), 4)
+    for row, encoded in unpacked.items():
+        out[starts[row] : ends[row]] = np.frombuffer(encoded, np.uint8)
+    return [out[start:end].tobytes() for start, end in zip(starts, ends)]
+
+
+def row_dict(instances: dict[str, Any], ids: "np.ndarray", row: int) -> dict[str, Any]:
+    return {
+        "model_instance_id": UUID(ids[row].tobytes()),
+        "world_transform": {
+            "rotator": {
+                "pitch": float(instances["pitch"][row]),
+                "yaw": float(instances["yaw"][row]),
+                "roll": float(instances["roll"][row]),
+            },
+            "location": {
+                "x": float(instances["x"][row]),
+                "y": float(instances["y"][row]),
+                "z": float(instances["z"][row]),
+            },
+            "scale_x": float(instances["scale_x"][row]),
+        },
+        "hp": int(instances["hp"][row]),
+    }
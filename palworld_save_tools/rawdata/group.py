@@ -23,7 +23,7 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, group_bytes: Sequence[int], group_type: str
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(group_bytes), debug=False)
+    reader = parent_reader.internal_copy(group_bytes, debug=False)
     group_data = {
         "group_type": group_type,
         "group_id": reader.guid(),
@@ -90,7 +90,7 @@ def encode(
             continue
         p = group["value"]["RawData"]["value"]
         encoded_bytes = encode_bytes(p)
-        group["value"]["RawData"]["value"] = {"values": [b for b in encoded_bytes]}
+        group["value"]["RawData"]["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
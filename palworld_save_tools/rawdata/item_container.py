@@ -1,6 +1,21 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+ITEM_CONTAINER_LAYOUT = [
+    (
+        "permission",
+        [
+            ("type_a", ("tarray", "byte")),
+            ("type_b", ("tarray", "byte")),
+            ("item_static_ids", ("tarray", "fstring")),
+        ],
+    ),
+]
+item_container_reader, item_container_writer = compile_layout(
+    "item_container", ITEM_CONTAINER_LAYOUT
+)
 
 
 def decode(
@@ -19,13 +34,8 @@ def decode_bytes(
 ) -> Optional[dict[str, Any]]:
     if len(c_bytes) == 0:
         return None
-    reader = parent_reader.internal_copy(bytes(c_bytes), debug=False)
-    data = {}
-    data["permission"] = {
-        "type_a": reader.tarray(lambda r: r.byte()),
-        "type_b": reader.tarray(lambda r: r.byte()),
-        "item_static_ids": reader.tarray(lambda r: r.fstring()),
-    }
+    reader = parent_reader.internal_copy(c_bytes, debug=False)
+    data = item_container_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -38,7 +48,7 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
@@ -46,10 +56,6 @@ def encode_bytes(p: dict[str, Any]) -> bytes:
     if p is None:
         return bytes()
     writer = FArchiveWriter()
-    writer.tarray(lambda w, d: w.byte(d), p["permission"]["type_a"])
-    writer.tarray(lambda w, d: w.byte(d), p["permission"]["type_b"])
-    writer.tarray(
-        lambda w, d: (w.fstring(d), None)[1], p["permission"]["item_static_ids"]
-    )
+    item_container_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
@@ -0,0 +1,273 @@
+import linecache
+import struct
+from typing import Any, Callable, Sequence
+
+from palworld_save_tools.archive import *
+
+# A layout lists the fields of a binary structure in the order they are stored,
+# as (key, field type) pairs. A field type is one of:
+# - a FIXED_FIELD_TYPES name, or "fstring"
+# - a nested layout (a list), read into a dict
+# - ("tarray", field type name), a u32 count followed by that many values
+# - a (reader, writer) pair of functions, for anything else
+# compile_layout turns a layout into a reader and a writer function. Each run
+# of fixed size fields is read with one struct unpack and written with one
+# struct pack
+Layout = Sequence[tuple[str, Any]]
+FixedFieldType = tuple[str, Callable[[list[str]], str], Callable[[str], list[str]]]
+
+
+def scalar_field(fmt: str) -> FixedFieldType:
+    return (fmt, lambda values: values[0], lambda expr: [expr])
+
+
+def keyed_field(fmt: str, shape: tuple[Any, ...]) -> FixedFieldType:
+    # Field read into a dict, shape lists its keys in order, each one either a
+    # key or a (key, shape) pair for a nested dict
+    def decode(values: list[str]) -> str:
+        names = iter(values)
+
+        def build(shape: tuple[Any, ...]) -> str:
+            items = []
+            for key in shape:
+                if isinstance(key, tuple):
+                    items.append(f"{key[0]!r}: {build(key[1])}")
+                else:
+                    items.append(f"{key!r}: {next(names)}")
+            return "{" + ", ".join(items) + "}"
+
+        return build(shape)
+
+    def encode(expr: str) -> list[str]:
+        exprs = []
+        for key in shape:
+            if isinstance(key, tuple):
+                exprs.extend(keyed_field("", key[1])[2](f"{expr}[{key[0]!r}]"))
+            else:
+                exprs.append(f"{expr}[{key!r}]")
+        return exprs
+
+    return (fmt, decode, encode)
+
+
+# Fixed size field types: (struct format, builds the expression of the decoded
+# value from the names of the unpacked values, lists the expressions of the
+# values to pack from the expression of the decoded value)
+FIXED_FIELD_TYPES: dict[str, FixedFieldType] = {
+    "byte": scalar_field("B"),
+    "i16": scalar_field("h"),
+    "u16": scalar_field("H"),
+    "i32": scalar_field("i"),
+    "u32": scalar_field("I"),
+    "i64": scalar_field("q"),
+    "u64": scalar_field("Q"),
+    "float": scalar_field("f"),
+    "double": scalar_field("d"),
+    # u32 holding a bool
+    "bool32": (
+        "I",
+        lambda values: f"{values[0]} > 0",
+        lambda expr: [f"1 if {expr} else 0"],
+    ),
+    "guid": (
+        "16s",
+        lambda values: f"UUID({values[0]})",
+        lambda expr: [f"uuid_bytes({expr})"],
+    ),
+    "vector": keyed_field("3d", ("x", "y", "z")),
+    "quat": keyed_field("4d", ("x", "y", "z", "w")),
+    "ftransform": keyed_field(
+        "10d",
+        (
+            ("rotation", ("x", "y", "z", "w")),
+            ("translation", ("x", "y", "z")),
+            ("scale3d", ("x", "y", "z")),
+        ),
+    ),
+}
+
+# Fixed size field types FArchiveReader filters NaN and inf out of when
+# allow_nan is False, a layout with any of them is then read field by field
+FLOAT_FIELD_TYPES = {"float", "double", "vector", "quat", "ftransform"}
+
+FIELD_READERS: dict[str, Callable[[FArchiveReader], Any]] = {
+    "byte": FArchiveReader.byte,
+    "i16": FArchiveReader.i16,
+    "u16": FArchiveReader.u16,
+    "i32": FArchiveReader.i32,
+    "u32": FArchiveReader.u32,
+    "i64": FArchiveReader.i64,
+    "u64": FArchiveReader.u64,
+    "float": FArchiveReader.float,
+    "double": FArchiveReader.double,
+    "bool32": lambda reader: reader.u32() > 0,
+    "guid": FArchiveReader.guid,
+    "vector": FArchiveReader.vector_dict,
+    "quat": FArchiveReader.quat_dict,
+    "ftransform": FArchiveReader.ftransform,
+    "fstring": FArchiveReader.fstring,
+}
+
+FIELD_WRITERS: dict[str, Callable[[FArchiveWriter, Any], Any]] = {
+    "byte": FArchiveWriter.byte,
+    "i16": FArchiveWriter.i16,
+    "u16": FArchiveWriter.u16,
+    "i32": FArchiveWriter.i32,
+    "u32": FArchiveWriter.u32,
+    "i64": FArchiveWriter.i64,
+    "u64": FArchiveWriter.u64,
+    "float": FArchiveWriter.float,
+    "double": FArchiveWriter.double,
+    "bool32": lambda writer, value: writer.u32(1 if value else 0),
+    "guid": FArchiveWriter.guid,
+    "vector": FArchiveWriter.vector_dict,
+    "quat": FArchiveWriter.quat_dict,
+    "ftransform": FArchiveWriter.ftransform,
+    "fstring": FArchiveWriter.fstring,
+}
+
+
+def field_reader(field_type: Any) -> Callable[[FArchiveReader], Any]:
+    if isinstance(field_type, str):
+        return FIELD_READERS[field_type]
+    elif isinstance(field_type, list):
+        return lambda reader: read_fields(reader, field_type)
+    elif field_type[0] == "tarray":
+        element_reader = FIELD_READERS[field_type[1]]
+        return lambda reader: reader.tarray(element_reader)
+    return field_type[0]
+
+
+def field_writer(field_type: Any) -> Callable[[FArchiveWriter, Any], Any]:
+    if isinstance(field_type, str):
+        return FIELD_WRITERS[field_type]
+    elif isinstance(field_type, list):
+        return lambda writer, value: write_fields(writer, value, field_type)
+    elif field_type[0] == "tarray":
+        element_writer = FIELD_WRITERS[field_type[1]]
+        return lambda writer, value: writer.tarray(element_writer, value)
+    return field_type[1]
+
+
+def read_fields(reader: FArchiveReader, layout: Layout) -> dict[str, Any]:
+    # Reads layout one field at a time, what compiled readers fall back to
+    return {key: field_reader(field_type)(reader) for key, field_type in layout}
+
+
+def write_fields(writer: FArchiveWriter, p: dict[str, Any], layout: Layout) -> None:
+    # Writes layout one field at a time, what compiled writers fall back to
+    for key, field_type in layout:
+        field_writer(field_type)(writer, p[key])
+
+
+def write_run(
+    writer: FArchiveWriter, p: dict[str, Any], run: list[tuple[tuple[str, ...], str]]
+) -> None:
+    # Writes a run of fixed size fields one at a time, for values the packed
+    # struct rejects (None floats are written as NaN)
+    for path, field_type in run:
+        value = p
+        for key in path:
+            value = value[key]
+        FIELD_WRITERS[field_type](writer, value)
+
+
+def compile_layout(name: str, layout: Layout) -> tuple[
+    Callable[[FArchiveReader], dict[str, Any]],
+    Callable[[FArchiveWriter, dict[str, Any]], None],
+]:
+    # Generates the source of a reader and a writer for layout, with the fields
+    # split into runs of fixed size fields and single variable size fields
+    steps: list[Any] = []
+
+    def split(layout: Layout, path: tuple[str, ...]) -> None:
+        for key, field_type in layout:
+            field_path = path + (key,)
+            if isinstance(field_type, list):
+                split(field_type, field_path)
+            elif isinstance(field_type, str) and field_type in FIXED_FIELD_TYPES:
+                if len(steps) > 0 and isinstance(steps[-1], list):
+                    steps[-1].append((field_path, field_type))
+                else:
+                    steps.append([(field_path, field_type)])
+            else:
+                steps.append((field_path, field_type))
+
+    split(layout, ())
+    namespace: dict[str, Any] = {
+        "UUID": UUID,
+        "uuid_bytes": uuid_bytes,
+        "struct": struct,
+        "read_fields": read_fields,
+        "write_run": write_run,
+        "layout": layout,
+    }
+    runs = [step for step in steps if isinstance(step, list)]
+    read_lines = [f"def read_{name}(reader):"]
+    write_lines = [f"def write_{name}(writer, p):"]
+    if any(field_type in FLOAT_FIELD_TYPES for run in runs for _, field_type in run):
+        read_lines.append("    if not reader.allow_nan:")
+        read_lines.append("        return read_fields(reader, layout)")
+    if len(runs) > 0:
+        read_lines.append("    data = reader.data")
+        write_lines.append("    data = writer.data")
+    decoded: dict[tuple[str, ...], str] = {}
+    value_count = 0
+
+    def access(path: tuple[str, ...]) -> str:
+        return "p" + "".join(f"[{key!r}]" for key in path)
+
+    for index, step in enumerate(steps):
+        if isinstance(step, list):
+            fmt = "<"
+            names = []
+            pack_args = []
+            for path, field_type in step:
+                field_fmt, decode, encode = FIXED_FIELD_TYPES[field_type]
+                fmt += field_fmt
+                exprs = encode(access(path))
+                values = [f"v{value_count + i}" for i in range(len(exprs))]
+                value_count += len(exprs)
+                names.extend(values)
+                decoded[path] = decode(values)
+                pack_args.extend(exprs)
+            compiled = struct.Struct(fmt)
+            namespace[f"unpack_{index}"] = compiled.unpack_from
+            namespace[f"pack_{index}"] = compiled.pack
+            namespace[f"run_{index}"] = step
+            read_lines.append("    offset = reader.offset")
+            read_lines.append(f"    reader.offset = offset + {compiled.size}")
+            read_lines.append(
+                f"    ({', '.join(names)},) = unpack_{index}(data, offset)"
+            )
+            write_lines.append("    try:")
+            write_lines.append(f"        data += pack_{index}({', '.join(pack_args)})")
+            write_lines.append("    except struct.error:")
+            write_lines.append(f"        write_run(writer, p, run_{index})")
+        else:
+            path, field_type = step
+            namespace[f"read_{index}"] = field_reader(field_type)
+            namespace[f"write_{index}"] = field_writer(field_type)
+            value = f"v{value_count}"
+            value_count += 1
+            decoded[path] = value
+            read_lines.append(f"    {value} = read_{index}(reader)")
+            write_lines.append(f"    write_{index}(writer, {access(path)})")
+
+    def build(layout: Layout, path: tuple[str, ...]) -> str:
+        items = []
+        for key, field_type in layout:
+            field_path = path + (key,)
+            if isinstance(field_type, list):
+                items.append(f"{key!r}: {build(field_type, field_path)}")
+            else:
+                items.append(f"{key!r}: {decoded[field_path]}")
+        return "{" + ", ".join(items) + "}"
+
+    read_lines.append(f"    return {build(layout, ())}")
+    source = "\n".join(read_lines + [""] + write_lines) + "\n"
+    # Registered with linecache so tracebacks show the generated lines
+    filename = f"<layout {name}>"
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace[f"read_{name}"], namespace[f"write_{name}"]
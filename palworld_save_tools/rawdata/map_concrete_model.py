@@ -1,4 +1,4 @@
-from typing import Any, Sequence
+from typing import Any, Callable, Sequence
 
 from palworld_save_tools.archive import *
 from palworld_save_tools.rawdata.common import (
@@ -340,106 +340,356 @@
 )
 
 
+def no_op_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {}
+
+
+def no_op_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    pass
+
+
+def death_dropped_character_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "stored_parameter_id": reader.guid(),
+        "owner_player_uid": reader.guid(),
+    }
+
+
+def death_dropped_character_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.guid(p["stored_parameter_id"])
+    writer.guid(p["owner_player_uid"])
+
+
+def convert_item_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "current_recipe_id": reader.fstring(),
+        "remain_product_num": reader.i32(),
+        "requested_product_num": reader.i32(),
+        "work_speed_additional_rate": reader.float(),
+    }
+
+
+def convert_item_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.fstring(p["current_recipe_id"])
+    writer.i32(p["remain_product_num"])
+    writer.i32(p["requested_product_num"])
+    writer.float(p["work_speed_additional_rate"])
+
+
+def pickup_item_on_level_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "auto_picked_up": reader.u32() > 0,
+    }
+
+
+def pickup_item_on_level_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.u32(1 if p["auto_picked_up"] else 0)
+
+
+def drop_item_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "auto_picked_up": reader.u32() > 0,
+        "item_id": {
+            "static_id": reader.fstring(),
+            "dynamic_id": {
+                "created_world_id": reader.guid(),
+                "local_id_in_created_world": reader.guid(),
+            },
+        },
+    }
+
+
+def drop_item_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.u32(1 if p["auto_picked_up"] else 0)
+    writer.fstring(p["item_id"]["static_id"])
+    writer.guid(p["item_id"]["dynamic_id"]["created_world_id"])
+    writer.guid(p["item_id"]["dynamic_id"]["local_id_in_created_world"])
+
+
+def item_drop_on_damage_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "drop_item_infos": reader.tarray(pal_item_and_num_read),
+    }
+
+
+def item_drop_on_damage_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.tarray(pal_item_and_slot_writer, p["drop_item_infos"])
+
+
+def death_penalty_storage_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "owner_player_uid": reader.guid(),
+    }
+
+
+def death_penalty_storage_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.guid(p["owner_player_uid"])
+
+
+def defense_bullet_launcher_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "remaining_bullets": reader.i32(),
+        "magazine_size": reader.i32(),
+        "bullet_item_name": reader.fstring(),
+    }
+
+
+def defense_bullet_launcher_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.i32(p["remaining_bullets"])
+    writer.i32(p["magazine_size"])
+    writer.fstring(p["bullet_item_name"])
+
+
+def generate_energy_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "stored_energy_amount": reader.float(),
+    }
+
+
+def generate_energy_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.float(p["stored_energy_amount"])
+
+
+def farm_block_v2_reader(reader: FArchiveReader) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "crop_data_id": reader.fstring(),
+        "current_state": reader.byte(),
+        "crop_progress_rate_value": reader.float(),
+        "water_stack_rate_value": reader.float(),
+    }
+    if not reader.eof():
+        data["state_machine"] = {
+            "growup_required_time": reader.float(),
+            "growup_progress_time": reader.float(),
+        }
+    return data
+
+
+def farm_block_v2_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.fstring(p["crop_data_id"])
+    writer.byte(p["current_state"])
+    writer.float(p["crop_progress_rate_value"])
+    writer.float(p["water_stack_rate_value"])
+    if "state_machine" in p:
+        writer.float(p["state_machine"]["growup_required_time"])
+        writer.float(p["state_machine"]["growup_progress_time"])
+
+
+def fast_travel_point_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "location_instance_id": reader.guid(),
+    }
+
+
+def fast_travel_point_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.guid(p["location_instance_id"])
+
+
+def shipping_item_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "shipping_hours": reader.tarray(lambda r: r.i32()),
+    }
+
+
+def shipping_item_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.tarray(lambda w, x: w.i32(x), p["shipping_hours"])
+
+
+def product_item_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "work_speed_additional_rate": reader.float(),
+        "product_item_id": reader.fstring(),
+    }
+
+
+def product_item_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.float(p["work_speed_additional_rate"])
+    writer.fstring(p["product_item_id"])
+
+
+def recover_otomo_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "recover_amount_by_sec": reader.float(),
+    }
+
+
+def recover_otomo_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.float(p["recover_amount_by_sec"])
+
+
+def hatching_egg_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "hatched_character_save_parameter": reader.properties_until_end(),
+        "unknown_bytes": reader.u32(),
+        "hatched_character_guid": reader.guid(),
+    }
+
+
+def hatching_egg_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.properties(p["hatched_character_save_parameter"])
+    writer.u32(p["unknown_bytes"])
+    writer.guid(p["hatched_character_guid"])
+
+
+def treasure_box_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "treasure_grade_type": reader.byte(),
+    }
+
+
+def treasure_box_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.byte(p["treasure_grade_type"])
+
+
+def breed_farm_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "spawned_egg_instance_ids": reader.tarray(lambda r: r.guid()),
+    }
+
+
+def breed_farm_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.tarray(lambda w, x: w.guid(x), p["spawned_egg_instance_ids"])
+
+
+def signboard_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "signboard_text": reader.fstring(),
+    }
+
+
+def signboard_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.fstring(p["signboard_text"])
+
+
+def torch_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "extinction_date_time": reader.i64(),
+    }
+
+
+def torch_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.i64(p["extinction_date_time"])
+
+
+def pal_egg_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "unknown_bytes": reader.u32(),
+    }
+
+
+def pal_egg_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.u32(p["unknown_bytes"])
+
+
+def base_camp_point_reader(reader: FArchiveReader) -> dict[str, Any]:
+    return {
+        "base_camp_id": reader.guid(),
+    }
+
+
+def base_camp_point_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    writer.guid(p["base_camp_id"])
+
+
+# Reader and writer of the fields each concrete model class adds after
+# instance_id and model_instance_id. Add to it with register_concrete_model
+CONCRETE_MODEL_TYPES: dict[
+    str,
+    tuple[
+        Callable[[FArchiveReader], dict[str, Any]],
+        Callable[[FArchiveWriter, dict[str, Any]], None],
+    ],
+] = {
+    **{
+        map_object_concrete_model: (no_op_reader, no_op_writer)
+        for map_object_concrete_model in NO_OP_TYPES
+    },
+    "PalMapObjectDeathDroppedCharacterModel": (
+        death_dropped_character_reader,
+        death_dropped_character_writer,
+    ),
+    "PalMapObjectConvertItemModel": (convert_item_reader, convert_item_writer),
+    "PalMapObjectPickupItemOnLevelModel": (
+        pickup_item_on_level_reader,
+        pickup_item_on_level_writer,
+    ),
+    "PalMapObjectDropItemModel": (drop_item_reader, drop_item_writer),
+    "PalMapObjectItemDropOnDamagModel": (
+        item_drop_on_damage_reader,
+        item_drop_on_damage_writer,
+    ),
+    "PalMapObjectDeathPenaltyStorageModel": (
+        death_penalty_storage_reader,
+        death_penalty_storage_writer,
+    ),
+    "PalMapObjectDefenseBulletLauncherModel": (
+        defense_bullet_launcher_reader,
+        defense_bullet_launcher_writer,
+    ),
+    "PalMapObjectGenerateEnergyModel": (generate_energy_reader, generate_energy_writer),
+    "PalMapObjectFarmBlockV2Model": (farm_block_v2_reader, farm_block_v2_writer),
+    "PalMapObjectFastTravelPointModel": (
+        fast_travel_point_reader,
+        fast_travel_point_writer,
+    ),
+    "PalMapObjectShippingItemModel": (shipping_item_reader, shipping_item_writer),
+    "PalMapObjectProductItemModel": (product_item_reader, product_item_writer),
+    "PalMapObjectRecoverOtomoModel": (recover_otomo_reader, recover_otomo_writer),
+    "PalMapObjectHatchingEggModel": (hatching_egg_reader, hatching_egg_writer),
+    "PalMapObjectTreasureBoxModel": (treasure_box_reader, treasure_box_writer),
+    "PalMapObjectBreedFarmModel": (breed_farm_reader, breed_farm_writer),
+    "PalMapObjectSignboardModel": (signboard_reader, signboard_writer),
+    "PalMapObjectTorchModel": (torch_reader, torch_writer),
+    "PalMapObjectPalEggModel": (pal_egg_reader, pal_egg_writer),
+    "PalMapObjectBaseCampPoint": (base_camp_point_reader, base_camp_point_writer),
+}
+
+
+def register_concrete_model(
+    map_object_concrete_model: str,
+    reader: Callable[[FArchiveReader], dict[str, Any]],
+    writer: Callable[[FArchiveWriter, dict[str, Any]], None],
+    object_ids: Sequence[str] = (),
+) -> None:
+    # Adds or replaces the reader and writer of a concrete model class, and
+    # maps the given map object ids to it
+    CONCRETE_MODEL_TYPES[map_object_concrete_model] = (reader, writer)
+    for object_id in object_ids:
+        MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS[object_id.lower()] = (
+            map_object_concrete_model
+        )
+
+
 def decode_bytes(
     parent_reader: FArchiveReader, m_bytes: Sequence[int], object_id: str
 ) -> Optional[dict[str, Any]]:
     if len(m_bytes) == 0:
-        return {"values": []}
-    reader = parent_reader.internal_copy(bytes(m_bytes), debug=False)
+        return {"values": b""}
+    reader = parent_reader.internal_copy(m_bytes, debug=False)
     data: dict[str, Any] = {}
 
-    if object_id.lower() not in MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS:
+    map_object_concrete_model = MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS.get(
+        object_id.lower()
+    )
+    if map_object_concrete_model is None:
         print(f"Warning: Map object '{object_id}' not in database, skipping")
         return {"values": m_bytes}
 
     # Base handling
     data["instance_id"] = reader.guid()
     data["model_instance_id"] = reader.guid()
-
-    def pickup_base():
-        data["auto_picked_up"] = reader.u32() > 0
-
-    map_object_concrete_model = MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS[
-        object_id.lower()
-    ]
     data["concrete_model_type"] = map_object_concrete_model
 
-    if map_object_concrete_model in NO_OP_TYPES:
-        pass
-    elif map_object_concrete_model == "PalMapObjectDeathDroppedCharacterModel":
-        data["stored_parameter_id"] = reader.guid()
-        data["owner_player_uid"] = reader.guid()
-    elif map_object_concrete_model == "PalMapObjectConvertItemModel":
-        data["current_recipe_id"] = reader.fstring()
-        data["remain_product_num"] = reader.i32()
-        data["requested_product_num"] = reader.i32()
-        data["work_speed_additional_rate"] = reader.float()
-    elif map_object_concrete_model == "PalMapObjectPickupItemOnLevelModel":
-        pickup_base()
-    elif map_object_concrete_model == "PalMapObjectDropItemModel":
-        pickup_base()
-        data["item_id"] = {
-            "static_id": reader.fstring(),
-            "dynamic_id": {
-                "created_world_id": reader.guid(),
-                "local_id_in_created_world": reader.guid(),
-            },
-        }
-    elif map_object_concrete_model == "PalMapObjectItemDropOnDamagModel":
-        data["drop_item_infos"] = reader.tarray(pal_item_and_num_read)
-    elif map_object_concrete_model == "PalMapObjectDeathPenaltyStorageModel":
-        data["owner_player_uid"] = reader.guid()
-    elif map_object_concrete_model == "PalMapObjectDefenseBulletLauncherModel":
-        data["remaining_bullets"] = reader.i32()
-        data["magazine_size"] = reader.i32()
-        data["bullet_item_name"] = reader.fstring()
-    elif map_object_concrete_model == "PalMapObjectGenerateEnergyModel":
-        data["stored_energy_amount"] = reader.float()
-    elif map_object_concrete_model == "PalMapObjectFarmBlockV2Model":
-        data["crop_data_id"] = reader.fstring()
-        current_state = reader.byte()
-        data["current_state"] = current_state
-        data["crop_progress_rate_value"] = reader.float()
-        data["water_stack_rate_value"] = reader.float()
-        if not reader.eof():
-            data["state_machine"] = {
-                "growup_required_time": reader.float(),
-                "growup_progress_time": reader.float(),
-            }
-    elif map_object_concrete_model == "PalMapObjectFastTravelPointModel":
-        data["location_instance_id"] = reader.guid()
-    elif map_object_concrete_model == "PalMapObjectShippingItemModel":
-        data["shipping_hours"] = reader.tarray(lambda r: r.i32())
-    elif map_object_concrete_model == "PalMapObjectProductItemModel":
-        data["work_speed_additional_rate"] = reader.float()
-        data["product_item_id"] = reader.fstring()
-    elif map_object_concrete_model == "PalMapObjectRecoverOtomoModel":
-        data["recover_amount_by_sec"] = reader.float()
-    elif map_object_concrete_model == "PalMapObjectHatchingEggModel":
-        data["hatched_character_save_parameter"] = reader.properties_until_end()
-        data["unknown_bytes"] = reader.u32()
-        data["hatched_character_guid"] = reader.guid()
-    elif map_object_concrete_model == "PalMapObjectTreasureBoxModel":
-        data["treasure_grade_type"] = reader.byte()
-    elif map_object_concrete_model == "PalMapObjectBreedFarmModel":
-        data["spawned_egg_instance_ids"] = reader.tarray(lambda r: r.guid())
-    elif map_object_concrete_model == "PalMapObjectSignboardModel":
-        data["signboard_text"] = reader.fstring()
-    elif map_object_concrete_model == "PalMapObjectTorchModel":
-        data["extinction_date_time"] = reader.i64()
-    elif map_object_concrete_model == "PalMapObjectPalEggModel":
-        data["unknown_bytes"] = reader.u32()
-    elif map_object_concrete_model == "PalMapObjectBaseCampPoint":
-        data["base_camp_id"] = reader.guid()
-    else:
+    if map_object_concrete_model not in CONCRETE_MODEL_TYPES:
         print(
             f"Warning: Unknown map object concrete model {map_object_concrete_model}, skipping"
         )
         return {"values": m_bytes}
+    data.update(CONCRETE_MODEL_TYPES[map_object_concrete_model][0](reader))
 
     if not reader.eof():
         raise Exception(
-            f"Warning: EOF not reached for {object_id} {map_object_concrete_model}: ori: {''.join(f'{b:02x}' for b in m_bytes)} remaining: {reader.size - reader.data.tell()}"
+            f"Warning: EOF not reached for {object_id} {map_object_concrete_model}: ori: {''.join(f'{b:02x}' for b in m_bytes)} remaining: {reader.size - reader.tell()}"
         )
     return data
 
@@ -456,70 +706,11 @@ def encode_bytes(p: Optional[dict[str, Any]]) -> bytes:
     writer.guid(p["instance_id"])
     writer.guid(p["model_instance_id"])
 
-    if map_object_concrete_model in NO_OP_TYPES:
-        pass
-    elif map_object_concrete_model == "PalMapObjectDeathDroppedCharacterModel":
-        writer.guid(p["stored_parameter_id"])
-        writer.guid(p["owner_player_uid"])
-    elif map_object_concrete_model == "PalMapObjectConvertItemModel":
-        writer.fstring(p["current_recipe_id"])
-        writer.i32(p["remain_product_num"])
-        writer.i32(p["requested_product_num"])
-        writer.float(p["work_speed_additional_rate"])
-    elif map_object_concrete_model == "PalMapObjectPickupItemOnLevelModel":
-        writer.u32(1 if p["auto_picked_up"] else 0)
-    elif map_object_concrete_model == "PalMapObjectDropItemModel":
-        writer.u32(1 if p["auto_picked_up"] else 0)
-        writer.fstring(p["item_id"]["static_id"])
-        writer.guid(p["item_id"]["dynamic_id"]["created_world_id"])
-        writer.guid(p["item_id"]["dynamic_id"]["local_id_in_created_world"])
-    elif map_object_concrete_model == "PalMapObjectItemDropOnDamagModel":
-        writer.tarray(pal_item_and_slot_writer, p["drop_item_infos"])
-    elif map_object_concrete_model == "PalMapObjectDeathPenaltyStorageModel":
-        writer.guid(p["owner_player_uid"])
-    elif map_object_concrete_model == "PalMapObjectDefenseBulletLauncherModel":
-        writer.i32(p["remaining_bullets"])
-        writer.i32(p["magazine_size"])
-        writer.fstring(p["bullet_item_name"])
-    elif map_object_concrete_model == "PalMapObjectGenerateEnergyModel":
-        writer.float(p["stored_energy_amount"])
-    elif map_object_concrete_model == "PalMapObjectFarmBlockV2Model":
-        writer.fstring(p["crop_data_id"])
-        writer.byte(p["current_state"])
-        writer.float(p["crop_progress_rate_value"])
-        writer.float(p["water_stack_rate_value"])
-        if "state_machine" in p:
-            writer.float(p["state_machine"]["growup_required_time"])
-            writer.float(p["state_machine"]["growup_progress_time"])
-    elif map_object_concrete_model == "PalMapObjectFastTravelPointModel":
-        writer.guid(p["location_instance_id"])
-    elif map_object_concrete_model == "PalMapObjectShippingItemModel":
-        writer.tarray(lambda w, x: w.i32(x), p["shipping_hours"])
-    elif map_object_concrete_model == "PalMapObjectProductItemModel":
-        writer.float(p["work_speed_additional_rate"])
-        writer.fstring(p["product_item_id"])
-    elif map_object_concrete_model == "PalMapObjectRecoverOtomoModel":
-        writer.float(p["recover_amount_by_sec"])
-    elif map_object_concrete_model == "PalMapObjectHatchingEggModel":
-        writer.properties(p["hatched_character_save_parameter"])
-        writer.u32(p["unknown_bytes"])
-        writer.guid(p["hatched_character_guid"])
-    elif map_object_concrete_model == "PalMapObjectTreasureBoxModel":
-        writer.byte(p["treasure_grade_type"])
-    elif map_object_concrete_model == "PalMapObjectBreedFarmModel":
-        writer.tarray(lambda w, x: w.guid(x), p["spawned_egg_instance_ids"])
-    elif map_object_concrete_model == "PalMapObjectSignboardModel":
-        writer.fstring(p["signboard_text"])
-    elif map_object_concrete_model == "PalMapObjectTorchModel":
-        writer.i64(p["extinction_date_time"])
-    elif map_object_concrete_model == "PalMapObjectPalEggModel":
-        writer.u32(p["unknown_bytes"])
-    elif map_object_concrete_model == "PalMapObjectBaseCampPoint":
-        writer.guid(p["base_camp_id"])
-    else:
+    if map_object_concrete_model not in CONCRETE_MODEL_TYPES:
         raise Exception(
             f"Unknown map object concrete model {map_object_concrete_model}"
         )
+    CONCRETE_MODEL_TYPES[map_object_concrete_model][1](writer, p)
 
     encoded_bytes = writer.bytes()
     return encoded_bytes
@@ -1,6 +1,24 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+MAP_MODEL_LAYOUT = [
+    ("instance_id", "guid"),
+    ("concrete_model_instance_id", "guid"),
+    ("base_camp_id_belong_to", "guid"),
+    ("group_id_belong_to", "guid"),
+    ("hp", [("current", "i32"), ("max", "i32")]),
+    ("initital_transform_cache", "ftransform"),
+    ("repair_work_id", "guid"),
+    ("owner_spawner_level_object_instance_id", "guid"),
+    ("owner_instance_id", "guid"),
+    ("build_player_uid", "guid"),
+    ("interact_restrict_type", "byte"),
+    ("stage_instance_id_belong_to", [("id", "guid"), ("valid", "bool32")]),
+    ("created_at", "i64"),
+]
+map_model_reader, map_model_writer = compile_layout("map_model", MAP_MODEL_LAYOUT)
 
 
 def decode(
@@ -17,27 +35,8 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, m_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(m_bytes), debug=False)
-    data: dict[str, Any] = {}
-    data["instance_id"] = reader.guid()
-    data["concrete_model_instance_id"] = reader.guid()
-    data["base_camp_id_belong_to"] = reader.guid()
-    data["group_id_belong_to"] = reader.guid()
-    data["hp"] = {
-        "current": reader.i32(),
-        "max": reader.i32(),
-    }
-    data["initital_transform_cache"] = reader.ftransform()
-    data["repair_work_id"] = reader.guid()
-    data["owner_spawner_level_object_instance_id"] = reader.guid()
-    data["owner_instance_id"] = reader.guid()
-    data["build_player_uid"] = reader.guid()
-    data["interact_restrict_type"] = reader.byte()
-    data["stage_instance_id_belong_to"] = {
-        "id": reader.guid(),
-        "valid": reader.u32() > 0,
-    }
-    data["created_at"] = reader.i64()
+    reader = parent_reader.internal_copy(m_bytes, debug=False)
+    data = map_model_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -50,34 +49,12 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
 def encode_bytes(p: dict[str, Any]) -> bytes:
     writer = FArchiveWriter()
-
-    writer.guid(p["instance_id"])
-    writer.guid(p["concrete_model_instance_id"])
-    writer.guid(p["base_camp_id_belong_to"])
-    writer.guid(p["group_id_belong_to"])
-
-    writer.i32(p["hp"]["current"])
-    writer.i32(p["hp"]["max"])
-
-    writer.ftransform(p["initital_transform_cache"])
-
-    writer.guid(p["repair_work_id"])
-    writer.guid(p["owner_spawner_level_object_instance_id"])
-    writer.guid(p["owner_instance_id"])
-    writer.guid(p["build_player_uid"])
-
-    writer.byte(p["interact_restrict_type"])
-
-    writer.guid(p["stage_instance_id_belong_to"]["id"])
-    writer.u32(1 if p["stage_instance_id_belong_to"]["valid"] else 0)
-
-    writer.i64(p["created_at"])
-
+    map_model_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
@@ -1,4 +1,6 @@
-from typing import Any, Sequence
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, Sequence
 
 from palworld_save_tools.archive import *
 from palworld_save_tools.rawdata import (
@@ -10,56 +12,146 @@
 )
 
 
+# Map objects per task when decoding on a process pool
+PARALLEL_CHUNK_SIZE = 256
+
+# Set in each worker by init_worker
+worker_reader: Optional[FArchiveReader] = None
+
+
 def decode(
-    reader: FArchiveReader, type_name: str, size: int, path: str
+    reader: FArchiveReader, type_name: str, size: int, path: str, workers: int = 1
 ) -> dict[str, Any]:
     if type_name != "ArrayProperty":
         raise Exception(f"Expected ArrayProperty, got {type_name}")
     value = reader.property(type_name, size, path, nested_caller_path=path)
-    for map_object in value["value"]["values"]:
+    map_objects = value["value"]["values"]
+    if workers > 1 and len(map_objects) > PARALLEL_CHUNK_SIZE:
+        decode_parallel(reader, map_objects, workers)
+    else:
+        for map_object in map_objects:
+            store_raw_data(map_object, decode_raw_data(reader, raw_data(map_object)))
+    return value
+
+
+def raw_data(map_object: dict[str, Any]) -> tuple[Any, ...]:
+    # Every RawData blob of a map object, with what decoding them needs
+    model = map_object["Model"]["value"]
+    concrete_model = map_object["ConcreteModel"]["value"]
+    return (
+        model["RawData"]["value"]["values"],
+        model["Connector"]["value"]["RawData"]["value"]["values"],
+        model["BuildProcess"]["value"]["RawData"]["value"]["values"],
+        concrete_model["RawData"]["value"]["values"],
+        map_object["MapObjectId"]["value"],
+        [
+            (module["key"], module["value"]["RawData"]["value"]["values"])
+            for module in concrete_model["ModuleMap"]["value"]
+        ],
+    )
+
+
+def decode_raw_data(reader: FArchiveReader, raw: tuple[Any, ...]) -> tuple[Any, ...]:
+    (
+        model_bytes,
+        connector_bytes,
+        build_process_bytes,
+        concrete_model_bytes,
+        map_object_id,
+        modules,
+    ) = raw
+    return (
         # Decode Model
-        map_object["Model"]["value"]["RawData"]["value"] = map_model.decode_bytes(
-            reader, map_object["Model"]["value"]["RawData"]["value"]["values"]
-        )
+        map_model.decode_bytes(reader, model_bytes),
         # Decode Model.Connector
-        map_object["Model"]["value"]["Connector"]["value"]["RawData"]["value"] = (
-            connector.decode_bytes(
-                reader,
-                map_object["Model"]["value"]["Connector"]["value"]["RawData"]["value"][
-                    "values"
-                ],
-            )
-        )
+        connector.decode_bytes(reader, connector_bytes),
         # Decode Model.BuildProcess
-        map_object["Model"]["value"]["BuildProcess"]["value"]["RawData"]["value"] = (
-            build_process.decode_bytes(
-                reader,
-                map_object["Model"]["value"]["BuildProcess"]["value"]["RawData"][
-                    "value"
-                ]["values"],
-            )
-        )
+        build_process.decode_bytes(reader, build_process_bytes),
         # Decode ConcreteModel
-        map_object_id = map_object["MapObjectId"]["value"]
-        map_object["ConcreteModel"]["value"]["RawData"]["value"] = (
-            map_concrete_model.decode_bytes(
-                reader,
-                map_object["ConcreteModel"]["value"]["RawData"]["value"]["values"],
-                map_object_id,
-            )
-        )
+        map_concrete_model.decode_bytes(reader, concrete_model_bytes, map_object_id),
         # Decode ConcreteModel.ModuleMap
-        for module in map_object["ConcreteModel"]["value"]["ModuleMap"]["value"]:
-            module_type = module["key"]
-            module_bytes = module["value"]["RawData"]["value"]["values"]
-            module["value"]["RawData"]["value"] = (
-                map_concrete_model_module.decode_bytes(
-                    reader,
-                    module_bytes,
-                    module_type,
-                )
-            )
-    return value
+        [
+            map_concrete_model_module.decode_bytes(reader, module_bytes, module_type)
+            for module_type, module_bytes in modules
+        ],
+    )
+
+
+def store_raw_data(map_object: dict[str, Any], decoded: tuple[Any, ...]) -> None:
+    (
+        model_value,
+        connector_value,
+        build_process_value,
+        concrete_model_value,
+        module_values,
+    ) = decoded
+    model = map_object["Model"]["value"]
+    concrete_model = map_object["ConcreteModel"]["value"]
+    model["RawData"]["value"] = model_value
+    model["Connector"]["value"]["RawData"]["value"] = connector_value
+    model["BuildProcess"]["value"]["RawData"]["value"] = build_process_value
+    concrete_model["RawData"]["value"] = concrete_model_value
+    for module, module_value in zip(
+        concrete_model["ModuleMap"]["value"], module_values
+    ):
+        module["value"]["RawData"]["value"] = module_value
+
+
+def init_worker(
+    type_hints: dict[str, str],
+    custom_properties: dict[str, tuple[Callable, Callable]],
+    allow_nan: bool,
+) -> None:
+    global worker_reader
+    # Only used as the parent of the readers decode_bytes creates
+    worker_reader = FArchiveReader(
+        b"", type_hints, custom_properties, allow_nan=allow_nan
+    )
+
+
+def decode_chunk(chunk: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    assert worker_reader is not None
+    return [decode_raw_data(worker_reader, raw) for raw in chunk]
+
+
+def decode_parallel(
+    reader: FArchiveReader, map_objects: list[dict[str, Any]], workers: int
+) -> None:
+    # Decodes chunks of map objects on a process pool, storing the results in
+    # order so the output matches the serial path
+    raw = [raw_data(map_object) for map_object in map_objects]
+    chunks = [
+        raw[i : i + PARALLEL_CHUNK_SIZE]
+        for i in range(0, len(raw), PARALLEL_CHUNK_SIZE)
+    ]
+    with ProcessPoolExecutor(
+        min(workers, len(chunks)),
+        initializer=init_worker,
+        initargs=(reader.type_hints, reader.custom_properties, reader.allow_nan),
+    ) as executor:
+        decoded = (
+            map_object_decoded
+            for chunk_decoded in executor.map(decode_chunk, chunks)
+            for map_object_decoded in chunk_decoded
+        )
+        for map_object, map_object_decoded in zip(map_objects, decoded):
+            store_raw_data(map_object, map_object_decoded)
+
+
+def with_workers(
+    custom_properties: dict[str, tuple[Callable, Callable]], workers: int
+) -> dict[str, tuple[Callable, Callable]]:
+    # Copy of custom_properties decoding map objects on workers processes,
+    # also replacing the count of an earlier with_workers
+    return {
+        path: (
+            (functools.partial(decode, workers=workers), encoder)
+            if decoder is decode
+            or (isinstance(decoder, functools.partial) and decoder.func is decode)
+            else (decoder, encoder)
+        )
+        for path, (decoder, encoder) in custom_properties.items()
+    }
 
 
 def encode(
@@ -44,7 +44,7 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int], work_type: str
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
     data: dict[str, Any] = {}
     # Handle base serialization
     if work_type in WORK_BASE_TYPES:
@@ -119,7 +119,7 @@ def decode_bytes(
         print(
             f"Unknown EPalWorkTransformType, please report this: {transform_type}: {work_type}: {''.join(f'{b:02x}' for b in remaining_data)}"
         )
-        data["transform"]["raw_data"] = [b for b in remaining_data]
+        data["transform"]["raw_data"] = remaining_data
 
     if not reader.eof():
         raise Exception(
@@ -132,7 +132,7 @@ def decode_bytes(
 def decode_work_assign_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
     data: dict[str, Any] = {}
 
     data["id"] = reader.guid()
@@ -160,18 +160,13 @@ def encode(
     for work_element in properties["value"]["values"]:
         work_type = work_element["WorkableType"]["value"]["value"]
         work_element["RawData"]["value"] = {
-            "values": [
-                b for b in encode_bytes(work_element["RawData"]["value"], work_type)
-            ]
+            "values": encode_bytes(work_element["RawData"]["value"], work_type)
         }
         for work_assign in work_element["WorkAssignMap"]["value"]:
             work_assign["value"]["RawData"]["value"] = {
-                "values": [
-                    b
-                    for b in encode_work_assign_bytes(
-                        work_assign["value"]["RawData"]["value"]
-                    )
-                ]
+                "values": encode_work_assign_bytes(
+                    work_assign["value"]["RawData"]["value"]
+                )
             }
     return writer.property_inner(property_type, properties)
 
@@ -248,7 +243,7 @@ def encode_bytes(p: dict[str, Any], work_type: str) -> bytes:
         print(
             f"Unknown EPalWorkTransformType, please report this: {transform_type}: {work_type}"
         )
-        writer.write(p["transform"]["raw_data"])
+        writer.write(bytes(p["transform"]["raw_data"]))
 
     encoded_bytes = writer.bytes()
     return encoded_bytes
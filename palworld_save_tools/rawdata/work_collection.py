@@ -1,6 +1,15 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+WORK_COLLECTION_LAYOUT = [
+    ("id", "guid"),
+    ("work_ids", ("tarray", "guid")),
+]
+work_collection_reader, work_collection_writer = compile_layout(
+    "work_collection", WORK_COLLECTION_LAYOUT
+)
 
 
 def decode(
@@ -17,10 +26,8 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
-    data: dict[str, Any] = {}
-    data["id"] = reader.guid()
-    data["work_ids"] = reader.tarray(uuid_reader)
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
+    data = work_collection_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -33,13 +40,12 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
 def encode_bytes(p: dict[str, Any]) -> bytes:
     writer = FArchiveWriter()
-    writer.guid(p["id"])
-    writer.tarray(uuid_writer, p["work_ids"])
+    work_collection_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
@@ -1,6 +1,18 @@
 from typing import Any, Sequence
 
 from palworld_save_tools.archive import *
+from palworld_save_tools.rawdata.layout import compile_layout
+
+WORKER_DIRECTOR_LAYOUT = [
+    ("id", "guid"),
+    ("spawn_transform", "ftransform"),
+    ("current_order_type", "byte"),
+    ("current_battle_type", "byte"),
+    ("container_id", "guid"),
+]
+worker_director_reader, worker_director_writer = compile_layout(
+    "worker_director", WORKER_DIRECTOR_LAYOUT
+)
 
 
 def decode(
@@ -17,13 +29,8 @@ def decode(
 def decode_bytes(
     parent_reader: FArchiveReader, b_bytes: Sequence[int]
 ) -> dict[str, Any]:
-    reader = parent_reader.internal_copy(bytes(b_bytes), debug=False)
-    data: dict[str, Any] = {}
-    data["id"] = reader.guid()
-    data["spawn_transform"] = reader.ftransform()
-    data["current_order_type"] = reader.byte()
-    data["current_battle_type"] = reader.byte()
-    data["container_id"] = reader.guid()
+    reader = parent_reader.internal_copy(b_bytes, debug=False)
+    data = worker_director_reader(reader)
     if not reader.eof():
         raise Exception("Warning: EOF not reached")
     return data
@@ -36,16 +43,12 @@ def encode(
         raise Exception(f"Expected ArrayProperty, got {property_type}")
     del properties["custom_type"]
     encoded_bytes = encode_bytes(properties["value"])
-    properties["value"] = {"values": [b for b in encoded_bytes]}
+    properties["value"] = {"values": encoded_bytes}
     return writer.property_inner(property_type, properties)
 
 
 def encode_bytes(p: dict[str, Any]) -> bytes:
     writer = FArchiveWriter()
-    writer.guid(p["id"])
-    writer.ftransform(p["spawn_transform"])
-    writer.byte(p["current_order_type"])
-    writer.byte(p["current_battle_type"])
-    writer.guid(p["container_id"])
+    worker_director_writer(writer, p)
     encoded_bytes = writer.bytes()
     return encoded_bytes
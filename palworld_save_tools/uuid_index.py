@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+from typing import Any, Optional, Sequence, Union
+
+from palworld_save_tools.archive import UUID, CompactNode
+
+# Keys leading from GvasFile.properties to the value, e.g.
+# ("worldSaveData", "value", "GroupSaveDataMap", "value", 0, "value", ...)
+UUIDLocation = tuple[Union[str, int], ...]
+
+ZERO_UUID_BYTES = b"\x00" * 16
+INDEX_VERSION = 1
+
+
+def location_path(location: UUIDLocation) -> str:
+    # Reader-style path, e.g. .worldSaveData.GroupSaveDataMap.Value.RawData.players.player_uid
+    parts: list[str] = []
+    previous: Union[str, int, None] = None
+    for key in location:
+        if isinstance(key, int):
+            pass
+        elif isinstance(previous, int) and key in ("key", "value"):
+            # Map entry
+            parts.append(key.capitalize())
+        elif key not in ("value", "values"):
+            parts.append(key)
+        previous = key
+    return "." + ".".join(parts)
+
+
+def location_section(location: UUIDLocation) -> Optional[str]:
+    # Top-level worldSaveData property holding the value, e.g. GroupSaveDataMap
+    if len(location) > 2 and location[0] == "worldSaveData":
+        return str(location[2])
+    return None
+
+
+def resolve_location(
+    properties: dict[str, Any], location: UUIDLocation
+) -> tuple[Any, Any]:
+    # Returns (container, key) so that container[key] is the indexed value
+    container: Any = properties
+    for key in location[:-1]:
+        container = container[key]
+    return container, location[-1]
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UUIDIndex:
+    """Every non-zero UUID in a parsed save, mapped to the locations referencing it"""
+
+    save_hash: Optional[str]
+    locations: dict[bytes, list[UUIDLocation]]
+
+    def __init__(self, save_hash: Optional[str] = None) -> None:
+        self.save_hash = save_hash
+        self.locations = {}
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def __contains__(self, u: Union[UUID, str]) -> bool:
+        return self.key(u) in self.locations
+
+    @staticmethod
+    def key(u: Union[UUID, str]) -> bytes:
+        if isinstance(u, UUID):
+            return u.raw_bytes
+        return UUID.from_str(str(u)).raw_bytes
+
+    def lookup(self, u: Union[UUID, str]) -> list[UUIDLocation]:
+        return self.locations.get(self.key(u), [])
+
+    def add(self, u: UUID, location: UUIDLocation) -> None:
+        if u.raw_bytes == ZERO_UUID_BYTES:
+            return
+        self.locations.setdefault(u.raw_bytes, []).append(location)
+
+    def add_property(self, prop: Any, location: Sequence[Union[str, int]]) -> None:
+        # UUIDs a generic property reader put in the property itself: its ids,
+        # a Guid struct value, and Guid array values or map keys and values.
+        # FArchiveReader calls this as each property is read, after the
+        # properties nested in it
+        for key, value in prop.items():
+            if isinstance(value, UUID):
+                self.add(value, (*location, key))
+        property_type = prop["type"]
+        if property_type == "ArrayProperty":
+            for key, value in prop["value"].items():
+                if isinstance(value, UUID):
+                    self.add(value, (*location, "value", key))
+            values = prop["value"]["values"]
+            if isinstance(values, list):
+                for i, value in enumerate(values):
+                    if isinstance(value, UUID):
+                        self.add(value, (*location, "value", "values", i))
+        elif property_type == "MapProperty":
+            for i, entry in enumerate(prop["value"]):
+                for key, value in entry.items():
+                    if isinstance(value, UUID):
+                        self.add(value, (*location, "value", i, key))
+
+    def add_properties(
+        self, properties: dict[str, Any], prefix: UUIDLocation = ()
+    ) -> None:
+        path: list[Union[str, int]] = list(prefix)
+        locations = self.locations
+
+        def walk(node: Any) -> None:
+            mapping = isinstance(node, (dict, CompactNode))
+            items = node.items() if mapping else enumerate(node)
+            for key, value in items:
+                if isinstance(value, UUID):
+                    if value.raw_bytes != ZERO_UUID_BYTES:
+                        locations.setdefault(value.raw_bytes, []).append((*path, key))
+                elif isinstance(value, (dict, list, CompactNode)):
+                    path.append(key)
+                    walk(value)
+                    path.pop()
+
+        walk(properties)
+
+    def dump(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "save_hash": self.save_hash,
+            "locations": {
+                str(UUID(raw_bytes)): [list(location) for location in locations]
+                for raw_bytes, locations in self.locations.items()
+            },
+        }
+
+    @staticmethod
+    def load(data: dict[str, Any]) -> "UUIDIndex":
+        index = UUIDIndex(data["save_hash"])
+        for u, locations in data["locations"].items():
+            index.locations[UUID.from_str(u).raw_bytes] = [
+                tuple(location) for location in locations
+            ]
+        return index
+
+    @staticmethod
+    def sidecar_path(sav_path: str, directory: str = "out") -> str:
+        # Kept under directory with the converted saves, not next to the input
+        return f"{directory}/{sav_path}.uuidindex.json"
+
+    def save(self, sav_path: str, directory: str = "out") -> None:
+        sidecar = UUIDIndex.sidecar_path(sav_path, directory)
+        os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+        with open(sidecar, "w", encoding="utf8") as f:
+            json.dump(self.dump(), f, separators=(",", ":"))
+
+    @staticmethod
+    def load_sidecar(
+        sav_path: str, save_hash: Optional[str] = None, directory: str = "out"
+    ) -> Optional["UUIDIndex"]:
+        # Returns None when there is no sidecar or it was built from different save contents
+        sidecar = UUIDIndex.sidecar_path(sav_path, directory)
+        if not os.path.exists(sidecar):
+            return None
+        if save_hash is None:
+            save_hash = hash_file(sav_path)
+        with open(sidecar, "r", encoding="utf8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            return None
+        if data.get("save_hash") != save_hash:
+            return None
+        return UUIDIndex.load(data)
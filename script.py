@@ -11,10 +11,15 @@
 import sys
 from re import Match
 
-from fix_host_save import fix_host_save, sav_to_json
+from fix_host_save import fix_host_save, json_to_sav, rewrite_operation, sav_to_json
+from json_tools import write_json
 from logger import pprint
+from uuid_rewrite import RewriteMapping
 from who_config import WhoConfig, WhoConfigUser, load_who_config
 
+from palworld_save_tools.palsav import peek_sav
+from palworld_save_tools.uuid_index import UUIDIndex
+
 
 def exit_with_message(message: str | BaseException, code: int = 0) -> Any:
     """Exits the command line if running in main thread."""
@@ -33,18 +38,38 @@ def exit_with_message(message: str | BaseException, code: int = 0) -> Any:
         raise message
 
 
+def is_level_sav(level_sav: Path) -> bool:
+    """Checks from its headers alone whether ``level_sav`` is a world save."""
+    try:
+        with level_sav.open("rb") as f:
+            class_name: str = peek_sav(f).header.save_game_class_name
+    except Exception: # pylint: disable=W0718
+        return False
+    return "Pal.PalWorldSaveGame" in class_name or "Pal.PalLocalWorldSaveGame" in class_name
+
+
 def find_save_dir(root: Path) -> str:
     """Finds the save directory locally"""
     for _root, directories, _ in os.walk(root):
         for _ in directories:
             level_sav: Path = Path(os.path.join(_root, "Level.sav"))
-            if Path(_root).parent.name == root.name and level_sav.exists():
+            if Path(_root).parent.name == root.name and level_sav.exists() and is_level_sav(level_sav):
                 return Path(_root).name
     return exit_with_message(FileNotFoundError("No save directory found."), 1)
 
 
 def enumerate_user_transfer(who_json: WhoConfig, sav_dir: str):
-    """Temporary Method Docstring."""
+    r"""
+    Transfers every user in ``who_json`` against a single in-memory copy of the level,
+    which is parsed once up front, indexing its UUIDs as it is read, rewritten for every user in one pass,
+    and serialized once after the last transfer.
+    """
+    level_sav_path: str = f"{sav_dir}/Level.sav"
+    uuid_index: UUIDIndex = UUIDIndex()
+    level_json: dict[str, Any] = sav_to_json(level_sav_path, uuid_index, keep_spans=True, transfer=True)
+    mapping: RewriteMapping = RewriteMapping()
+    transferred: list[str] = []
+
     for _, _item in enumerate(who_json.user_transfer):
         item: WhoConfigUser = WhoConfigUser(_item)
         if isinstance(item.new, str) and isinstance(item.old, str):
@@ -57,10 +82,9 @@ def enumerate_user_transfer(who_json: WhoConfig, sav_dir: str):
                         " [magenta]from[/magenta] variable set.", indent=0)
                 continue
             try:
-                level_sav_path: str = f"{sav_dir}/Level.sav"
-                level_json: dict[str, Any] = sav_to_json(level_sav_path)
                 pprint(f"[green][bold]INFO:[/bold][/green] Modifying {item.name}.", indent=0)
-                fix_host_save(sav_dir, item.new, item.old, True, level_json)
+                level_json = fix_host_save(sav_dir, item.new, item.old, True, level_json, mapping, item.name, uuid_index)
+                transferred.append(str(item.name))
             except FileNotFoundError as op_error:
                 if "Your player save does not exist" in str(op_error):
                     gotten: Match[str] | None = re.match(r"Player\/([A-F0-9]+).sav\"",str(op_error))
@@ -77,6 +101,11 @@ def enumerate_user_transfer(who_json: WhoConfig, sav_dir: str):
         else:
             raise TypeError("_new or _old is not type of str.")
 
+    if len(transferred) > 0:
+        pprint(f"[green][bold]INFO:[/bold][/green] Rewriting level for {len(transferred)} transferred users: {', '.join(transferred)}.", indent=0)
+        level_json = rewrite_operation(level_json, mapping)
+        write_json(level_json, "out/" + level_sav_path, json_to_sav)
+
 
 def main(cwd: str | Path | None = None) -> None:
     """Temporary Method Docstring."""
@@ -1,5 +1,7 @@
 & "$((Get-Command -Name "pyenv").Source)" shell "3.12.2"
 
+& "$((Get-Command -Name "python").Source)" -m unittest discover -s (Join-Path -Path $PScriptDir -ChildPath "test");
+
 Push-Location -Location (Join-Path -Path $PScriptDir -ChildPath "test")
 
 & "$((Get-Command -Name "python").Source)" "$(Join-Path -Path $PWD -ChildPath "test.py")" $Args;
@@ -1 +1,2 @@
+python -m unittest discover -s test
 python ./test/test.py $@
\ No newline at end of file
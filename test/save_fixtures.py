@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""Builders for small synthetic property trees and saves used by the unit tests."""
+
+import os
+import sys
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from palworld_save_tools.archive import UUID, FArchiveReader, FArchiveWriter  # noqa: E402
+from palworld_save_tools.gvas import GvasHeader  # noqa: E402
+
+ZERO: UUID = UUID(b"\x00" * 16)
+
+
+def uuid_of(n: int) -> UUID:
+    """Gets the ``UUID`` formatted as the 32 hex digits of ``n``."""
+    digits: str = f"{n:032x}"
+    return UUID.from_str(f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}")
+
+
+def guid_property(value: UUID) -> dict[str, Any]:
+    """Builds a Guid StructProperty."""
+    return {"struct_type": "Guid", "struct_id": ZERO, "id": None, "value": value, "type": "StructProperty"}
+
+
+def struct_property(struct_type: str, value: dict[str, Any]) -> dict[str, Any]:
+    """Builds a StructProperty holding nested properties."""
+    return {"struct_type": struct_type, "struct_id": ZERO, "id": None, "value": value, "type": "StructProperty"}
+
+
+def int_property(value: int) -> dict[str, Any]:
+    """Builds an IntProperty."""
+    return {"id": None, "value": value, "type": "IntProperty"}
+
+
+def str_property(value: str) -> dict[str, Any]:
+    """Builds a StrProperty."""
+    return {"id": None, "value": value, "type": "StrProperty"}
+
+
+def bytes_property(value: bytes) -> dict[str, Any]:
+    """Builds a ByteProperty array holding undecoded bytes."""
+    return {"array_type": "ByteProperty", "id": None, "value": {"values": list(value)}, "type": "ArrayProperty"}
+
+
+def map_property(key_type: str, value_type: str, entries: list[tuple[Any, Any]], key_struct_type: str | None = None, value_struct_type: str | None = None) -> dict[str, Any]:
+    """Builds a MapProperty of ``(key, value)`` entries."""
+    return {
+        "key_type": key_type,
+        "value_type": value_type,
+        "key_struct_type": key_struct_type,
+        "value_struct_type": value_struct_type,
+        "id": None,
+        "value": [{"key": key, "value": value} for key, value in entries],
+        "type": "MapProperty",
+    }
+
+
+def typed_property(type_name: str, value: Any) -> dict[str, Any]:
+    """Builds a property of ``type_name`` holding ``value`` without a GUID."""
+    return {"id": None, "value": value, "type": type_name}
+
+
+def array_property(array_type: str, value: dict[str, Any]) -> dict[str, Any]:
+    """Builds an ArrayProperty of ``array_type``."""
+    return {"array_type": array_type, "id": None, "value": value, "type": "ArrayProperty"}
+
+
+def struct_array_property(type_name: str, values: list[Any]) -> dict[str, Any]:
+    """Builds an ArrayProperty of ``type_name`` structs."""
+    return array_property("StructProperty", {"prop_name": "Items", "prop_type": "StructProperty", "values": values, "type_name": type_name, "id": ZERO})
+
+
+def every_type_properties() -> dict[str, Any]:
+    """Builds properties of every type the readers dispatch on, structs, arrays and map entries included."""
+    vector = {"x": 1.5, "y": -2.0, "z": 0.25}
+    return {
+        "Int": int_property(-7),
+        "Int64": typed_property("Int64Property", 1 << 40),
+        "FixedPoint64": typed_property("FixedPoint64Property", 12345),
+        "Float": typed_property("FloatProperty", 0.5),
+        "Str": str_property("Übernachtung ✓"),
+        "Name": typed_property("NameProperty", "PalName"),
+        "Enum": typed_property("EnumProperty", {"type": "EPalType", "value": "EPalType::Fire"}),
+        "Bool": {"value": True, "id": None, "type": "BoolProperty"},
+        "Vector": struct_property("Vector", vector),
+        "Quat": struct_property("Quat", {"x": 0.0, "y": 0.5, "z": -0.5, "w": 1.0}),
+        "DateTime": struct_property("DateTime", 638400000000000000),
+        "LinearColor": struct_property("LinearColor", {"r": 1.0, "g": 0.5, "b": 0.25, "a": 0.0}),
+        "Guid": guid_property(uuid_of(1)),
+        "Stats": struct_property("PalStats", {"Level": int_property(3), "Inner": struct_property("PalInner", {"Name": str_property("x")})}),
+        "Enums": array_property("EnumProperty", {"values": ["EPalType::Fire", "EPalType::Water"]}),
+        "Names": array_property("NameProperty", {"values": ["A", "B", ""]}),
+        "Bytes": bytes_property(bytes(range(10))),
+        "Vectors": struct_array_property("Vector", [vector, vector]),
+        "Things": struct_array_property("PalThing", [{"Level": int_property(1)}, {"Level": int_property(2)}]),
+        "ByGuid": map_property("StructProperty", "StructProperty", [(uuid_of(4), {"Level": int_property(4)})], "Guid", "StructProperty"),
+        "ByName": map_property("NameProperty", "IntProperty", [("A", 1), ("B", 2)]),
+        "ByEnum": map_property("EnumProperty", "BoolProperty", [("EPalType::Fire", True), ("EPalType::Water", False)]),
+    }
+
+
+def custom_property(path: str, value: dict[str, Any]) -> dict[str, Any]:
+    """Builds a ByteProperty array decoded by the custom property registered at ``path``."""
+    return {"array_type": "ByteProperty", "id": None, "value": value, "type": "ArrayProperty", "custom_type": path}
+
+
+def write_properties(properties: dict[str, Any], custom_properties: dict[str, Any] | None = None) -> bytes:
+    """Encodes ``properties`` followed by the terminating None property."""
+    writer = FArchiveWriter(custom_properties or {})
+    writer.properties(properties)
+    return writer.bytes()
+
+
+def read_properties(data: Any, type_hints: dict[str, str] | None = None, custom_properties: dict[str, Any] | None = None, **kwargs: Any) -> dict[str, Any]:
+    """Decodes the properties encoded by ``write_properties``."""
+    reader = FArchiveReader(data, type_hints or {}, custom_properties or {}, **kwargs)
+    return reader.properties_until_end()
+
+
+def gvas_header(custom_versions: int) -> bytes:
+    """Encodes a GVAS header with ``custom_versions`` custom versions, 20 bytes each."""
+    header = GvasHeader.load(
+        {
+            "magic": 0x53415647,
+            "save_game_version": 3,
+            "package_file_version_ue4": 522,
+            "package_file_version_ue5": 1008,
+            "engine_version_major": 5,
+            "engine_version_minor": 1,
+            "engine_version_patch": 1,
+            "engine_version_changelist": 0,
+            "engine_version_branch": "++UE5+Release-5.1",
+            "custom_version_format": 3,
+            "custom_versions": [(uuid_of(i), i) for i in range(custom_versions)],
+            "save_game_class_name": "/Script/Pal.PalWorldSaveGame",
+        }
+    )
+    writer = FArchiveWriter()
+    header.write(writer)
+    return writer.bytes()
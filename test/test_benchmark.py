@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+"""Unit tests keeping the reference classes of the properties benchmark in line with the dispatch tables."""
+
+import contextlib
+import io
+import unittest
+from typing import Any
+
+from save_fixtures import every_type_properties, gvas_header, struct_property, write_properties
+
+from palworld_save_tools.archive import FArchiveReader, FArchiveWriter
+from palworld_save_tools.commands.benchmark import ReferencePropertyReader, ReferencePropertyWriter, read_gvas, write_gvas
+
+NESTED_PATH: str = ".worldSaveData.Nested"
+
+
+def decode_nested(reader: FArchiveReader, type_name: str, size: int, path: str) -> dict[str, Any]:
+    """Custom decoder of a byte array holding properties, read with a copy of ``reader``."""
+    value = reader.property(type_name, size, path, nested_caller_path=path)
+    with reader.internal_copy(value["value"]["values"], debug=False) as nested:
+        value["value"] = nested.properties_until_end()
+    return value
+
+
+def encode_nested(writer: FArchiveWriter, property_type: str, properties: dict[str, Any]) -> int:
+    """Custom encoder of ``decode_nested``, writing the properties with a copy of ``writer``."""
+    nested = writer.copy()
+    nested.properties(properties["value"])
+    return writer.property_inner(property_type, {"array_type": "ByteProperty", "id": None, "value": {"values": nested.bytes()}})
+
+
+CUSTOM_PROPERTIES: dict[str, Any] = {NESTED_PATH: (decode_nested, encode_nested)}
+
+
+def fixture_save() -> bytes:
+    """A GVAS file holding every type, also nested inside a custom property."""
+    world = every_type_properties()
+    world["Nested"] = {"array_type": "ByteProperty", "id": None, "value": every_type_properties(), "type": "ArrayProperty", "custom_type": NESTED_PATH}
+    return gvas_header(1) + write_properties({"worldSaveData": struct_property("PalWorldSaveData", world)}, CUSTOM_PROPERTIES) + b"\x00\x00\x00\x00"
+
+
+class ReferenceDispatchTest(unittest.TestCase):
+    """Tests that the if/elif reference classes read and write what the dispatch tables do."""
+
+    def test_reads_and_writes_like_the_dispatch_tables(self) -> None:
+        """Both readers decode the fixture to equal trees, and both writers encode it back to its bytes."""
+        data = fixture_save()
+        for custom_properties in ({}, CUSTOM_PROPERTIES):
+            with self.subTest(custom=bool(custom_properties)), contextlib.redirect_stdout(io.StringIO()):
+                reference = read_gvas(ReferencePropertyReader, data, custom_properties)
+                tables = read_gvas(FArchiveReader, data, custom_properties)
+                self.assertEqual(reference.properties, tables.properties)
+                self.assertEqual(reference.trailer, tables.trailer)
+                self.assertEqual(write_gvas(ReferencePropertyWriter, tables, custom_properties), data)
+                self.assertEqual(write_gvas(FArchiveWriter, reference, custom_properties), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
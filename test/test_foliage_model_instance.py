@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the columnar decoding of foliage instances in foliage_model_instance.py."""
+
+import math
+import unittest
+from typing import Any
+
+from save_fixtures import bytes_property, int_property, map_property, read_properties, struct_property, uuid_of, write_properties
+
+from palworld_save_tools.archive import FArchiveReader
+from palworld_save_tools.paltypes import PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS
+from palworld_save_tools.rawdata import foliage_model_instance
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+# Locations around every byte boundary of the packed components, and some only doubles can hold
+EDGES: list[float] = [0.0, 1.0, -1.0] + [float(sign * ((1 << bits) + offset)) for bits in (7, 8, 15, 16, 31, 32, 52, 53, 61) for sign in (1, -1) for offset in (-1, 0)]
+UNPACKED: list[float] = [float(1 << 62), -1e300, math.nan, math.inf]
+
+
+def instance(row: int, x: float, y: float, z: float) -> dict[str, Any]:
+    """An instance as decode_bytes returns it, varying the rotator, scale and hp with ``row``."""
+    return {
+        "model_instance_id": uuid_of(row + 1),
+        "world_transform": {
+            "rotator": {"pitch": 0.0 if row % 2 else 90.0, "yaw": (row * 37.5) % 360.0, "roll": 0.0 if row % 3 else 359.99},
+            "location": {"x": x, "y": y, "z": z},
+            "scale_x": [1.0, 0.5, math.nan, -2.25][row % 4],
+        },
+        "hp": [100, -1, 0, 2**31 - 1][row % 4],
+    }
+
+
+def sample_blobs() -> list[bytes]:
+    """RawData of instances written by the scalar encoder, covering both packed_vector layouts."""
+    locations = [(x, 3.0, -7.0) for x in EDGES] + [(1.0, y, y) for y in EDGES] + [(x, 0.0, 1.0) for x in UNPACKED]
+    locations.append((float(1 << 53), float(1 << 53), -float(1 << 53)))
+    return [foliage_model_instance.encode_bytes(instance(row, *location)) for row, location in enumerate(locations)]
+
+
+def same(a: Any, b: Any) -> bool:
+    """Equality that also holds between two NaNs."""
+    return (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b)) or a == b
+
+
+def row_mismatches(columns: dict[str, Any], row: int, data: dict[str, Any]) -> list[str]:
+    """Names of the columns whose value at ``row`` differs from the scalar decode ``data``."""
+    transform = data["world_transform"]
+    expected = {
+        "model_instance_id": data["model_instance_id"].raw_bytes,
+        **transform["rotator"],
+        **{name: float(value) for name, value in transform["location"].items()},
+        "scale_x": transform["scale_x"],
+        "hp": data["hp"],
+    }
+    found = {name: bytes(column[row]) if name == "model_instance_id" else column[row].item() for name, column in columns.items()}
+    return [name for name, value in expected.items() if not same(found[name], value)]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ColumnsTest(unittest.TestCase):
+    """Tests that the columnar codec agrees with decode_bytes and encode_bytes."""
+
+    def test_decode_matches_scalar(self) -> None:
+        """Every row of decode_columns equals decode_bytes of its blob, NaN included."""
+        blobs = sample_blobs()
+        reader = FArchiveReader(b"")
+        columns = foliage_model_instance.decode_columns(reader, blobs)
+        for row, blob in enumerate(blobs):
+            self.assertEqual(row_mismatches(columns, row, foliage_model_instance.decode_bytes(reader, blob)), [], row)
+
+    def test_encode_matches_scalar(self) -> None:
+        """encode_columns gives back the bytes encode_bytes wrote for every row."""
+        blobs = sample_blobs()
+        columns = foliage_model_instance.decode_columns(FArchiveReader(b""), blobs)
+        self.assertEqual(foliage_model_instance.encode_columns(columns), blobs)
+
+    def test_empty(self) -> None:
+        """No instances decode to empty columns and encode to no blobs."""
+        columns = foliage_model_instance.decode_columns(FArchiveReader(b""), [])
+        self.assertEqual(len(columns["hp"]), 0)
+        self.assertEqual(foliage_model_instance.encode_columns(columns), [])
+
+    def test_bit_length(self) -> None:
+        """bit_length agrees with int.bit_length around every power of two."""
+        values = [0] + [value for bits in range(63) for value in ((1 << bits) - 1, 1 << bits, (1 << bits) + 1)] + [2**63 - 1]
+        lengths = foliage_model_instance.bit_length(np.array(values, np.int64))
+        self.assertEqual(lengths.tolist(), [value.bit_length() for value in values])
+
+    def test_gather(self) -> None:
+        """gather reads little endian values of 0 to 8 bytes, up to the end of the buffer."""
+        raw = bytes(range(1, 20)) + b"\xff" * 8
+        buf = np.frombuffer(raw, np.uint8)
+        positions = np.array([0, 3, 5, len(raw) - 8, len(raw) - 1, 7, 0, 2, 9], np.int64)
+        sizes = np.array([0, 1, 2, 8, 1, 4, 8, 3, 5], np.int64)
+        expected = [int.from_bytes(raw[p : p + s], "little") for p, s in zip(positions, sizes)]
+        self.assertEqual(foliage_model_instance.gather(buf, positions, sizes).tolist(), expected)
+        self.assertEqual(foliage_model_instance.gather(buf, positions[:3], 2).tolist(), [int.from_bytes(raw[p : p + 2], "little") for p in positions[:3]])
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class WithColumnarTest(unittest.TestCase):
+    """Tests for reading and writing a foliage grid with ``with_columnar``."""
+
+    def test_round_trip(self) -> None:
+        """Columnar reads hold the scalar rows in map order and write back the same bytes."""
+        blobs = sample_blobs()
+        entries = [({"Index": int_property(i)}, {"RawData": bytes_property(blob)}) for i, blob in enumerate(blobs)]
+        model = {"InstanceDataMap": map_property("StructProperty", "StructProperty", entries, "StructProperty", "StructProperty")}
+        grid = map_property("StructProperty", "StructProperty", [({"Cell": int_property(1)}, {"ModelMap": map_property("NameProperty", "StructProperty", [("Tree", model)], None, "StructProperty")})], "StructProperty", "StructProperty")
+        data = write_properties({"worldSaveData": struct_property("PalWorldSaveData", {"FoliageGridSaveDataMap": grid})})
+
+        columnar = foliage_model_instance.with_columnar(PALWORLD_CUSTOM_PROPERTIES)
+        properties = read_properties(data, PALWORLD_TYPE_HINTS, columnar)
+        instance_map = properties["worldSaveData"]["value"]["FoliageGridSaveDataMap"]["value"][0]["value"]["ModelMap"]["value"][0]["value"]["InstanceDataMap"]
+        scalar = read_properties(data, PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES)
+        scalar_map = scalar["worldSaveData"]["value"]["FoliageGridSaveDataMap"]["value"][0]["value"]["ModelMap"]["value"][0]["value"]["InstanceDataMap"]
+        for row, entry in enumerate(scalar_map["value"]):
+            self.assertEqual(row_mismatches(instance_map["instances"], row, entry["value"]["RawData"]["value"]), [], row)
+        self.assertEqual(write_properties(properties, foliage_model_instance.with_columnar_encoder(PALWORLD_CUSTOM_PROPERTIES)), data)
+        self.assertEqual(write_properties(scalar, PALWORLD_CUSTOM_PROPERTIES), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
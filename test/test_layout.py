@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the readers and writers compile_layout generates, against reading and writing field by field."""
+
+import importlib
+import math
+import unittest
+from typing import Any, Callable
+
+from save_fixtures import uuid_of
+
+from palworld_save_tools.archive import FArchiveReader, FArchiveWriter
+from palworld_save_tools.rawdata.layout import FIXED_FIELD_TYPES, FLOAT_FIELD_TYPES, Layout, compile_layout, read_fields, write_fields
+
+# The rawdata modules whose RawData is read and written by a compiled layout
+LAYOUT_USERS: list[str] = ["map_model", "worker_director", "base_camp", "build_process", "foliage_model", "character_container", "work_collection", "item_container"]
+
+# Float values the packed runs must keep bit for bit, NaN, infinities and negative zero included
+FLOATS: list[float] = [1.5, math.nan, math.inf, -math.inf, -0.0, 2.0**-149]
+STRINGS: list[str] = ["PalBaseCamp", "", "Übernachtung ✓"]
+
+
+def sample(field_type: Any, n: int, floats: list[Any]) -> Any:
+    """A value of ``field_type`` that differs with ``n``, with float fields taken in turn from ``floats``."""
+    if isinstance(field_type, list):
+        return {key: sample(nested_type, n + i, floats) for i, (key, nested_type) in enumerate(field_type)}
+    if isinstance(field_type, tuple):
+        return [sample(field_type[1], n + i, floats) for i in range(3)]
+    if field_type in ("float", "double"):
+        return floats[n % len(floats)]
+    if field_type in ("vector", "quat", "ftransform"):
+        shape = {"vector": ("x", "y", "z"), "quat": ("x", "y", "z", "w")}
+        if field_type == "ftransform":
+            return {"rotation": sample("quat", n, floats), "translation": sample("vector", n + 4, floats), "scale3d": sample("vector", n + 7, floats)}
+        return {key: floats[(n + i) % len(floats)] for i, key in enumerate(shape[field_type])}
+    return {
+        "byte": lambda: 255 - n % 256,
+        "i16": lambda: -(n + 1),
+        "u16": lambda: 65535 - n,
+        "i32": lambda: -(n + 1) * 100000,
+        "u32": lambda: 2**32 - 1 - n,
+        "i64": lambda: -(2**40) - n,
+        "u64": lambda: 2**63 + n,
+        "bool32": lambda: n % 2 == 0,
+        "guid": lambda: uuid_of(n + 1),
+        "fstring": lambda: STRINGS[n % len(STRINGS)],
+    }[field_type]()
+
+
+def layout_of(name: str) -> tuple[Any, Layout, Callable, Callable]:
+    """The module, layout and compiled reader and writer of the layout user ``name``."""
+    module = importlib.import_module(f"palworld_save_tools.rawdata.{name}")
+    return module, getattr(module, f"{name.upper()}_LAYOUT"), getattr(module, f"{name}_reader"), getattr(module, f"{name}_writer")
+
+
+def written(write: Callable[[FArchiveWriter], Any]) -> bytes:
+    """The bytes ``write`` writes to a new FArchiveWriter."""
+    writer = FArchiveWriter()
+    write(writer)
+    return writer.bytes()
+
+
+def read_all(read: Callable[[FArchiveReader], Any], data: bytes, allow_nan: bool = True) -> Any:
+    """What ``read`` reads from ``data``, which it has to read to the end."""
+    reader = FArchiveReader(data, allow_nan=allow_nan)
+    value = read(reader)
+    if not reader.eof():
+        raise Exception(f"{reader.size - reader.tell()} bytes left")
+    return value
+
+
+class CompiledLayoutTest(unittest.TestCase):
+    """Tests that each compiled layout reads and writes the same values and bytes as read_fields and write_fields."""
+
+    def test_matches_field_by_field(self) -> None:
+        """Generated readers and writers agree with the field by field path for every layout user."""
+        for name in LAYOUT_USERS:
+            module, layout, read, write = layout_of(name)
+            for offset in range(len(FLOATS)):
+                with self.subTest(name=name, offset=offset):
+                    value = sample(layout, offset, FLOATS)
+                    data = written(lambda writer: write(writer, value))
+                    self.assertEqual(data, written(lambda writer: write_fields(writer, value, layout)))
+                    # repr tells NaNs and the sign of zero apart, where == does not
+                    self.assertEqual(repr(read_all(read, data)), repr(value))
+                    self.assertEqual(repr(read_all(lambda reader: read_fields(reader, layout), data)), repr(value))
+                    self.assertEqual(repr(module.decode_bytes(FArchiveReader(b""), data)), repr(value))
+                    self.assertEqual(module.encode_bytes(value), data)
+
+    def test_none_floats_are_written_as_nan(self) -> None:
+        """Float fields holding None fall back to the field by field writer and are written as NaN."""
+        for name in LAYOUT_USERS:
+            _, layout, read, write = layout_of(name)
+            with self.subTest(name=name):
+                value = sample(layout, 0, [None])
+                data = written(lambda writer: write(writer, value))
+                self.assertEqual(data, written(lambda writer: write_fields(writer, value, layout)))
+                self.assertEqual(repr(read_all(read, data)), repr(sample(layout, 0, [math.nan])))
+
+    def test_without_allow_nan(self) -> None:
+        """With allow_nan off, layouts holding floats are read like read_fields does."""
+        for name in LAYOUT_USERS:
+            _, layout, read, write = layout_of(name)
+            with self.subTest(name=name):
+                value = sample(layout, 0, FLOATS)
+                data = written(lambda writer: write(writer, value))
+                expected = read_all(lambda reader: read_fields(reader, layout), data, allow_nan=False)
+                self.assertEqual(repr(read_all(read, data, allow_nan=False)), repr(expected))
+
+    def test_every_fixed_field_type(self) -> None:
+        """A layout using every fixed size field type, nested and in an array, matches the field by field path."""
+        layout = [(field_type, field_type) for field_type in FIXED_FIELD_TYPES] + [
+            ("name", "fstring"),
+            ("nested", [("a", "guid"), ("b", "fstring"), ("c", [("x", "double"), ("y", "i16")])]),
+            ("ids", ("tarray", "guid")),
+            ("last", "float"),
+        ]
+        self.assertLessEqual(FLOAT_FIELD_TYPES, FIXED_FIELD_TYPES.keys())
+        read, write = compile_layout("every_fixed_field_type", layout)
+        for offset in range(len(FLOATS)):
+            with self.subTest(offset=offset):
+                value = sample(layout, offset, FLOATS)
+                data = written(lambda writer: write(writer, value))
+                self.assertEqual(data, written(lambda writer: write_fields(writer, value, layout)))
+                self.assertEqual(repr(read_all(read, data)), repr(value))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the concrete model registry of map_concrete_model.py."""
+
+import contextlib
+import io
+import unittest
+from typing import Any
+from unittest import mock
+
+from save_fixtures import int_property, str_property, uuid_of
+
+from palworld_save_tools.archive import FArchiveReader, FArchiveWriter
+from palworld_save_tools.rawdata import map_concrete_model
+from palworld_save_tools.rawdata.map_concrete_model import CONCRETE_MODEL_TYPES, MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS, register_concrete_model
+
+ITEM_ID: dict[str, Any] = {"static_id": "Wood", "dynamic_id": {"created_world_id": uuid_of(20), "local_id_in_created_world": uuid_of(21)}}
+
+# Fields of each concrete model class with a reader of its own, as that reader returns them
+SAMPLE_FIELDS: dict[str, dict[str, Any]] = {
+    "PalMapObjectDeathDroppedCharacterModel": {"stored_parameter_id": uuid_of(3), "owner_player_uid": uuid_of(4)},
+    "PalMapObjectConvertItemModel": {"current_recipe_id": "Bread", "remain_product_num": 3, "requested_product_num": -1, "work_speed_additional_rate": 1.5},
+    "PalMapObjectPickupItemOnLevelModel": {"auto_picked_up": True},
+    "PalMapObjectDropItemModel": {"auto_picked_up": False, "item_id": ITEM_ID},
+    "PalMapObjectItemDropOnDamagModel": {"drop_item_infos": [{"item_id": ITEM_ID, "num": 5}, {"item_id": ITEM_ID, "num": 0}]},
+    "PalMapObjectDeathPenaltyStorageModel": {"owner_player_uid": uuid_of(5)},
+    "PalMapObjectDefenseBulletLauncherModel": {"remaining_bullets": 10, "magazine_size": 30, "bullet_item_name": "Arrow"},
+    "PalMapObjectGenerateEnergyModel": {"stored_energy_amount": 250.25},
+    "PalMapObjectFarmBlockV2Model": {"crop_data_id": "Tomato", "current_state": 2, "crop_progress_rate_value": 0.5, "water_stack_rate_value": 0.75, "state_machine": {"growup_required_time": 60.0, "growup_progress_time": 12.5}},
+    "PalMapObjectFastTravelPointModel": {"location_instance_id": uuid_of(6)},
+    "PalMapObjectShippingItemModel": {"shipping_hours": [6, 12, 18]},
+    "PalMapObjectProductItemModel": {"work_speed_additional_rate": 2.0, "product_item_id": "Stone"},
+    "PalMapObjectRecoverOtomoModel": {"recover_amount_by_sec": 4.0},
+    "PalMapObjectHatchingEggModel": {"hatched_character_save_parameter": {"Level": int_property(7), "NickName": str_property("Ünïcode")}, "unknown_bytes": 1, "hatched_character_guid": uuid_of(7)},
+    "PalMapObjectTreasureBoxModel": {"treasure_grade_type": 3},
+    "PalMapObjectBreedFarmModel": {"spawned_egg_instance_ids": [uuid_of(8), uuid_of(9)]},
+    "PalMapObjectSignboardModel": {"signboard_text": "Base ✓"},
+    "PalMapObjectTorchModel": {"extinction_date_time": 638400000000000000},
+    "PalMapObjectPalEggModel": {"unknown_bytes": 0xDEADBEEF},
+    "PalMapObjectBaseCampPoint": {"base_camp_id": uuid_of(10)},
+}
+
+
+def model(concrete_model: str, fields: dict[str, Any]) -> dict[str, Any]:
+    """A decoded concrete model of class ``concrete_model`` holding ``fields``."""
+    return {"instance_id": uuid_of(1), "model_instance_id": uuid_of(2), "concrete_model_type": concrete_model, **fields}
+
+
+def decode(blob: bytes, object_id: str) -> dict[str, Any]:
+    """Decodes ``blob`` as the concrete model of a map object with id ``object_id``."""
+    return map_concrete_model.decode_bytes(FArchiveReader(b""), blob, object_id)
+
+
+class ConcreteModelTypesTest(unittest.TestCase):
+    """Tests that every registered concrete model class decodes and encodes its own fields."""
+
+    def test_round_trip_every_class(self) -> None:
+        """Each class decodes what it encodes, and encodes what it decodes to the same bytes."""
+        for concrete_model in CONCRETE_MODEL_TYPES:
+            with self.subTest(concrete_model=concrete_model):
+                fields = {} if concrete_model in map_concrete_model.NO_OP_TYPES else SAMPLE_FIELDS[concrete_model]
+                value = model(concrete_model, fields)
+                blob = map_concrete_model.encode_bytes(value)
+                self.assertEqual(len(blob) == 32, concrete_model in map_concrete_model.NO_OP_TYPES)
+                with mock.patch.dict(MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS, {"concrete_model_test": concrete_model}):
+                    decoded = decode(blob, "Concrete_Model_Test")
+                self.assertEqual(decoded, value)
+                self.assertEqual(map_concrete_model.encode_bytes(decoded), blob)
+
+    def test_samples_are_registered(self) -> None:
+        """Every sample belongs to a registered class, so none is left untested by a rename."""
+        self.assertLessEqual(SAMPLE_FIELDS.keys(), CONCRETE_MODEL_TYPES.keys())
+
+    def test_object_ids_resolve_to_registered_classes(self) -> None:
+        """Map object ids lead to a registered class, apart from the known unknown ones."""
+        unknown = {name for name in MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS.values() if name not in CONCRETE_MODEL_TYPES}
+        self.assertEqual(unknown, {"DEFAULT_UNKNOWN_PalMapObjectConcreteModelBase"})
+
+    def test_farm_block_without_state_machine(self) -> None:
+        """The optional state machine of a farm block is left out when the bytes end before it."""
+        fields = dict(SAMPLE_FIELDS["PalMapObjectFarmBlockV2Model"])
+        del fields["state_machine"]
+        value = model("PalMapObjectFarmBlockV2Model", fields)
+        blob = map_concrete_model.encode_bytes(value)
+        self.assertEqual(decode(blob, "farmblockv2_tomato"), value)
+
+    def test_unknown_object_is_kept_as_bytes(self) -> None:
+        """Objects without a known class are kept as their original bytes."""
+        blob = map_concrete_model.encode_bytes(model("PalBuildObject", {}))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(bytes(decode(blob, "not_a_map_object")["values"]), blob)
+            self.assertEqual(bytes(decode(blob, "defenseminigun")["values"]), blob)
+
+
+def charger_reader(reader: FArchiveReader) -> dict[str, Any]:
+    """Reader of a concrete model class the module does not know about."""
+    return {"charge": reader.float(), "owner_name": reader.fstring()}
+
+
+def charger_writer(writer: FArchiveWriter, p: dict[str, Any]) -> None:
+    """Writer of ``charger_reader``."""
+    writer.float(p["charge"])
+    writer.fstring(p["owner_name"])
+
+
+class RegisterConcreteModelTest(unittest.TestCase):
+    """Tests for ``register_concrete_model``."""
+
+    def setUp(self) -> None:
+        patcher_types = mock.patch.dict(CONCRETE_MODEL_TYPES)
+        patcher_names = mock.patch.dict(MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS)
+        patcher_types.start()
+        patcher_names.start()
+        self.addCleanup(patcher_types.stop)
+        self.addCleanup(patcher_names.stop)
+
+    def test_external_class_with_object_ids(self) -> None:
+        """A registered class decodes and encodes its fields for every object id given, in any case."""
+        register_concrete_model("ModChargerModel", charger_reader, charger_writer, ["Mod_Charger", "mod_charger_2"])
+        value = model("ModChargerModel", {"charge": 0.25, "owner_name": "Player"})
+        blob = map_concrete_model.encode_bytes(value)
+        for object_id in ("mod_charger", "MOD_CHARGER_2"):
+            with self.subTest(object_id=object_id):
+                self.assertEqual(decode(blob, object_id), value)
+        self.assertEqual(MAP_OBJECT_NAME_TO_CONCRETE_MODEL_CLASS["mod_charger"], "ModChargerModel")
+
+    def test_extra_object_ids_for_an_existing_class(self) -> None:
+        """New object ids can be mapped onto a class that is already registered."""
+        register_concrete_model("PalMapObjectSignboardModel", *CONCRETE_MODEL_TYPES["PalMapObjectSignboardModel"], object_ids=["ModSign"])
+        value = model("PalMapObjectSignboardModel", SAMPLE_FIELDS["PalMapObjectSignboardModel"])
+        self.assertEqual(decode(map_concrete_model.encode_bytes(value), "modsign"), value)
+
+    def test_replaces_an_existing_reader(self) -> None:
+        """Registering a class again replaces its reader and writer."""
+        register_concrete_model("PalMapObjectTorchModel", charger_reader, charger_writer)
+        value = model("PalMapObjectTorchModel", {"charge": 1.0, "owner_name": ""})
+        self.assertEqual(decode(map_concrete_model.encode_bytes(value), "torch"), value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the SAV compression and decompression of palsav.py."""
+
+import argparse
+import contextlib
+import io
+import json
+import mmap
+import os
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+from save_fixtures import bytes_property, gvas_header, struct_property, write_properties
+
+from fix_host_save import json_to_sav
+
+from palworld_save_tools import palsav
+from palworld_save_tools.archive import FArchiveReader
+from palworld_save_tools.commands.convert import compression_arg, convert_json_to_sav
+from palworld_save_tools.gvas import GvasFile, GvasHeader
+from palworld_save_tools.json_tools import CustomEncoder
+from palworld_save_tools.palsav import COMPRESSION_PROFILES, adler32_combine, compress_gvas_to_sav, decompress_sav_buffer, decompress_sav_file, decompress_sav_stream, decompress_sav_to_gvas, parallel_zlib_compress, peek_sav
+
+PAYLOAD: bytes = bytes(range(256)) * 1000
+
+
+class DecompressTest(unittest.TestCase):
+    """Tests for the decompression of whole saves."""
+
+    def test_returns_read_only_view(self) -> None:
+        """The GVAS payload is a read-only view of one buffer, for both save types."""
+        for save_type in (0x31, 0x32):
+            sav = compress_gvas_to_sav(PAYLOAD, save_type, workers=1)
+            for gvas, found_type in (decompress_sav_buffer(sav), decompress_sav_buffer(bytearray(sav)), decompress_sav_stream(io.BytesIO(sav))):
+                self.assertIsInstance(gvas, memoryview)
+                self.assertTrue(gvas.readonly)
+                self.assertEqual(found_type, save_type)
+                self.assertEqual(gvas, PAYLOAD)
+
+    def test_to_gvas_returns_bytes(self) -> None:
+        """decompress_sav_to_gvas copies the payload to bytes, which callers can decode."""
+        sav = compress_gvas_to_sav(b"GVAS payload", 0x32, workers=1)
+        for data in (sav, bytearray(sav), memoryview(sav)):
+            gvas, save_type = decompress_sav_to_gvas(data)
+            self.assertIs(type(gvas), bytes)
+            self.assertEqual((gvas.decode(), save_type), ("GVAS payload", 0x32))
+
+    def test_reader_reads_view_in_place(self) -> None:
+        """FArchiveReader reads the decompressed buffer without copying it."""
+        gvas, _ = decompress_sav_buffer(compress_gvas_to_sav(PAYLOAD, 0x31, workers=1))
+        reader = FArchiveReader(gvas)
+        self.assertIs(reader.view.obj, gvas.obj)
+        self.assertIs(reader.byte_list(16).obj, gvas.obj)
+
+    def test_mapped_file_is_closed(self) -> None:
+        """Mapped saves are unmapped after decompressing, including when it fails."""
+        sav = compress_gvas_to_sav(PAYLOAD, 0x32, workers=1)
+        mapped: list[mmap.mmap] = []
+
+        def record_mmap(*args, **kwargs) -> mmap.mmap:
+            mapped.append(real_mmap(*args, **kwargs))
+            return mapped[-1]
+
+        real_mmap = mmap.mmap
+        with tempfile.TemporaryDirectory() as directory, mock.patch("mmap.mmap", record_mmap):
+            complete = os.path.join(directory, "complete.sav")
+            truncated = os.path.join(directory, "truncated.sav")
+            with open(complete, "wb") as f:
+                f.write(sav)
+            with open(truncated, "wb") as f:
+                f.write(sav[: len(sav) // 2])
+            gvas, _ = decompress_sav_file(complete, use_mmap=True)
+            self.assertEqual(gvas, PAYLOAD)
+            with self.assertRaisesRegex(Exception, "truncated"):
+                decompress_sav_file(truncated, use_mmap=True)
+        self.assertEqual(len(mapped), 2)
+        self.assertTrue(all(m.closed for m in mapped))
+
+
+class ParallelCompressTest(unittest.TestCase):
+    """Tests for ``parallel_zlib_compress`` and ``adler32_combine``."""
+
+    def test_output_is_one_zlib_stream(self) -> None:
+        """The blocks compressed on threads inflate back to the input with zlib."""
+        block_size = 4096
+        for length in (0, 1, block_size - 1, block_size, block_size + 1, 3 * block_size, 5 * block_size + 17):
+            data = (PAYLOAD * 21)[:length]
+            for workers in (1, 3):
+                for level, strategy in ((6, zlib.Z_DEFAULT_STRATEGY), (1, zlib.Z_FILTERED), (0, zlib.Z_DEFAULT_STRATEGY)):
+                    with self.subTest(length=length, workers=workers, level=level):
+                        compressed = parallel_zlib_compress(data, level, workers=workers, block_size=block_size, strategy=strategy)
+                        self.assertEqual(zlib.decompress(compressed), data)
+
+    def test_single_block_matches_zlib(self) -> None:
+        """Input that fits in one block is compressed exactly as zlib.compress does."""
+        self.assertEqual(parallel_zlib_compress(PAYLOAD, 6, workers=4), zlib.compress(PAYLOAD, 6))
+        self.assertEqual(parallel_zlib_compress(b"", 6, workers=4), zlib.compress(b"", 6))
+
+    def test_default_is_single_threaded(self) -> None:
+        """Without ``workers`` the output is the single stream of zlib.compress."""
+        data = PAYLOAD * 8
+        self.assertEqual(parallel_zlib_compress(data, 6, block_size=4096), zlib.compress(data, 6))
+
+    def test_adler32_combine_matches_zlib(self) -> None:
+        """Combining the checksums of two parts equals the checksum of the whole."""
+        data = PAYLOAD * 300
+        for split in (0, 1, 5551, 5552, 65520, 65521, 65522, len(data) // 2, len(data) - 1, len(data)):
+            with self.subTest(split=split):
+                first, second = data[:split], data[split:]
+                self.assertEqual(adler32_combine(zlib.adler32(first), zlib.adler32(second), len(second)), zlib.adler32(data))
+        self.assertEqual(adler32_combine(zlib.adler32(b"\xff" * 70000), zlib.adler32(b"\xff" * 90000), 90000), zlib.adler32(b"\xff" * 160000))
+
+
+class CompressionProfileTest(unittest.TestCase):
+    """Tests for the compression profiles and levels of ``compress_gvas_to_sav``."""
+
+    def test_profiles_and_levels_round_trip(self) -> None:
+        """Every profile name and zlib level, given as a number or a string, decompresses back to the payload."""
+        data = PAYLOAD * 5
+        for compression in [*COMPRESSION_PROFILES, *range(10), *map(str, range(10))]:
+            for save_type, workers in ((0x31, 1), (0x32, 2)):
+                with self.subTest(compression=compression, save_type=save_type):
+                    sav = compress_gvas_to_sav(data, save_type, workers, compression)
+                    self.assertEqual(decompress_sav_to_gvas(sav), (data, save_type))
+
+    def test_unknown_profiles_are_rejected(self) -> None:
+        """Levels out of range and unknown names are refused, also as command line arguments."""
+        for compression in ("10", "-1", "bogus", ""):
+            with self.subTest(compression=compression):
+                with self.assertRaisesRegex(Exception, "unknown compression profile"):
+                    compress_gvas_to_sav(PAYLOAD, 0x32, 1, compression)
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    compression_arg(compression)
+        self.assertEqual(compression_arg("smallest"), "smallest")
+        self.assertEqual(compression_arg("0"), "0")
+
+
+def multi_block_gvas() -> bytes:
+    """A world save whose GVAS payload spans several compression blocks."""
+    blob = bytes((i * 7 + i // 251) % 256 for i in range(palsav.COMPRESS_BLOCK_SIZE * 2 + 12345))
+    properties = {"worldSaveData": struct_property("PalWorldSaveData", {"Blob": bytes_property(blob)})}
+    return gvas_header(2) + write_properties(properties) + b"\x00\x00\x00\x00"
+
+
+class WriteSavWorkersTest(unittest.TestCase):
+    """Tests that the JSON to SAV writers compress on several threads and still write the original payload."""
+
+    def test_json_to_sav(self) -> None:
+        """json_to_sav compresses on the given threads, and on every core by default."""
+        gvas = multi_block_gvas()
+        single = compress_gvas_to_sav(gvas, 0x32, workers=1)
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            for workers in (3, None):
+                with self.subTest(workers=workers):
+                    path = os.path.join(directory, "Level.sav")
+                    with mock.patch("os.cpu_count", return_value=4):
+                        json_to_sav(GvasFile.read(gvas).dump(), path, workers=workers)
+                    with open(path, "rb") as f:
+                        sav = f.read()
+                    self.assertNotEqual(sav, single)
+                    self.assertEqual(decompress_sav_to_gvas(sav), (gvas, 0x32))
+
+    def test_convert_json_to_sav(self) -> None:
+        """convert writes a SAV compressed in blocks that inflates to the original payload."""
+        gvas = multi_block_gvas()
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            json_path = os.path.join(directory, "Level.sav.json")
+            sav_path = os.path.join(directory, "Level.sav")
+            with open(json_path, "w", encoding="utf8") as f:
+                json.dump(GvasFile.read(gvas).dump(), f, cls=CustomEncoder)
+            convert_json_to_sav(json_path, sav_path, force=True, workers=3)
+            with open(sav_path, "rb") as f:
+                sav = f.read()
+        self.assertNotEqual(sav, compress_gvas_to_sav(gvas, 0x32, workers=1))
+        self.assertEqual(decompress_sav_to_gvas(sav), (gvas, 0x32))
+
+
+class PeekTest(unittest.TestCase):
+    """Tests for ``peek_sav``."""
+
+    def test_reads_header_spanning_many_chunks(self) -> None:
+        """A header spread over many chunks is read a logarithmic number of times."""
+        gvas = gvas_header(5000) + PAYLOAD
+        reads: list[int] = []
+        real_read = palsav.read_gvas_header
+
+        def count_reads(data: bytearray) -> GvasHeader | None:
+            reads.append(len(data))
+            return real_read(data)
+
+        for save_type in (0x31, 0x32):
+            reads.clear()
+            with mock.patch.object(palsav, "read_gvas_header", count_reads):
+                peek = peek_sav(io.BytesIO(compress_gvas_to_sav(gvas, save_type, workers=1)), chunk_size=64)
+            self.assertEqual(peek.save_type, save_type)
+            self.assertEqual(peek.uncompressed_len, len(gvas))
+            self.assertEqual(peek.header.save_game_class_name, "/Script/Pal.PalWorldSaveGame")
+            self.assertEqual(len(peek.header.custom_versions), 5000)
+            self.assertLess(len(reads), 20)
+
+    def test_truncated_header_raises(self) -> None:
+        """A payload ending inside the header is reported as truncated."""
+        gvas = gvas_header(100)[:-10]
+        with self.assertRaisesRegex(Exception, "incomplete GVAS header"):
+            peek_sav(io.BytesIO(compress_gvas_to_sav(gvas, 0x31, workers=1)), chunk_size=64)
+
+
+if __name__ == "__main__":
+    unittest.main()
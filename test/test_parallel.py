@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""Unit tests for decoding the sections of a save on a process pool."""
+
+import functools
+import unittest
+from typing import Any
+
+from save_fixtures import ZERO, bytes_property, gvas_header, int_property, map_property, struct_property, uuid_of, write_properties
+
+from palworld_save_tools.gvas import GvasFile
+from palworld_save_tools.paltypes import PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS
+from palworld_save_tools.parallel import PARALLEL_MIN_SECTION_SIZE
+from palworld_save_tools.rawdata import build_process, map_concrete_model, map_model, map_object
+
+MAP_OBJECT_PATH: str = ".worldSaveData.MapObjectSaveData"
+
+
+def sections_save() -> bytes:
+    """A GVAS file whose top-level struct has two sections large enough for the pool and a small one."""
+    blob = bytes(range(256)) * (PARALLEL_MIN_SECTION_SIZE // 256 + 1)
+    properties = {
+        "worldSaveData": struct_property(
+            "PalWorldSaveData",
+            {"First": bytes_property(blob), "Second": bytes_property(blob[::-1]), "Small": int_property(7)},
+        )
+    }
+    return gvas_header(2) + write_properties(properties) + b"\x00\x00\x00\x00"
+
+
+def map_object_entry(n: int) -> dict[str, Any]:
+    """The properties of the ``n``-th map object, a signboard or a torch, with its RawData blobs encoded."""
+    vector = {"x": float(n), "y": -1.5, "z": 0.25}
+    model = {
+        "instance_id": uuid_of(n),
+        "concrete_model_instance_id": uuid_of(n + 100000),
+        "base_camp_id_belong_to": ZERO,
+        "group_id_belong_to": uuid_of(7),
+        "hp": {"current": n, "max": 1000},
+        "initital_transform_cache": {"rotation": {"x": 0.0, "y": 0.0, "z": 0.5, "w": 1.0}, "translation": vector, "scale3d": vector},
+        "repair_work_id": ZERO,
+        "owner_spawner_level_object_instance_id": ZERO,
+        "owner_instance_id": ZERO,
+        "build_player_uid": uuid_of(8),
+        "interact_restrict_type": 1,
+        "stage_instance_id_belong_to": {"id": ZERO, "valid": False},
+        "created_at": 638400000000000000 + n,
+    }
+    if n % 2 == 0:
+        object_id, concrete_model = "signboard", {"concrete_model_type": "PalMapObjectSignboardModel", "signboard_text": f"Sign {n}"}
+    else:
+        object_id, concrete_model = "torch", {"concrete_model_type": "PalMapObjectTorchModel", "extinction_date_time": n}
+    concrete_model.update({"instance_id": uuid_of(n + 100000), "model_instance_id": uuid_of(n)})
+    return {
+        "Model": struct_property(
+            "PalMapObjectModelSaveData",
+            {
+                "RawData": bytes_property(map_model.encode_bytes(model)),
+                "Connector": struct_property("PalMapObjectConnectorSaveData", {"RawData": bytes_property(b"")}),
+                "BuildProcess": struct_property("PalMapObjectBuildProcessSaveData", {"RawData": bytes_property(build_process.encode_bytes({"state": 1, "id": uuid_of(n)}))}),
+            },
+        ),
+        "ConcreteModel": struct_property(
+            "PalMapObjectConcreteModelSaveData",
+            {"RawData": bytes_property(map_concrete_model.encode_bytes(concrete_model)), "ModuleMap": map_property("EnumProperty", "StructProperty", [], None, "StructProperty")},
+        ),
+        "MapObjectId": {"id": None, "value": object_id, "type": "NameProperty"},
+    }
+
+
+def map_objects_save(count: int) -> bytes:
+    """A GVAS file holding ``count`` map objects in MapObjectSaveData, left undecoded."""
+    map_objects = {
+        "array_type": "StructProperty",
+        "id": None,
+        "value": {"prop_name": "MapObjectSaveData", "prop_type": "StructProperty", "values": [map_object_entry(n) for n in range(count)], "type_name": "PalMapObjectSaveData", "id": ZERO},
+        "type": "ArrayProperty",
+    }
+    return gvas_header(2) + write_properties({"worldSaveData": struct_property("PalWorldSaveData", {"MapObjectSaveData": map_objects})}) + b"\x00\x00\x00\x00"
+
+
+class DecodeParallelTest(unittest.TestCase):
+    """Tests for ``GvasFile.read`` with ``workers`` above 1."""
+
+    def test_matches_serial_decoding(self) -> None:
+        """Sections decoded by workers read in place, equal the serial result and write back unchanged."""
+        data = sections_save()
+        serial = GvasFile.read(data).properties
+        parallel = GvasFile.read(data, workers=2)
+        self.assertEqual(parallel.properties, serial)
+        self.assertEqual(parallel.write({}), data)
+
+    def test_keeps_spans(self) -> None:
+        """Raw spans of sections decoded by workers point into the parent buffer."""
+        data = sections_save()
+        gvas_file = GvasFile.read(data, workers=2, keep_spans=True)
+        first = gvas_file.properties["worldSaveData"]["value"]["First"]
+        self.assertIs(first.raw.obj, data)
+        self.assertEqual(gvas_file.write({}), data)
+
+    def test_worker_map_objects_are_serial(self) -> None:
+        """with_workers(..., 1) turns the map object pool off again, as section workers do."""
+        pooled = map_object.with_workers(PALWORLD_CUSTOM_PROPERTIES, 4)
+        self.assertEqual(pooled[MAP_OBJECT_PATH][0].keywords, {"workers": 4})
+        serial = map_object.with_workers(pooled, 1)[MAP_OBJECT_PATH][0]
+        self.assertIsInstance(serial, functools.partial)
+        self.assertIs(serial.func, map_object.decode)
+        self.assertEqual(serial.keywords, {"workers": 1})
+
+
+class MapObjectWorkersTest(unittest.TestCase):
+    """Tests for decoding map objects on a process pool with ``with_workers``."""
+
+    def test_matches_serial_decoding(self) -> None:
+        """Map objects decoded in several chunks equal the serial result and encode back to the same bytes."""
+        data = map_objects_save(2 * map_object.PARALLEL_CHUNK_SIZE + 3)
+        serial = GvasFile.read(data, PALWORLD_TYPE_HINTS, map_object.with_workers(PALWORLD_CUSTOM_PROPERTIES, 1))
+        parallel = GvasFile.read(data, PALWORLD_TYPE_HINTS, map_object.with_workers(PALWORLD_CUSTOM_PROPERTIES, 2))
+        self.assertEqual(parallel.properties, serial.properties)
+        values = parallel.properties["worldSaveData"]["value"]["MapObjectSaveData"]["value"]["values"]
+        self.assertEqual(values[-1]["ConcreteModel"]["value"]["RawData"]["value"]["signboard_text"], f"Sign {len(values) - 1}")
+        self.assertEqual(parallel.write(PALWORLD_CUSTOM_PROPERTIES), data)
+        self.assertEqual(serial.write(PALWORLD_CUSTOM_PROPERTIES), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
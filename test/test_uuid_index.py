@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the UUID index FArchiveReader fills as it reads."""
+
+import os
+import tempfile
+import unittest
+from typing import Any
+
+from save_fixtures import ZERO, bytes_property, gvas_header, guid_property, int_property, read_properties, struct_property, uuid_of, write_properties
+
+from palworld_save_tools.archive import FArchiveReader, FArchiveWriter
+from palworld_save_tools.gvas import GvasFile
+from palworld_save_tools.uuid_index import UUIDIndex
+
+TYPE_HINTS: dict[str, str] = {".Guilds.Key": "Guid", ".Guilds.Value": "StructProperty"}
+
+
+def decode_owner(reader: FArchiveReader, type_name: str, size: int, path: str) -> dict[str, Any]:
+    """Custom decoder reading a byte array as an owner UUID and a level."""
+    value = reader.property(type_name, size, path, nested_caller_path=path)
+    nested = reader.internal_copy(value["value"]["values"], debug=False)
+    value["value"] = {"owner": nested.guid(), "level": nested.i32()}
+    return value
+
+
+def encode_owner(writer: FArchiveWriter, property_type: str, properties: dict[str, Any]) -> int:
+    """Custom encoder of ``decode_owner``."""
+    del properties["custom_type"]
+    nested = FArchiveWriter()
+    nested.guid(properties["value"]["owner"])
+    nested.i32(properties["value"]["level"])
+    properties["value"] = {"values": nested.bytes()}
+    return writer.property_inner(property_type, properties)
+
+
+CUSTOM_PROPERTIES: dict[str, Any] = {".Owner": (decode_owner, encode_owner)}
+
+
+def guid_array(values: list, type_name: str, array_id: Any = ZERO) -> dict[str, Any]:
+    """Builds a StructProperty array of ``type_name`` structs."""
+    return {
+        "array_type": "StructProperty",
+        "id": None,
+        "value": {"prop_name": "Values", "prop_type": "StructProperty", "values": values, "type_name": type_name, "id": array_id},
+        "type": "ArrayProperty",
+    }
+
+
+def sample_properties() -> dict[str, Any]:
+    """Properties holding UUIDs in every place the generic readers and a custom decoder put them."""
+    return {
+        "Id": guid_property(uuid_of(1)),
+        "Zero": guid_property(ZERO),
+        "Player": struct_property("Player", {"Id": guid_property(uuid_of(2)), "Level": int_property(3)}),
+        "Members": guid_array([uuid_of(3), uuid_of(1)], "Guid", uuid_of(4)),
+        "Entries": guid_array([{"Id": guid_property(uuid_of(5))}, {"Id": guid_property(uuid_of(1))}], "Entry"),
+        "Guilds": {
+            "key_type": "StructProperty",
+            "value_type": "StructProperty",
+            "key_struct_type": "Guid",
+            "value_struct_type": "StructProperty",
+            "id": None,
+            "value": [{"key": uuid_of(6), "value": {"Leader": guid_property(uuid_of(1))}}],
+            "type": "MapProperty",
+        },
+        "Owner": dict(bytes_property(uuid_of(7).raw_bytes + b"\x05\x00\x00\x00"), id=uuid_of(8)),
+    }
+
+
+def sorted_locations(index: UUIDIndex) -> dict[bytes, list]:
+    """The locations of ``index``, independent of the order they were added in."""
+    return {u: sorted(map(repr, locations)) for u, locations in index.locations.items()}
+
+
+class ReaderIndexTest(unittest.TestCase):
+    """Tests for the UUIDs FArchiveReader adds to an attached index."""
+
+    def test_matches_walking_the_properties(self) -> None:
+        """Reading with an index finds every UUID at the keys a walk of the decoded tree finds it."""
+        data = write_properties(sample_properties())
+        for options in ({}, {"keep_spans": True}, {"compact": True}):
+            with self.subTest(**options):
+                index = UUIDIndex()
+                properties = read_properties(data, TYPE_HINTS, CUSTOM_PROPERTIES, uuid_index=index, **options)
+                walked = UUIDIndex()
+                walked.add_properties(properties)
+                self.assertEqual(sorted_locations(index), sorted_locations(walked))
+                self.assertEqual(len(index), 8)
+                self.assertNotIn(ZERO, index)
+
+    def test_locations_resolve_to_the_uuid(self) -> None:
+        """Each recorded location leads from the properties to the UUID, including inside custom properties."""
+        data = write_properties(sample_properties())
+        index = UUIDIndex()
+        properties = read_properties(data, TYPE_HINTS, CUSTOM_PROPERTIES, uuid_index=index)
+        self.assertEqual(len(index.lookup(uuid_of(1))), 4)
+        self.assertIn(("Guilds", "value", 0, "key"), index.lookup(uuid_of(6)))
+        self.assertIn(("Owner", "value", "owner"), index.lookup(uuid_of(7)))
+        self.assertIn(("Owner", "id"), index.lookup(uuid_of(8)))
+        for raw_bytes, locations in index.locations.items():
+            for location in locations:
+                node: Any = properties
+                for key in location:
+                    node = node[key]
+                self.assertEqual(node.raw_bytes, raw_bytes)
+
+    def test_gvas_file_read(self) -> None:
+        """GvasFile.read fills the index even when asked for lazy properties."""
+        data = gvas_header(1) + write_properties({"worldSaveData": struct_property("PalWorldSaveData", sample_properties())}) + b"\x00\x00\x00\x00"
+        hints = {f".worldSaveData{path}": value for path, value in TYPE_HINTS.items()}
+        custom_properties = {".worldSaveData.Owner": CUSTOM_PROPERTIES[".Owner"]}
+        eager = UUIDIndex()
+        GvasFile.read(data, hints, custom_properties, uuid_index=eager)
+        lazy = UUIDIndex()
+        GvasFile.read(data, hints, custom_properties, uuid_index=lazy, lazy=True)
+        self.assertEqual(sorted_locations(lazy), sorted_locations(eager))
+        self.assertIn(("worldSaveData", "value", "Guilds", "value", 0, "key"), eager.lookup(uuid_of(6)))
+
+
+class SidecarTest(unittest.TestCase):
+    """Tests for persisting an index."""
+
+    def test_sidecar_is_written_under_directory(self) -> None:
+        """Sidecars go under the given directory, are reloaded by hash, and are ignored for other contents."""
+        index = UUIDIndex("hash")
+        index.add(uuid_of(1), ("Id", "value"))
+        with tempfile.TemporaryDirectory() as directory:
+            out = os.path.join(directory, "out")
+            index.save("saves/Level.sav", out)
+            self.assertTrue(os.path.exists(os.path.join(out, "saves", "Level.sav.uuidindex.json")))
+            loaded = UUIDIndex.load_sidecar("saves/Level.sav", "hash", out)
+            assert loaded is not None
+            self.assertEqual(loaded.lookup(uuid_of(1)), [("Id", "value")])
+            self.assertIsNone(UUIDIndex.load_sidecar("saves/Level.sav", "other", out))
+        self.assertEqual(UUIDIndex.sidecar_path("Level.sav"), "out/Level.sav.uuidindex.json")
+
+
+if __name__ == "__main__":
+    unittest.main()
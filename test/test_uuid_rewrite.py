@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the structural UUID rewriting of uuid_rewrite.py."""
+
+import unittest
+from typing import Any
+
+from save_fixtures import ZERO, bytes_property, custom_property, guid_property, int_property, map_property, read_properties, str_property, struct_property, uuid_of, write_properties
+
+from palworld_save_tools.archive import RawProperty
+from palworld_save_tools.paltypes import PALWORLD_CUSTOM_PROPERTIES, PALWORLD_TRANSFER_CUSTOM_PROPERTIES, PALWORLD_TYPE_HINTS
+from uuid_rewrite import RewriteMapping, report_total, rewrite_uuids
+
+OLD: str = "00000000000000000000000000000001"
+NEW: str = "00000000000000000000000000000002"
+OLD_FORMATTED: str = "00000000-0000-0000-0000-000000000001"
+NEW_FORMATTED: str = "00000000-0000-0000-0000-000000000002"
+
+
+class RewriteUUIDsTest(unittest.TestCase):
+    """Tests for ``rewrite_uuids``."""
+
+    def test_replaces_uuids_strings_and_substrings_in_one_walk(self) -> None:
+        """UUID values, whole formatted strings and substrings are all replaced."""
+        data = {
+            "id": uuid_of(1),
+            "other": uuid_of(3),
+            "formatted": OLD_FORMATTED,
+            "path": f"Players/{OLD}.sav",
+            "nested": [{"id": uuid_of(1)}, OLD_FORMATTED, "untouched"],
+        }
+        report = rewrite_uuids(data, {uuid_of(1): uuid_of(2)}, {OLD: NEW})
+        self.assertEqual(data["id"], uuid_of(2))
+        self.assertEqual(data["other"], uuid_of(3))
+        self.assertEqual(data["formatted"], NEW_FORMATTED)
+        self.assertEqual(data["path"], f"Players/{NEW}.sav")
+        self.assertEqual(data["nested"], [{"id": uuid_of(2)}, NEW_FORMATTED, "untouched"])
+        self.assertEqual(report_total(report, OLD_FORMATTED), 4)
+        self.assertEqual(report_total(report, OLD), 1)
+
+    def test_swaps_values_simultaneously(self) -> None:
+        """Mapping two values onto each other does not chain the substitutions."""
+        data = {"a": uuid_of(1), "b": uuid_of(2), "text": f"{OLD}-{NEW}"}
+        rewrite_uuids(data, {uuid_of(1): uuid_of(2), uuid_of(2): uuid_of(1)}, {OLD: NEW, NEW: OLD})
+        self.assertEqual(data, {"a": uuid_of(2), "b": uuid_of(1), "text": f"{NEW}-{OLD}"})
+
+    def test_reports_counts_per_path(self) -> None:
+        """Every substitution is counted at the dotted path of its mapping keys."""
+        data = {
+            "Map": {"value": [{"key": uuid_of(1), "value": uuid_of(1)}, {"key": uuid_of(1), "value": uuid_of(4)}]},
+            "Name": f"{OLD}/{OLD}",
+        }
+        report = rewrite_uuids(data, {uuid_of(1): uuid_of(2)}, {OLD: NEW})
+        self.assertEqual(report[OLD_FORMATTED], {"Map.value.key": 2, "Map.value.value": 1})
+        self.assertEqual(report[OLD], {"Name": 2})
+
+    def test_identity_mapping_is_ignored(self) -> None:
+        """Old values mapped onto themselves are neither replaced nor reported."""
+        data = {"id": uuid_of(1)}
+        self.assertEqual(rewrite_uuids(data, {uuid_of(1): uuid_of(1)}, {OLD: OLD}), {})
+
+    def test_marks_enclosing_raw_properties_dirty(self) -> None:
+        """Every RawProperty enclosing a replacement is marked dirty, and no other."""
+        data = write_properties(
+            {
+                "Changed": struct_property("Owner", {"Id": guid_property(uuid_of(1)), "Level": int_property(3)}),
+                "Unchanged": struct_property("Owner", {"Id": guid_property(uuid_of(5)), "Name": str_property("x")}),
+            }
+        )
+        properties = read_properties(data, keep_spans=True)
+        outer = properties["Changed"]
+        inner = outer["value"]["Id"]
+        self.assertIsInstance(outer, RawProperty)
+        self.assertIsInstance(inner, RawProperty)
+        rewrite_uuids(properties, {uuid_of(1): uuid_of(2)})
+        self.assertTrue(outer.dirty)
+        self.assertTrue(inner.dirty)
+        self.assertFalse(outer["value"]["Level"].dirty)
+        self.assertFalse(properties["Unchanged"].dirty)
+        self.assertFalse(properties["Unchanged"]["value"]["Id"].dirty)
+        self.assertEqual(read_properties(write_properties(properties)), read_properties(write_properties(self.expected())))
+
+    @staticmethod
+    def expected() -> dict:
+        """The properties of ``test_marks_enclosing_raw_properties_dirty`` after the rewrite."""
+        return {
+            "Changed": struct_property("Owner", {"Id": guid_property(uuid_of(2)), "Level": int_property(3)}),
+            "Unchanged": struct_property("Owner", {"Id": guid_property(uuid_of(5)), "Name": str_property("x")}),
+        }
+
+
+class RewriteMappingTest(unittest.TestCase):
+    """Tests for ``RewriteMapping``."""
+
+    def test_conflicting_uuid_raises(self) -> None:
+        """Mapping one old UUID to two different new values raises ValueError."""
+        mapping = RewriteMapping()
+        mapping.add_uuid(OLD_FORMATTED, NEW_FORMATTED)
+        mapping.add_uuid(uuid_of(1), uuid_of(2))
+        with self.assertRaises(ValueError):
+            mapping.add_uuid(OLD_FORMATTED, uuid_of(3))
+
+    def test_conflicting_text_raises(self) -> None:
+        """Mapping one old string to two different new values raises ValueError."""
+        mapping = RewriteMapping()
+        mapping.add_text(OLD, NEW)
+        mapping.add_text(OLD, NEW)
+        with self.assertRaises(ValueError):
+            mapping.add_text(OLD, "3")
+
+    def test_apply_combines_transfers(self) -> None:
+        """Substitutions from several transfers are applied by one walk."""
+        mapping = RewriteMapping()
+        mapping.add_uuid(uuid_of(1), uuid_of(2), "first")
+        mapping.add_uuid(uuid_of(7), uuid_of(8), "second")
+        mapping.add_text(OLD, NEW, "first")
+        data = [uuid_of(1), uuid_of(7), OLD]
+        report = mapping.apply(data)
+        self.assertEqual(data, [uuid_of(2), uuid_of(8), NEW])
+        self.assertEqual(mapping.labels[OLD_FORMATTED], "first")
+        self.assertEqual(report_total(report, str(uuid_of(7))), 1)
+
+    def test_find_undecoded(self) -> None:
+        """Old values left inside byte blobs are found as raw bytes, ASCII and UTF-16."""
+        mapping = RewriteMapping()
+        mapping.add_uuid(uuid_of(1), uuid_of(2))
+        blob = b"\x00" + uuid_of(1).raw_bytes + OLD_FORMATTED.encode("ascii") + OLD_FORMATTED.encode("utf-16-le")
+        report = mapping.find_undecoded({"Section": {"RawData": blob}, "Other": [b"\x01\x02"]})
+        self.assertEqual(report, {OLD_FORMATTED: {"Section.RawData": 3}})
+
+
+# The old GUID as raw bytes, ASCII and UTF-16, as it would sit in a section the transfer profile does not decode
+PLANTED: bytes = b"\x00" + uuid_of(1).raw_bytes + OLD_FORMATTED.encode("ascii") + OLD_FORMATTED.encode("utf-16-le")
+
+# Where find_undecoded reports the RawData of every section PALWORLD_TRANSFER_CUSTOM_PROPERTIES leaves undecoded
+UNDECODED_PATHS: list[str] = [
+    "worldSaveData.value.ItemContainerSaveData.value.value.RawData.value.values",
+    "worldSaveData.value.ItemContainerSaveData.value.value.Slots.value.values.RawData.value.values",
+    "worldSaveData.value.FoliageGridSaveDataMap.value.value.ModelMap.value.value.RawData.value.values",
+    "worldSaveData.value.FoliageGridSaveDataMap.value.value.ModelMap.value.value.InstanceDataMap.value.value.RawData.value.values",
+    "worldSaveData.value.BaseCampSaveData.value.value.RawData.value.values",
+    "worldSaveData.value.BaseCampSaveData.value.value.WorkCollection.value.RawData.value.values",
+    "worldSaveData.value.BaseCampSaveData.value.value.ModuleMap.value.value.RawData.value.values",
+]
+
+
+def struct_array(prop_name: str, type_name: str, values: list[dict[str, Any]]) -> dict[str, Any]:
+    """Builds an ArrayProperty of ``type_name`` structs."""
+    return {
+        "array_type": "StructProperty",
+        "id": None,
+        "value": {"prop_name": prop_name, "prop_type": "StructProperty", "values": values, "type_name": type_name, "id": ZERO},
+        "type": "ArrayProperty",
+    }
+
+
+def world(sections: dict[str, Any]) -> dict[str, Any]:
+    """Builds the worldSaveData of a level holding ``sections``."""
+    return {"worldSaveData": struct_property("PalWorldSaveData", sections)}
+
+
+def excluded_sections(item_container: Any, item_slot: Any, foliage_model: Any, foliage_instance: Any, base_camp: Any, work_collection: Any, module: Any) -> dict[str, Any]:
+    """Item container, foliage and base camp sections holding the given RawData properties."""
+    instances = map_property("StructProperty", "StructProperty", [({"Index": int_property(0)}, {"RawData": foliage_instance})], "StructProperty", "StructProperty")
+    model_map = map_property("NameProperty", "StructProperty", [("Tree", {"RawData": foliage_model, "InstanceDataMap": instances})], None, "StructProperty")
+    module_map = map_property("EnumProperty", "StructProperty", [("EPalBaseCampModuleType::Energy", {"RawData": module})], None, "StructProperty")
+    camp = {"RawData": base_camp, "WorkCollection": struct_property("PalBaseCampSaveData_WorkCollection", {"RawData": work_collection}), "ModuleMap": module_map}
+    return {
+        "ItemContainerSaveData": map_property("StructProperty", "StructProperty", [({"ID": guid_property(uuid_of(10))}, {"RawData": item_container, "Slots": struct_array("Slots", "PalItemSlotSaveData", [{"RawData": item_slot}])})], "StructProperty", "StructProperty"),
+        "FoliageGridSaveDataMap": map_property("StructProperty", "StructProperty", [({"Cell": int_property(1)}, {"ModelMap": model_map})], "StructProperty", "StructProperty"),
+        "BaseCampSaveData": map_property("StructProperty", "StructProperty", [(uuid_of(11), camp)], "Guid", "StructProperty"),
+    }
+
+
+def transform() -> dict[str, Any]:
+    """An identity ftransform as the custom decoders return it."""
+    return {"rotation": {"x": 0.0, "y": 0.0, "z": 0.0, "w": 1.0}, "translation": {"x": 1.0, "y": 2.0, "z": 3.0}, "scale3d": {"x": 1.0, "y": 1.0, "z": 1.0}}
+
+
+def player_save() -> dict[str, Any]:
+    """A level whose old GUID only sits in sections both profiles decode, next to valid excluded sections."""
+    path = ".worldSaveData.CharacterContainerSaveData.Value.Slots.Slots.RawData"
+    slot = custom_property(path, {"player_uid": uuid_of(1), "instance_id": uuid_of(3), "permission_tribe_id": 0})
+    slots = {"Slots": struct_array("Slots", "PalCharacterSlotSaveData", [{"RawData": slot}])}
+    container = map_property("StructProperty", "StructProperty", [({"ID": guid_property(uuid_of(12))}, slots)], "StructProperty", "StructProperty")
+    director = {"id": uuid_of(13), "spawn_transform": transform(), "current_order_type": 1, "current_battle_type": 2, "container_id": uuid_of(1)}
+    sections = excluded_sections(
+        custom_property(".worldSaveData.ItemContainerSaveData.Value.RawData", {"permission": {"type_a": [1], "type_b": [], "item_static_ids": ["Wood"]}}),
+        custom_property(".worldSaveData.ItemContainerSaveData.Value.Slots.Slots.RawData", None),
+        custom_property(".worldSaveData.FoliageGridSaveDataMap.Value.ModelMap.Value.RawData", {"model_id": "Tree", "foliage_preset_type": 1, "cell_coord": {"x": 1, "y": -2, "z": 3}}),
+        custom_property(".worldSaveData.FoliageGridSaveDataMap.Value.ModelMap.Value.InstanceDataMap.Value.RawData", {"model_instance_id": uuid_of(14), "world_transform": {"rotator": {"pitch": 0.0, "yaw": 90.0, "roll": 0.0}, "location": {"x": 1.0, "y": 2.0, "z": 3.0}, "scale_x": 1.0}, "hp": 100}),
+        custom_property(".worldSaveData.BaseCampSaveData.Value.RawData", {"id": uuid_of(11), "name": "Camp", "state": 0, "transform": transform(), "area_range": 3500.0, "group_id_belong_to": uuid_of(15), "fast_travel_local_transform": transform(), "owner_map_object_instance_id": uuid_of(16)}),
+        custom_property(".worldSaveData.BaseCampSaveData.Value.WorkCollection.RawData", {"id": uuid_of(17), "work_ids": [uuid_of(18)]}),
+        bytes_property(b""),
+    )
+    camp = sections["BaseCampSaveData"]["value"][0]["value"]
+    camp["ModuleMap"]["custom_type"] = ".worldSaveData.BaseCampSaveData.Value.ModuleMap"
+    camp["WorkerDirector"] = struct_property("PalWorkerDirectorSaveData", {"RawData": custom_property(".worldSaveData.BaseCampSaveData.Value.WorkerDirector.RawData", director)})
+    sections["CharacterContainerSaveData"] = container
+    return world(sections)
+
+
+class TransferProfileTest(unittest.TestCase):
+    """Tests that the reduced custom properties of a save transfer neither miss nor skip an old GUID."""
+
+    def mapping(self) -> RewriteMapping:
+        """The mapping of one transfer from the old GUID to the new one."""
+        mapping = RewriteMapping()
+        mapping.add_uuid(uuid_of(1), uuid_of(2))
+        return mapping
+
+    def test_finds_old_guid_in_every_undecoded_section(self) -> None:
+        """The old GUID planted in each section left undecoded is reported at that section, in all three forms."""
+        data = write_properties(world(excluded_sections(*[bytes_property(PLANTED)] * 7)))
+        properties = read_properties(data, PALWORLD_TYPE_HINTS, PALWORLD_TRANSFER_CUSTOM_PROPERTIES)
+        self.assertEqual(self.mapping().find_undecoded(properties), {OLD_FORMATTED: {path: 3 for path in UNDECODED_PATHS}})
+
+    def test_rewrites_what_the_full_profile_rewrites(self) -> None:
+        """A level read with the transfer profile is rewritten to the same bytes as one read with every custom property."""
+        data = write_properties(player_save(), PALWORLD_CUSTOM_PROPERTIES)
+        full = read_properties(data, PALWORLD_TYPE_HINTS, PALWORLD_CUSTOM_PROPERTIES)
+        transfer = read_properties(data, PALWORLD_TYPE_HINTS, PALWORLD_TRANSFER_CUSTOM_PROPERTIES)
+        self.assertEqual(self.mapping().find_undecoded(transfer), {})
+        self.assertEqual(self.mapping().find_undecoded(full), {})
+        full_report = self.mapping().apply(full)
+        self.assertEqual(self.mapping().apply(transfer), full_report)
+        self.assertEqual(report_total(full_report, OLD_FORMATTED), 2)
+        rewritten = write_properties(full, PALWORLD_CUSTOM_PROPERTIES)
+        self.assertNotEqual(rewritten, data)
+        self.assertEqual(write_properties(transfer, PALWORLD_TRANSFER_CUSTOM_PROPERTIES), rewritten)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""Unit tests for the storage checks of validate_storages_exist.py."""
+
+import copy
+import unittest
+from typing import Any
+
+from save_fixtures import guid_property, map_property, struct_property, uuid_of
+
+from validate_storages_exist import ContainerIds, correct_storages, get_container_ids, validate_storages
+
+
+def container_key(n: int) -> dict[str, Any]:
+    """The key of a container entry with id ``uuid_of(n)``."""
+    return {"ID": guid_property(uuid_of(n))}
+
+
+def level(item_containers: list[int], character_containers: list[int], owner: int) -> dict[str, Any]:
+    """A level holding the given containers, and a group entry referencing the storage ``uuid_of(owner)``."""
+    return {
+        "properties": {
+            "worldSaveData": struct_property(
+                "PalWorldSaveData",
+                {
+                    "ItemContainerSaveData": map_property("StructProperty", "StructProperty", [(container_key(n), {}) for n in item_containers], "PalContainerId"),
+                    "CharacterContainerSaveData": map_property("StructProperty", "StructProperty", [(container_key(n), {}) for n in character_containers], "PalContainerId"),
+                    "GroupSaveDataMap": map_property("Guid", "StructProperty", [(uuid_of(99), {"StorageId": guid_property(uuid_of(owner))})]),
+                },
+            )
+        }
+    }
+
+
+def player(storage: int, common: int) -> dict[str, Any]:
+    """Player data whose pal storage is ``uuid_of(storage)`` and whose common inventory is ``uuid_of(common)``."""
+    return {
+        "properties": {
+            "SaveData": struct_property(
+                "PalPlayerSaveData",
+                {
+                    "PalStorageContainerId": struct_property("PalContainerId", container_key(storage)),
+                    "inventoryInfo": struct_property("PalPlayerDataInventoryInfo", {"CommonContainerId": struct_property("PalContainerId", container_key(common))}),
+                },
+            )
+        }
+    }
+
+
+def owner_of(level_data: dict[str, Any]) -> Any:
+    """The storage the group entry of ``level`` references."""
+    return level_data["properties"]["worldSaveData"]["value"]["GroupSaveDataMap"]["value"][0]["value"]["StorageId"]["value"]
+
+
+class StorageChecksTest(unittest.TestCase):
+    """Tests for ``get_container_ids``, ``validate_storages`` and ``correct_storages``."""
+
+    def test_get_container_ids(self) -> None:
+        """Both item and character container keys are collected as raw bytes."""
+        self.assertEqual(get_container_ids(level([1, 2], [3], 10)), {uuid_of(n).raw_bytes for n in (1, 2, 3)})
+
+    def test_validate_storages(self) -> None:
+        """A player validates when any of its storages is a container of the level."""
+        level_data = level([1], [2], 10)
+        container_ids: ContainerIds = get_container_ids(level_data)
+        self.assertTrue(validate_storages(level_data, player(2, 5), container_ids))
+        self.assertTrue(validate_storages(level_data, player(5, 1)))
+        self.assertFalse(validate_storages(level_data, player(5, 6), container_ids))
+
+    def test_successful_correction(self) -> None:
+        """References to the old storages are rewritten to the new ones, in place."""
+        level_data = level([1], [2], 10)
+        container_ids: ContainerIds = get_container_ids(level_data)
+        success, corrected = correct_storages(level_data, player(1, 2), player(10, 11), container_ids)
+        self.assertTrue(success)
+        self.assertIs(corrected, level_data)
+        self.assertEqual(owner_of(level_data), uuid_of(1))
+        self.assertEqual(container_ids, {uuid_of(1).raw_bytes, uuid_of(2).raw_bytes})
+
+    def test_failed_correction(self) -> None:
+        """Nothing is rewritten when the new player does not validate, or the old one still does."""
+        for new, old in ((player(5, 6), player(10, 11)), (player(1, 2), player(2, 10))):
+            with self.subTest(new=new, old=old):
+                level_data = level([1], [2], 10)
+                original = copy.deepcopy(level_data)
+                container_ids: ContainerIds = get_container_ids(level_data)
+                success, returned = correct_storages(level_data, new, old, container_ids)
+                self.assertFalse(success)
+                self.assertIs(returned, level_data)
+                self.assertEqual(level_data, original)
+                self.assertEqual(container_ids, get_container_ids(original))
+
+
+if __name__ == "__main__":
+    unittest.main()
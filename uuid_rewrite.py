@@ -0,0 +1,209 @@
+#!/usr/env python3
+
+"""Structural UUID rewriting over parsed save trees."""
+
+# pyright: reportUnknownMemberType=false, reportUnknownVariableType=false
+
+import re
+from re import Match, Pattern
+from typing import Any
+
+from palworld_save_tools.archive import UUID, CompactNode, RawProperty
+
+# Maps the old value (as text) to the number of substitutions made at each property path.
+RewriteReport = dict[str, dict[str, int]]
+
+_MISSING: Any = object()
+
+
+def as_uuid(value: UUID | str) -> UUID:
+    """Coerces a formatted GUID string or ``UUID`` into a ``UUID``."""
+    if isinstance(value, UUID):
+        return value
+    return UUID.from_str(str(value))
+
+
+class RewriteMapping:
+    """Collects old to new substitutions from several transfers so they are applied by one ``rewrite_uuids`` walk."""
+
+    uuids: dict[UUID, UUID]
+    texts: dict[str, str]
+    labels: dict[str, str]
+
+    def __init__(self) -> None:
+        self.uuids = {}
+        self.texts = {}
+        self.labels = {}
+
+    def add_uuid(self, old: UUID | str, new: UUID | str, label: str | None = None) -> None:
+        """Adds a ``UUID`` substitution, refusing to map the same old value to two different new values."""
+        old_uuid: UUID = as_uuid(old)
+        new_uuid: UUID = as_uuid(new)
+        if old_uuid in self.uuids and self.uuids[old_uuid] != new_uuid:
+            raise ValueError(f"{old_uuid} is already mapped to {self.uuids[old_uuid]}, cannot also map it to {new_uuid}.")
+        self.uuids[old_uuid] = new_uuid
+        if label is not None:
+            self.labels[str(old_uuid)] = label
+
+    def add_text(self, old: str, new: str, label: str | None = None) -> None:
+        """Adds a substring substitution, refusing to map the same old value to two different new values."""
+        if old in self.texts and self.texts[old] != new:
+            raise ValueError(f"{old} is already mapped to {self.texts[old]}, cannot also map it to {new}.")
+        self.texts[old] = new
+        if label is not None:
+            self.labels[old] = label
+
+    def apply(self, data: Any) -> RewriteReport:
+        """Applies every collected substitution to ``data`` in a single walk."""
+        return rewrite_uuids(data, self.uuids, self.texts)
+
+    def find_undecoded(self, data: Any) -> RewriteReport:
+        """Finds every collected old value that ``apply`` cannot reach in ``data``."""
+        return find_undecoded_uuids(data, self.uuids, self.texts)
+
+
+def rewrite_uuids(data: Any, mapping: dict[UUID, UUID], text_mapping: dict[str, str] | None = None) -> RewriteReport:
+    r"""
+    Walks ``data`` once and replaces, in place, every ``UUID`` found in ``mapping`` with its new value.
+    Formatted GUID strings equal to a mapped ``UUID`` are replaced with the formatted new value,
+    and every key of ``text_mapping`` is replaced wherever it appears inside a string value.
+    Every ``RawProperty`` enclosing a replacement is marked dirty so it is encoded again on write.
+    """
+    by_bytes: dict[bytes, UUID] = {}
+    by_str: dict[str, str] = {}
+    for old, new in mapping.items():
+        if old == new:
+            continue
+        by_bytes[old.raw_bytes] = new
+        by_str[str(old)] = str(new)
+
+    substrings: dict[str, str] = dict(by_str)
+    if text_mapping is not None:
+        substrings.update({old: new for old, new in text_mapping.items() if old != new and old != ""})
+    min_substring: int = min((len(old) for old in substrings), default=0)
+    # One alternation so every old value is replaced simultaneously, longest match first.
+    substring_regex: Pattern[str] = re.compile("|".join(re.escape(old) for old in sorted(substrings, key=len, reverse=True)))
+
+    report: RewriteReport = {}
+    path: list[str] = []
+    raw_properties: list[RawProperty] = []
+
+    def record(old: str, count: int = 1) -> None:
+        counts: dict[str, int] = report.setdefault(old, {})
+        key: str = ".".join(path)
+        counts[key] = counts.get(key, 0) + count
+
+    def replace_match(match: Match[str]) -> str:
+        record(match.group(0))
+        return substrings[match.group(0)]
+
+    def substitute(value: Any) -> Any:
+        if isinstance(value, UUID):
+            new_uuid: UUID | None = by_bytes.get(value.raw_bytes)
+            if new_uuid is None:
+                return _MISSING
+            record(str(value))
+            return new_uuid
+        if isinstance(value, str) and len(value) >= min_substring > 0:
+            new_str: str | None = by_str.get(value)
+            if new_str is not None:
+                record(value)
+                return new_str
+            replaced, count = substring_regex.subn(replace_match, value)
+            if count > 0:
+                return replaced
+        return _MISSING
+
+    def mark_dirty() -> None:
+        # The innermost one marks those enclosing it too
+        if len(raw_properties) > 0:
+            raw_properties[-1].touch()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, (dict, CompactNode)):
+            is_raw: bool = isinstance(node, RawProperty)
+            if is_raw:
+                raw_properties.append(node)
+            for key, value in node.items():
+                path.append(str(key))
+                if isinstance(value, (dict, list, CompactNode)):
+                    walk(value)
+                else:
+                    replacement = substitute(value)
+                    if replacement is not _MISSING:
+                        node[key] = replacement
+                        mark_dirty()
+                path.pop()
+            if is_raw:
+                raw_properties.pop()
+        elif isinstance(node, list):
+            for index, value in enumerate(node):
+                if isinstance(value, (dict, list, CompactNode)):
+                    walk(value)
+                else:
+                    replacement = substitute(value)
+                    if replacement is not _MISSING:
+                        node[index] = replacement
+                        mark_dirty()
+
+    if len(by_bytes) > 0 or len(substrings) > 0:
+        walk(data)
+    return report
+
+
+def find_undecoded_uuids(data: Any, mapping: dict[UUID, UUID], text_mapping: dict[str, str] | None = None) -> RewriteReport:
+    r"""
+    Walks ``data`` once and counts, without replacing anything, the old values of ``mapping`` and ``text_mapping``
+    found inside byte blobs, such as the RawData of custom properties that were not decoded.
+    ``UUID`` values are searched for as raw bytes and text values as ASCII and UTF-16 strings.
+    """
+    needles: dict[bytes, str] = {}
+    for old, new in mapping.items():
+        if old == new:
+            continue
+        needles[old.raw_bytes] = str(old)
+        needles[str(old).encode("ascii")] = str(old)
+        needles[str(old).encode("utf-16-le")] = str(old)
+    if text_mapping is not None:
+        for old_text, new_text in text_mapping.items():
+            if old_text != new_text and old_text != "":
+                needles[old_text.encode("utf-8")] = old_text
+                needles[old_text.encode("utf-16-le")] = old_text
+
+    report: RewriteReport = {}
+    path: list[str] = []
+
+    def search(blob: bytes | bytearray | memoryview) -> None:
+        if isinstance(blob, memoryview):
+            blob = blob.tobytes()
+        for needle, old in needles.items():
+            count: int = blob.count(needle)
+            if count > 0:
+                counts: dict[str, int] = report.setdefault(old, {})
+                key: str = ".".join(path)
+                counts[key] = counts.get(key, 0) + count
+
+    def walk(node: Any) -> None:
+        is_mapping: bool = isinstance(node, (dict, CompactNode))
+        items = node.items() if is_mapping else enumerate(node)
+        for key, value in items:
+            if isinstance(value, (dict, list, CompactNode)):
+                if is_mapping:
+                    path.append(str(key))
+                    walk(value)
+                    path.pop()
+                else:
+                    walk(value)
+            elif isinstance(value, (bytes, bytearray, memoryview)):
+                path.append(str(key))
+                search(value)
+                path.pop()
+
+    if len(needles) > 0:
+        walk(data)
+    return report
+
+
+def report_total(report: RewriteReport, old: str) -> int:
+    """Gets the total number of substitutions made for ``old`` across every path."""
+    return sum(report.get(old, {}).values())
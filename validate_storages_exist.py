@@ -4,16 +4,17 @@
 
 # pyright: reportUnknownMemberType=false, reportUnknownVariableType=false
 
-import json
-from re import Pattern
-import re
 from typing import Any
 
 # from logger import pprint
 from local_types import JsonType
-from json_tools import json_serialize, parse_constant
+from uuid_rewrite import as_uuid, rewrite_uuids
 from palworld_save_tools.archive import UUID
 
+# Raw bytes of every container key in the level.
+ContainerIds = set[bytes]
+CONTAINER_SECTIONS: list[str] = ["ItemContainerSaveData", "CharacterContainerSaveData"]
+
 
 def list_transfer_uuid_to_str(_input: dict[str, UUID]) -> list[str]:
     """Transfers a dictionary of string and UUID to a list of strings that are the UUIDs."""
@@ -38,53 +39,55 @@ def get_all_storage_id(player_data: JsonType) -> dict[str, UUID]:
     return output
 
 
-def validate_storages(level_data: JsonType, player_data: JsonType) -> bool:
+def get_container_ids(level_data: JsonType) -> ContainerIds:
+    """Gets the keys of every item and character container defined in the level data."""
+    output: ContainerIds = set()
+    world_data: dict[str, Any] = level_data["properties"]["worldSaveData"]["value"]
+    for section in CONTAINER_SECTIONS:
+        if section in world_data:
+            for entry in world_data[section]["value"]:
+                output.add(as_uuid(entry["key"]["ID"]["value"]).raw_bytes)
+    return output
+
+
+def validate_storages(level_data: JsonType, player_data: JsonType, container_ids: ContainerIds | None = None) -> bool:
     r"""
-    Validates that all storages defined in ``player_data`` are also defined in ``level_data``.
+    Validates that any storage defined in ``player_data`` is also defined as a container in ``level_data``.
+    ``container_ids`` can be passed to reuse the result of ``get_container_ids`` across calls.
     """
-    returned: bool = False
-    json_text: str = json.dumps(level_data, default=json_serialize)
+    if container_ids is None:
+        container_ids = get_container_ids(level_data)
     storage_ids: dict[str, UUID] = get_all_storage_id(player_data)
 
     for _, _id in storage_ids.items():
-        regex: Pattern[str] = re.compile(re.escape(str(_id)))
-        found: list[Any] = regex.findall(json_text)
-        if len(found) > 0:
-            #       if len(found) > 0:
-            #           pprint(f"[green][bold]INFO:[/bold][/green] Found {len(found)} instances of the old "
-            #                  f"GUID Unformatted: {str(_id)}", indent=3)
-            #       else:
-            #           pprint(f"[yellow][bold]WARN:[/bold][/yellow] No id found with string \"{str(_id)}\"",
-            #                  indent=3)
-            returned = True
-    return returned
-
-
-def update_storages(old_id: UUID, new_id: UUID, json_text: str) -> str:
-    r"""Updates all storages in a collection defined in ``player_data``."""
-    regex: Pattern[str] = re.compile(re.escape(str(old_id)))
-    found: list[Any] = regex.findall(json_text)
-    if len(found) > 0:
-        json_text = json_text.replace(str(old_id), str(new_id))
-    return json_text
-
-
-def correct_storages(level_data: JsonType, new_player_data: JsonType, old_player_data: JsonType) -> tuple[bool, JsonType]:
+        if as_uuid(_id).raw_bytes in container_ids:
+            return True
+    return False
+
+
+def correct_storages(level_data: JsonType, new_player_data: JsonType, old_player_data: JsonType, container_ids: ContainerIds | None = None) -> tuple[bool, JsonType]:
     r"""
     Corrects missing storages that all storages defined in either,
     ``new_player_data`` or ``old_player_data``, to the other one that it is missing in.
+    The correction is checked against the container keys it would leave first, and only when it succeeds are the nodes
+    referencing a corrected storage rewritten, in place, and ``container_ids`` updated. Otherwise ``level_data`` is left untouched.
     """
-    out_data: JsonType = {}
-    json_text: str = json.dumps(level_data, default=json_serialize)
+    if container_ids is None:
+        container_ids = get_container_ids(level_data)
     new_storage_ids: dict[str, UUID] = get_all_storage_id(new_player_data)
     old_storage_ids: dict[str, UUID] = get_all_storage_id(old_player_data)
 
-    if validate_storages(level_data, new_player_data) and not validate_storages(level_data, old_player_data):
+    mapping: dict[UUID, UUID] = {}
+    if validate_storages(level_data, new_player_data, container_ids) and not validate_storages(level_data, old_player_data, container_ids):
         for j, new_id in new_storage_ids.items():
-            for k, old_id in old_storage_ids.items():
-                if j == k:
-                    json_text = update_storages(old_id, new_id, json_text)
-    out_data = json.loads(json_text, parse_constant=parse_constant)
-    out_bool: bool = validate_storages(out_data, new_player_data) and not validate_storages(out_data, old_player_data)
-
-    return (out_bool, out_data)
+            if j in old_storage_ids:
+                mapping[as_uuid(old_storage_ids[j])] = as_uuid(new_id)
+    raw_mapping: dict[bytes, bytes] = {old_id.raw_bytes: new_id.raw_bytes for old_id, new_id in mapping.items()}
+    corrected_ids: ContainerIds = {raw_mapping.get(_id, _id) for _id in container_ids}
+    out_bool: bool = validate_storages(level_data, new_player_data, corrected_ids) and not validate_storages(level_data, old_player_data, corrected_ids)
+
+    if out_bool and len(mapping) > 0:
+        rewrite_uuids(level_data, mapping)
+        container_ids.clear()
+        container_ids.update(corrected_ids)
+    return (out_bool, level_data)